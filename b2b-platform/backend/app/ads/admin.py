@@ -2,7 +2,9 @@ from django.contrib import admin
 from django import forms
 from django.forms import TextInput, Textarea, DateTimeInput, Select, CheckboxInput
 
-from .models import Action, Ad
+from app.common.utils import validate_image_header
+
+from .models import Action, Ad, AdDailyStats
 
 
 class AdAdminForm(forms.ModelForm):
@@ -27,6 +29,13 @@ class AdAdminForm(forms.ModelForm):
             'is_active': 'Отметьте для активации рекламы',
         }
 
+    def clean_image(self):
+        # Заголовок проверяется только у нового файла: сохраненный не перечитывается
+        image = self.cleaned_data.get('image')
+        if 'image' in self.changed_data:
+            validate_image_header(image)
+        return image
+
     def clean(self):
         # Убираем все валидации для изображения рекламы
         cleaned_data = super().clean()
@@ -172,3 +181,21 @@ class ActionAdmin(admin.ModelAdmin):
 
     is_current.boolean = True
     is_current.short_description = "Активна сейчас"
+
+
+@admin.register(AdDailyStats)
+class AdDailyStatsAdmin(admin.ModelAdmin):
+    """Дневная статистика заполняется буфером счетчиков, в админке только просмотр"""
+
+    list_display = ["ad", "date", "impressions", "clicks"]
+    list_filter = ["date", "ad__position"]
+    search_fields = ["ad__title"]
+    list_select_related = ["ad"]
+    date_hierarchy = "date"
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AdsConfig(AppConfig):
+    name = "app.ads"
+
+    def ready(self):
+        # Подключаем обработчики сигналов (флаги акций у товаров и компаний, расписание баннеров)
+        from . import signals  # noqa: F401
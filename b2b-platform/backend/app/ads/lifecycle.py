@@ -0,0 +1,116 @@
+"""
+Жизненный цикл акций: флаги Product.on_sale и Company.has_active_actions.
+
+Флаги денормализуют «есть текущая акция» (is_active и now в периоде
+starts_at..ends_at), поэтому фильтры списков работают по индексированным
+булевым полям без JOIN с акциями. Флаги пересчитываются множественными
+UPDATE: сигналами при изменении акции или ее товаров (app.ads.signals) и
+командой sync_action_flags на границах starts_at/ends_at. Команда должна
+работать постоянно: сервис scheduler в docker-compose.yml
+(sync_action_flags --interval 60) или cron раз в минуту, иначе флаги
+устаревают при начале и окончании акций.
+
+При полном пересчете on_sale снимается только у товаров, которые входят
+хотя бы в одну акцию: флаг товаров без акций задается вручную и не
+трогается. Товары, явно переданные в product_ids (их акции только что
+изменились, в том числе их убрали из акции), пересчитываются всегда.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from app.common import facets
+
+from .models import Action
+
+
+def current_actions(now=None):
+    now = now or timezone.now()
+    return Action.objects.filter(is_active=True, starts_at__lte=now, ends_at__gte=now)
+
+
+def next_boundary(now=None):
+    """Ближайшее будущее начало или окончание активной акции (None - нет)"""
+    from django.db.models import Min
+
+    now = now or timezone.now()
+    active = Action.objects.filter(is_active=True)
+    starts = active.filter(starts_at__gt=now).aggregate(at=Min("starts_at"))["at"]
+    ends = active.filter(ends_at__gt=now).aggregate(at=Min("ends_at"))["at"]
+    return min((at for at in (starts, ends) if at), default=None)
+
+
+def sync_action_flags(now=None, product_ids=None, company_ids=None):
+    """
+    Приводит флаги в соответствие с текущими акциями. product_ids и
+    company_ids ограничивают пересчет (None - все строки, пустой список -
+    пропустить). Возвращает количество измененных строк по видам.
+    """
+    from app.companies.models import Company
+    from app.products.models import Product
+
+    current = current_actions(now)
+    changed = {"products_on": 0, "products_off": 0, "companies_on": 0, "companies_off": 0}
+
+    if product_ids is None or product_ids:
+        memberships = Action.products.through.objects.filter(product_id=OuterRef("pk"))
+        in_current = Exists(memberships.filter(action__in=current))
+        if product_ids is None:
+            products = Product.objects.all()
+            derived = products.filter(Exists(memberships))
+        else:
+            products = derived = Product.objects.filter(pk__in=product_ids)
+        changed["products_on"] = products.filter(in_current, on_sale=False).update(on_sale=True)
+        changed["products_off"] = derived.filter(~in_current, on_sale=True).update(on_sale=False)
+        if changed["products_on"] or changed["products_off"]:
+            facets.invalidate("products")
+
+    if company_ids is None or company_ids:
+        companies = Company.objects.all()
+        if company_ids is not None:
+            companies = companies.filter(pk__in=company_ids)
+        has_current = Exists(current.filter(company_id=OuterRef("pk")))
+        changed["companies_on"] = companies.filter(has_current, has_active_actions=False).update(
+            has_active_actions=True
+        )
+        changed["companies_off"] = companies.filter(~has_current, has_active_actions=True).update(
+            has_active_actions=False
+        )
+        if changed["companies_on"] or changed["companies_off"]:
+            # Фасеты компаний с фильтром has_actions
+            facets.invalidate("companies")
+
+    return changed
+
+
+def add_action_products(action, products, batch_size=1000):
+    """
+    Добавляет товары выборки products в акцию: недостающие строки связи
+    определяются одним запросом и вставляются пачками, флаги обновляются
+    одним пересчетом. Возвращает количество добавленных товаров.
+    """
+    Through = Action.products.through
+    linked = Through.objects.filter(action=action, product_id=OuterRef("pk"))
+    new_ids = list(products.filter(~Exists(linked)).order_by().values_list("pk", flat=True))
+    if not new_ids:
+        return 0
+    with transaction.atomic():
+        Through.objects.bulk_create(
+            [Through(action_id=action.pk, product_id=product_id) for product_id in new_ids],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        sync_action_flags(product_ids=new_ids, company_ids=[])
+    return len(new_ids)
+
+
+def remove_action_products(action, products):
+    """Убирает товары выборки products из акции; возвращает количество удаленных"""
+    Through = Action.products.through
+    links = Through.objects.filter(action=action, product__in=products)
+    with transaction.atomic():
+        removed_ids = list(links.values_list("product_id", flat=True))
+        if removed_ids:
+            Through.objects.filter(action=action, product_id__in=removed_ids).delete()
+            sync_action_flags(product_ids=removed_ids, company_ids=[])
+    return len(removed_ids)
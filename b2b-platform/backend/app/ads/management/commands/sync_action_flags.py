@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from app.ads.lifecycle import next_boundary, sync_action_flags
+
+
+class Command(BaseCommand):
+    help = (
+        "Update Product.on_sale and Company.has_active_actions for actions that started or ended. "
+        "Run once a minute from cron, or keep it running with --interval"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Keep running: sync every N seconds and right after each action start/end (0 - run once)",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            changed = sync_action_flags()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Products on sale: +{changed['products_on']} -{changed['products_off']}, "
+                    f"companies with actions: +{changed['companies_on']} -{changed['companies_off']}"
+                )
+            )
+            if interval <= 0:
+                return
+            # Спим до следующего интервала или до ближайшей границы акции, если она раньше
+            delay = interval
+            boundary = next_boundary()
+            if boundary is not None:
+                delay = min(delay, max(1, (boundary - timezone.now()).total_seconds() + 1))
+            close_old_connections()
+            time.sleep(delay)
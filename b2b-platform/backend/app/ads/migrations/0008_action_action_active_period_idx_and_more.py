@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0007_action_products"),
+        ("companies", "0006_company_indexes"),
+        ("products", "0012_product_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="action",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["starts_at", "ends_at"],
+                name="action_active_period_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["position", "starts_at"],
+                name="ad_active_position_idx",
+            ),
+        ),
+    ]
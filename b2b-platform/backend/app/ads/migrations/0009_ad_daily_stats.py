@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0008_action_action_active_period_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Дата")),
+                (
+                    "impressions",
+                    models.PositiveIntegerField(default=0, verbose_name="Показы"),
+                ),
+                (
+                    "clicks",
+                    models.PositiveIntegerField(default=0, verbose_name="Клики"),
+                ),
+                (
+                    "ad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="ads.ad",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика рекламы за день",
+                "verbose_name_plural": "Статистика рекламы по дням",
+                "ordering": ["-date"],
+                "indexes": [
+                    models.Index(fields=["date"], name="ad_daily_stats_date_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="addailystats",
+            constraint=models.UniqueConstraint(
+                fields=("ad", "date"), name="ad_daily_stats_unique"
+            ),
+        ),
+    ]
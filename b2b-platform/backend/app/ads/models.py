@@ -42,6 +42,14 @@ class Ad(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Рекламное объявление"
         verbose_name_plural = "Рекламные объявления"
+        indexes = [
+            # Текущие баннеры для позиции
+            models.Index(
+                fields=["position", "starts_at"],
+                condition=models.Q(is_active=True),
+                name="ad_active_position_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -78,6 +86,14 @@ class Action(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Текущие акции: is_active и период проведения
+            models.Index(
+                fields=["starts_at", "ends_at"],
+                condition=models.Q(is_active=True),
+                name="action_active_period_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.company.name}"
@@ -88,3 +104,26 @@ class Action(models.Model):
 
         now = timezone.now()
         return self.is_active and self.starts_at <= now <= self.ends_at
+
+
+class AdDailyStats(models.Model):
+    """Показы и клики баннера за день (заполняется буфером app.ads.stats)"""
+
+    ad = models.ForeignKey(Ad, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField(verbose_name="Дата")
+    impressions = models.PositiveIntegerField(default=0, verbose_name="Показы")
+    clicks = models.PositiveIntegerField(default=0, verbose_name="Клики")
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Статистика рекламы за день"
+        verbose_name_plural = "Статистика рекламы по дням"
+        constraints = [
+            models.UniqueConstraint(fields=["ad", "date"], name="ad_daily_stats_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["date"], name="ad_daily_stats_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.ad} - {self.date}"
@@ -0,0 +1,97 @@
+"""
+Расписание баннеров в памяти процесса.
+
+Индекс хранит активные баннеры, которые уже показываются или начнутся
+позже, сгруппированные по позиции и отсортированные по starts_at. Текущие
+баннеры выбираются в памяти, без запросов к БД. Индекс перечитывается:
+- после сохранения или удаления Ad (сигналы app.ads.signals поднимают
+  версию в кеше, ее видят и другие процессы при общем кеше);
+- при наступлении ближайшего ends_at, чтобы убрать завершенные баннеры;
+- не реже ADS_SCHEDULE_MAX_AGE секунд (на случай локального кеша
+  у каждого воркера).
+"""
+import threading
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+VERSION_KEY = "ads:schedule:version"
+
+
+def invalidate():
+    """Помечает расписание устаревшим во всех процессах с общим кешем"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+    schedule.expire()
+
+
+class AdSchedule:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._positions = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._refresh_at = None
+
+    def expire(self):
+        self._version = None
+
+    def load(self, now):
+        from .models import Ad
+
+        ads = (
+            Ad.objects.filter(is_active=True, starts_at__isnull=False)
+            .filter(Q(ends_at__isnull=True) | Q(ends_at__gte=now))
+            .order_by("starts_at", "pk")
+        )
+        positions = {}
+        for ad in ads:
+            starts, items = positions.setdefault(ad.position, ([], []))
+            starts.append(ad.starts_at)
+            items.append(ad)
+        ends = [ad.ends_at for _, items in positions.values() for ad in items if ad.ends_at]
+        return positions, min(ends) if ends else None
+
+    def _is_stale(self, now, version):
+        if version != self._version:
+            return True
+        if self._refresh_at is not None and now > self._refresh_at:
+            return True
+        return time.monotonic() - self._loaded_at > settings.ADS_SCHEDULE_MAX_AGE
+
+    def current(self, position=None, now=None):
+        """Текущие баннеры позиции (или всех позиций), новые первыми"""
+        now = now or timezone.now()
+        version = cache.get(VERSION_KEY, 0)
+        positions = self._positions
+        if self._is_stale(now, version):
+            with self._lock:
+                if self._is_stale(now, version):
+                    self._positions, self._refresh_at = self.load(now)
+                    self._version = version
+                    self._loaded_at = time.monotonic()
+                positions = self._positions
+
+        if position is not None:
+            positions = {position: positions[position]} if position in positions else {}
+        result = []
+        for starts, items in positions.values():
+            # Баннеры, начавшиеся к now: префикс списка, отсортированного по starts_at
+            for ad in items[:bisect_right(starts, now)]:
+                if ad.ends_at is None or ad.ends_at >= now:
+                    result.append(ad)
+        result.sort(key=lambda ad: ad.created_at, reverse=True)
+        return result
+
+    def get_current(self, ad_id, now=None):
+        """Баннер ad_id, если он показывается сейчас, иначе None"""
+        return next((ad for ad in self.current(now=now) if ad.pk == ad_id), None)
+
+
+schedule = AdSchedule()
@@ -1,5 +1,8 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 
+from app.common.utils import validate_image_header
+
 from .models import Action, Ad
 
 
@@ -21,6 +24,14 @@ class AdSerializer(serializers.ModelSerializer):
             "created_at",
         ]
 
+    def validate_image(self, value):
+        """Формат и размер нового файла проверяются по заголовку"""
+        try:
+            validate_image_header(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return value
+
 
 class ActionSerializer(serializers.ModelSerializer):
     company_name = serializers.CharField(source="company.name", read_only=True)
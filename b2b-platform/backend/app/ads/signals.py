@@ -0,0 +1,48 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import schedule
+from .lifecycle import sync_action_flags
+from .models import Action, Ad
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_delete, sender=Ad)
+def refresh_ad_schedule(sender, **kwargs):
+    """Расписание баннеров перечитывается при следующем показе"""
+    schedule.invalidate()
+
+
+@receiver(post_save, sender=Action)
+def sync_flags_on_action_save(sender, instance, **kwargs):
+    """Изменение периода или is_active акции сразу отражается во флагах"""
+    sync_action_flags(
+        product_ids=list(instance.products.values_list("pk", flat=True)),
+        company_ids=[instance.company_id],
+    )
+
+
+@receiver(pre_delete, sender=Action)
+def remember_action_products(sender, instance, **kwargs):
+    instance._product_ids = list(instance.products.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Action)
+def sync_flags_on_action_delete(sender, instance, **kwargs):
+    sync_action_flags(product_ids=getattr(instance, "_product_ids", []), company_ids=[instance.company_id])
+
+
+@receiver(m2m_changed, sender=Action.products.through)
+def sync_flags_on_products_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Товары, добавленные в акцию или удаленные из нее"""
+    if action == "pre_clear":
+        related = instance.actions if reverse else instance.products
+        instance._cleared_pks = set(related.values_list("pk", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_cleared_pks", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    product_ids = [instance.pk] if reverse else list(pk_set)
+    sync_action_flags(product_ids=product_ids, company_ids=[])
@@ -0,0 +1,95 @@
+"""
+Показы и клики баннеров.
+
+Показы и клики не пишутся в БД в запросе: они копятся в CounterBuffer
+(app.common.counters) по ключу (ad_id, дата, поле) и раз в
+AD_STATS_FLUSH_INTERVAL секунд попадают в дневные строки AdDailyStats.
+Сброс пакетный, см. add_daily_counts.
+"""
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from app.common.counters import CounterBuffer, add_daily_counts
+
+IMPRESSIONS = "impressions"
+CLICKS = "clicks"
+
+
+def write_daily_stats(counts):
+    """Прибавляет приращения {(ad_id, date, field): n} к дневным строкам"""
+    from .models import AdDailyStats
+
+    rows = defaultdict(lambda: {IMPRESSIONS: 0, CLICKS: 0})
+    for (ad_id, date, field), amount in counts.items():
+        rows[(ad_id, date)][field] += amount
+    add_daily_counts(AdDailyStats, "ad", rows)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_stats_buffer():
+    """Общий буфер счетчиков рекламы процесса"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = CounterBuffer(
+                    "ad-stats", write_daily_stats, flush_interval=settings.AD_STATS_FLUSH_INTERVAL
+                )
+    return _buffer
+
+
+def record(field, ad_ids):
+    buffer = get_stats_buffer()
+    today = timezone.localdate()
+    for ad_id in ad_ids:
+        buffer.add((ad_id, today, field))
+
+
+def record_impressions(ads):
+    record(IMPRESSIONS, [ad.pk for ad in ads])
+
+
+def record_click(ad_id):
+    record(CLICKS, [ad_id])
+
+
+def report(date_from, date_to, ad_id=None):
+    """Показы, клики и CTR по баннерам и по дням за период"""
+    from .models import AdDailyStats
+
+    rows = AdDailyStats.objects.filter(date__gte=date_from, date__lte=date_to)
+    if ad_id is not None:
+        rows = rows.filter(ad_id=ad_id)
+
+    def with_ctr(item):
+        item["ctr"] = round(item[CLICKS] / item[IMPRESSIONS] * 100, 2) if item[IMPRESSIONS] else 0.0
+        return item
+
+    totals = (
+        rows.values("ad_id", "ad__title", "ad__position")
+        .annotate(impressions=Sum(IMPRESSIONS), clicks=Sum(CLICKS))
+        .order_by("-impressions", "ad_id")
+    )
+    daily = rows.values("date").annotate(impressions=Sum(IMPRESSIONS), clicks=Sum(CLICKS)).order_by("date")
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "results": [
+            with_ctr({
+                "ad_id": item["ad_id"],
+                "title": item["ad__title"],
+                "position": item["ad__position"],
+                "impressions": item[IMPRESSIONS],
+                "clicks": item[CLICKS],
+            })
+            for item in totals
+        ],
+        "daily": [with_ctr(item) for item in daily],
+    }
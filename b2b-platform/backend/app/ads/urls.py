@@ -6,6 +6,9 @@ urlpatterns = [
     # Ads
     path("", views.AdListCreateView.as_view(), name="ad-list-create"),
     path("<int:pk>/", views.AdRetrieveUpdateDestroyView.as_view(), name="ad-detail"),
+    path("<int:pk>/click/", views.AdClickView.as_view(), name="ad-click"),
+    path("serve/", views.serve_ads, name="ad-serve"),
+    path("stats/", views.ad_stats_report, name="ad-stats"),
     # Actions
     path("actions/", views.ActionListCreateView.as_view(), name="action-list-create"),
     path("actions/my/", views.MyActionsView.as_view(), name="my-actions"),
@@ -5,11 +5,17 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 
+from app.common.counters import parse_period
 from app.common.permissions import IsAdmin
 
+from .lifecycle import add_action_products, remove_action_products
 from .models import Action, Ad
+from . import stats
+from .schedule import schedule
 from .serializers import (ActionCreateUpdateSerializer, ActionSerializer,
                           AdSerializer)
 
@@ -53,6 +59,68 @@ class AdListCreateView(generics.ListCreateAPIView):
         return [permissions.AllowAny()]
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def serve_ads(request):
+    """
+    Текущие баннеры для показа.
+    GET /ads/serve/?position=HOME_WIDGET
+
+    Баннеры берутся из расписания в памяти процесса (app.ads.schedule),
+    запросов к БД на каждый показ нет.
+    """
+    position = request.query_params.get('position')
+    if position is not None and position not in dict(Ad.POSITION_CHOICES):
+        return Response(
+            {"error": "Неизвестная позиция"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    ads = schedule.current(position)
+    # Показы копятся в памяти и пишутся в AdDailyStats фоновым сбросом
+    stats.record_impressions(ads)
+    return Response({"results": AdSerializer(ads, many=True, context={"request": request}).data})
+
+
+class AdClickView(APIView):
+    """
+    Клик по баннеру.
+    POST /ads/{id}/click/
+
+    Учитываются только клики по баннерам, которые показываются сейчас
+    (расписание в памяти, без запроса к БД), с лимитом AD_CLICK_THROTTLE_RATE.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'ad_click'
+
+    def post(self, request, pk):
+        if schedule.get_current(pk) is None:
+            return Response(
+                {"error": "Баннер не найден"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        stats.record_click(pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def ad_stats_report(request):
+    """
+    Статистика показов и кликов за период (по умолчанию последние 30 дней).
+    GET /ads/stats/?date_from=2024-01-01&date_to=2024-01-31&ad=1
+    """
+    date_from, date_to = parse_period(request.query_params)
+    ad_id = request.query_params.get('ad')
+    if ad_id is not None and not ad_id.isdigit():
+        return Response(
+            {"error": "ad должен быть числом"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(stats.report(date_from, date_to, int(ad_id) if ad_id else None))
+
+
 class AdRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Ad.objects.all()
     serializer_class = AdSerializer
@@ -150,69 +218,83 @@ class MyActionsView(generics.ListAPIView):
         return Action.objects.filter(company__owner=self.request.user)
 
 
+# Максимум товаров в одном запросе добавления/удаления
+MAX_ACTION_PRODUCTS_PER_REQUEST = 10000
+
+
+def get_requested_products(request):
+    """
+    Товары пользователя из тела запроса: {"product_ids": [...]} или
+    {"all": true} для всего каталога. Возвращает (queryset, ошибка).
+    """
+    from app.products.models import Product
+
+    products = Product.objects.filter(company__owner=request.user)
+    if request.data.get('all') is True:
+        return products, None
+
+    product_ids = request.data.get('product_ids', [])
+    if not product_ids:
+        return None, Response(
+            {"error": "Не указаны ID товаров"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not isinstance(product_ids, list) or len(product_ids) > MAX_ACTION_PRODUCTS_PER_REQUEST:
+        return None, Response(
+            {"error": f"product_ids должен быть списком не длиннее {MAX_ACTION_PRODUCTS_PER_REQUEST}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        product_ids = {int(product_id) for product_id in product_ids}
+    except (TypeError, ValueError):
+        return None, Response(
+            {"error": "ID товаров должны быть числами"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return products.filter(id__in=product_ids), None
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def add_products_to_action(request, action_id):
     """
     Добавить товары в акцию.
     POST /ads/actions/{action_id}/add-products/
-    Body: {"product_ids": [1, 2, 3]}
-    """
-    try:
-        # Получаем акцию, проверяем что она принадлежит пользователю
-        action = Action.objects.filter(
-            id=action_id,
-            company__owner=request.user
-        ).first()
+    Body: {"product_ids": [1, 2, 3]} или {"all": true}
 
-        if not action:
-            return Response(
-                {"error": "Акция не найдена или не принадлежит вам"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        product_ids = request.data.get('product_ids', [])
-        if not product_ids:
-            return Response(
-                {"error": "Не указаны ID товаров"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    Недостающие связи вставляются пачками, флаг on_sale обновляется одним
+    UPDATE по периоду акции (app.ads.lifecycle).
+    """
+    # Получаем акцию, проверяем что она принадлежит пользователю
+    action = Action.objects.filter(
+        id=action_id,
+        company__owner=request.user
+    ).first()
 
-        # Получаем товары пользователя
-        from app.products.models import Product
-        products = Product.objects.filter(
-            id__in=product_ids,
-            company__owner=request.user
+    if not action:
+        return Response(
+            {"error": "Акция не найдена или не принадлежит вам"},
+            status=status.HTTP_404_NOT_FOUND
         )
 
-        if not products.exists():
-            return Response(
-                {"error": "Товары не найдены или не принадлежат вам"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        # Добавляем товары в акцию и обновляем флаг on_sale
-        added_count = 0
-        for product in products:
-            if product not in action.products.all():
-                action.products.add(product)
-                product.on_sale = True
-                product.save()
-                added_count += 1
+    products, error = get_requested_products(request)
+    if error:
+        return error
 
-        return Response({
-            "success": True,
-            "message": f"Добавлено {added_count} товаров в акцию",
-            "action_id": action.id,
-            "total_products": action.products.count()
-        }, status=status.HTTP_200_OK)
-
-    except Exception as e:
+    added_count = add_action_products(action, products)
+    if not added_count and not products.exists():
         return Response(
-            {"error": str(e)},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {"error": "Товары не найдены или не принадлежат вам"},
+            status=status.HTTP_404_NOT_FOUND
         )
 
+    return Response({
+        "success": True,
+        "message": f"Добавлено {added_count} товаров в акцию",
+        "action_id": action.id,
+        "total_products": action.products.count()
+    }, status=status.HTTP_200_OK)
+
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -220,66 +302,38 @@ def remove_products_from_action(request, action_id):
     """
     Удалить товары из акции.
     POST /ads/actions/{action_id}/remove-products/
-    Body: {"product_ids": [1, 2, 3]}
+    Body: {"product_ids": [1, 2, 3]} или {"all": true}
     """
-    try:
-        # Получаем акцию, проверяем что она принадлежит пользователю
-        action = Action.objects.filter(
-            id=action_id,
-            company__owner=request.user
-        ).first()
-
-        if not action:
-            return Response(
-                {"error": "Акция не найдена или не принадлежит вам"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        product_ids = request.data.get('product_ids', [])
-        if not product_ids:
-            return Response(
-                {"error": "Не указаны ID товаров"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    # Получаем акцию, проверяем что она принадлежит пользователю
+    action = Action.objects.filter(
+        id=action_id,
+        company__owner=request.user
+    ).first()
 
-        # Получаем товары
-        from app.products.models import Product
-        products = Product.objects.filter(
-            id__in=product_ids,
-            company__owner=request.user
+    if not action:
+        return Response(
+            {"error": "Акция не найдена или не принадлежит вам"},
+            status=status.HTTP_404_NOT_FOUND
         )
 
-        if not products.exists():
-            return Response(
-                {"error": "Товары не найдены"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        # Удаляем товары из акции и обновляем флаг on_sale если товар не в других акциях
-        removed_count = 0
-        for product in products:
-            if product in action.products.all():
-                action.products.remove(product)
-                removed_count += 1
+    products, error = get_requested_products(request)
+    if error:
+        return error
 
-                # Проверяем, есть ли товар в других акциях
-                if not product.actions.exists():
-                    product.on_sale = False
-                    product.save()
-
-        return Response({
-            "success": True,
-            "message": f"Удалено {removed_count} товаров из акции",
-            "action_id": action.id,
-            "total_products": action.products.count()
-        }, status=status.HTTP_200_OK)
-
-    except Exception as e:
+    removed_count = remove_action_products(action, products)
+    if not removed_count and not products.exists():
         return Response(
-            {"error": str(e)},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {"error": "Товары не найдены"},
+            status=status.HTTP_404_NOT_FOUND
         )
 
+    return Response({
+        "success": True,
+        "message": f"Удалено {removed_count} товаров из акции",
+        "action_id": action.id,
+        "total_products": action.products.count()
+    }, status=status.HTTP_200_OK)
+
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -300,7 +354,7 @@ def get_action_products(request, action_id):
 
         # Получаем товары акции
         from app.products.serializers import ProductListSerializer
-        products = action.products.all()
+        products = action.products.select_related('company', 'category').prefetch_related('product_images')
         serializer = ProductListSerializer(products, many=True, context={'request': request})
 
         return Response({
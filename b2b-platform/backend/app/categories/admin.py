@@ -1,9 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.http import HttpResponse
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, PatternFill, Alignment
 import datetime
 
 from .models import Category
@@ -94,6 +91,10 @@ class CategoryAdmin(admin.ModelAdmin):
         """
         Экспорт выбранных категорий в Excel файл
         """
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment, Font, PatternFill
+        from openpyxl.utils import get_column_letter
+
         # Создаём новый workbook
         workbook = Workbook()
         worksheet = workbook.active
@@ -217,6 +218,10 @@ class CategoryAdmin(admin.ModelAdmin):
         """
         Генерация образца Excel файла для импорта категорий
         """
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment, Font, PatternFill
+        from openpyxl.utils import get_column_letter
+
         # Создаём новый workbook для образца
         workbook = Workbook()
         worksheet = workbook.active
@@ -10,10 +10,10 @@ from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import HttpResponseRedirect
 from django.urls import reverse
-from openpyxl import load_workbook
 import logging
 
 from app.common.permissions import IsAdminOrReadOnly, IsSupplierOrAdmin
+from app.common.spreadsheets import load_workbook
 
 from .models import Category
 from .serializers import CategorySerializer, CategoryTreeSerializer
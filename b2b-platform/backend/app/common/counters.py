@@ -0,0 +1,144 @@
+"""
+Буферизованные счетчики (write-behind).
+
+Приращения копятся в словаре в памяти процесса и периодически
+сбрасываются функцией flush_func одним набором пакетных запросов, а не
+UPDATE на каждый показ или просмотр. Каждый воркер сбрасывает свои
+приращения; сброс прибавляет их к значениям в БД через F(), поэтому
+процессы не перезаписывают друг друга. При ошибке записи приращения
+возвращаются в буфер и попадут в следующий сброс.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    def __init__(self, name, flush_func, flush_interval=10.0, max_keys=100000):
+        self.name = name
+        self.flush_func = flush_func
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.dropped = 0
+        self.flushed = 0
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """Количество ключей, ожидающих записи"""
+        return len(self._counts)
+
+    def add(self, key, amount=1):
+        """Прибавляет amount к счетчику key; при переполнении приращение отбрасывается"""
+        if getattr(settings, "COUNTER_BUFFER_ASYNC", True):
+            self._ensure_thread()
+        with self._lock:
+            if key not in self._counts and len(self._counts) >= self.max_keys:
+                self.dropped += amount
+                return False
+            self._counts[key] += amount
+        return True
+
+    def flush(self):
+        """Передает накопленные приращения в flush_func, возвращает количество ключей"""
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return 0
+            try:
+                self.flush_func(dict(counts))
+            except Exception:
+                logger.exception("Failed to flush %s counters of %s", len(counts), self.name)
+                with self._lock:
+                    self._counts.update(counts)
+                return 0
+        self.flushed += len(counts)
+        return len(counts)
+
+    def stop(self):
+        """Останавливает фоновый поток и сбрасывает остаток"""
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread is None:
+                # Сбрасываем остаток при штатном завершении процесса
+                atexit.register(self.stop)
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+def add_daily_counts(model, owner_field, rows):
+    """
+    Прибавляет приращения {(owner_id, date): {поле: n}} к дневным строкам
+    model с уникальностью (owner_field, date). Недостающие строки
+    создаются одним bulk_create, приращения прибавляются через F() одним
+    UPDATE на группу строк с одинаковыми приращениями. Счетчики удаленных
+    объектов отбрасываются.
+    """
+    owner = model._meta.get_field(owner_field)
+    existing = set(
+        owner.related_model.objects.filter(pk__in={owner_id for owner_id, _ in rows}).values_list("pk", flat=True)
+    )
+    rows = {key: value for key, value in rows.items() if key[0] in existing}
+    if not rows:
+        return
+
+    groups = defaultdict(list)
+    for (owner_id, date), value in rows.items():
+        groups[(date, tuple(sorted(value.items())))].append(owner_id)
+
+    with transaction.atomic():
+        model.objects.bulk_create(
+            [model(**{owner.attname: owner_id, "date": date}) for owner_id, date in rows],
+            ignore_conflicts=True,
+        )
+        for (date, increments), owner_ids in groups.items():
+            model.objects.filter(**{"date": date, f"{owner.attname}__in": owner_ids}).update(
+                **{field: F(field) + amount for field, amount in increments}
+            )
+
+
+def parse_period(params, default_days=30):
+    """Период отчета из date_from/date_to (YYYY-MM-DD), по умолчанию последние default_days дней"""
+    today = timezone.localdate()
+    try:
+        date_from = parse_date(params.get("date_from") or str(today - timedelta(days=default_days - 1)))
+        date_to = parse_date(params.get("date_to") or str(today))
+    except ValueError:
+        date_from = date_to = None
+    if not date_from or not date_to:
+        raise ValidationError({"date_from": "Даты указываются в формате YYYY-MM-DD"})
+    return date_from, date_to
@@ -0,0 +1,95 @@
+"""
+Фасеты фильтров: варианты значений с количеством.
+
+Счетчики считаются группировкой в SQL по выборке, к которой применены
+текущие параметры FilterSet, кроме параметров самого фасета: так в боковой
+панели видны и альтернативы уже выбранному значению. Результат кешируется
+по набору параметров; ключ включает поколение области (scope), которое
+invalidate() увеличивает при изменении данных (сигналы моделей и пересчет
+флагов акций app.ads.lifecycle). Поколение хранится в кеше по умолчанию:
+при нескольких воркерах нужен общий кеш (CACHE_URL), иначе сброс в одном
+воркере не виден остальным до FACETS_CACHE_TIMEOUT.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+from app.common.metrics import record_cache_lookup
+
+
+class Facet:
+    """
+    name - ключ в ответе, field - поле группировки, params - параметры
+    фильтра, которые не применяются при подсчете этого фасета, labels -
+    дополнительные поля значения (например, название категории).
+    distinct нужен для полей через связь многие-ко-многим.
+    """
+
+    def __init__(self, name, field, params=(), labels=(), distinct=False):
+        self.name = name
+        self.field = field
+        self.params = tuple(params) or (name,)
+        self.labels = labels
+        self.distinct = distinct
+
+    def counts(self, queryset):
+        rows = (
+            queryset.filter(**{f"{self.field}__isnull": False})
+            .order_by()
+            .values(self.field, *self.labels)
+            .annotate(count=Count("pk", distinct=self.distinct))
+            .order_by("-count", self.field)
+        )
+        return [
+            {"value": row[self.field], **{label.rsplit("__", 1)[-1]: row[label] for label in self.labels}, "count": row["count"]}
+            for row in rows
+            if row[self.field] != ""
+        ]
+
+
+def _generation_key(scope):
+    return f"facets:{scope}:generation"
+
+
+def invalidate(scope):
+    """Сбрасывает кеш фасетов области (при изменении товаров, компаний)"""
+    try:
+        cache.incr(_generation_key(scope))
+    except ValueError:
+        cache.set(_generation_key(scope), 1, None)
+
+
+def filter_params(filterset_class, params):
+    """Параметры запроса, которые относятся к FilterSet"""
+    return {name: params.getlist(name) for name in sorted(filterset_class.base_filters) if name in params}
+
+
+def compute_facets(filterset_class, queryset, params, facets, request=None):
+    result = {}
+    for facet in facets:
+        facet_params = params.copy()
+        for name in facet.params:
+            facet_params.pop(name, None)
+        filterset = filterset_class(facet_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        result[facet.name] = facet.counts(filterset.qs)
+    return result
+
+
+def get_facets(scope, filterset_class, queryset, params, facets, request=None):
+    """Фасеты из кеша или вычисленные для параметров params (QueryDict)"""
+    signature = json.dumps(filter_params(filterset_class, params), sort_keys=True, default=str)
+    generation = cache.get(_generation_key(scope), 0)
+    key = f"facets:{scope}:{generation}:{hashlib.sha1(signature.encode()).hexdigest()}"
+
+    result = cache.get(key)
+    record_cache_lookup(f"facets_{scope}", result is not None)
+    if result is None:
+        result = compute_facets(filterset_class, queryset, params, facets, request)
+        cache.set(key, result, settings.FACETS_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,68 @@
+"""
+Поиск по расстоянию без PostGIS.
+
+Выборка сначала ограничивается прямоугольником вокруг точки (условия
+BETWEEN по индексированным latitude/longitude), затем для оставшихся строк
+расстояние по формуле гаверсинусов вычисляется в самом SQL-запросе, так что
+по нему можно фильтровать, сортировать и пагинировать.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from rest_framework.exceptions import ValidationError
+
+EARTH_RADIUS_KM = 6371.0088
+# Больше любого расстояния на Земле: подставляется вместо NULL
+FAR_KM = 2 * math.pi * EARTH_RADIUS_KM
+
+
+def parse_point(value, param="near"):
+    """Координаты из строки "lat,lng"; ValidationError при неверном формате"""
+    try:
+        latitude, longitude = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        raise ValidationError({param: "Ожидается формат lat,lng"})
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValidationError({param: "Координаты вне допустимого диапазона"})
+    return latitude, longitude
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Прямоугольник, содержащий круг радиуса radius_km:
+    (min_lat, max_lat, min_lng, max_lng). Долгота равна None, если круг
+    захватывает полюс или линию смены дат - тогда ограничение только по широте.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), None, None
+
+    ratio = math.sin(angular) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return min_lat, max_lat, None, None
+    delta_lng = math.degrees(math.asin(ratio))
+    min_lng, max_lng = longitude - delta_lng, longitude + delta_lng
+    if min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def bounding_box_q(box, lat_field="latitude", lng_field="longitude"):
+    min_lat, max_lat, min_lng, max_lng = box
+    condition = Q(**{f"{lat_field}__range": (min_lat, max_lat)})
+    if min_lng is not None:
+        condition &= Q(**{f"{lng_field}__range": (min_lng, max_lng)})
+    return condition
+
+
+def haversine_km(latitude, longitude, lat_field="latitude", lng_field="longitude"):
+    """SQL-выражение расстояния (км) от точки до координат строки"""
+    lat_rad = Radians(F(lat_field))
+    half_dlat = Sin((lat_rad - Value(math.radians(latitude))) / 2)
+    half_dlng = Sin((Radians(F(lng_field)) - Value(math.radians(longitude))) / 2)
+    a = Power(half_dlat, 2) + Value(math.cos(math.radians(latitude))) * Cos(lat_rad) * Power(half_dlng, 2)
+    # Least защищает ASin от значений чуть больше 1 из-за округления
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0), output_field=FloatField()))
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+
+DEFAULT_URLS = ["/api/companies/", "/api/products/", "/api/tenders/", "/api/reviews/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare list endpoint latency with a new database connection per request "
+        "(CONN_MAX_AGE=0) and with a persistent connection"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="*", help=f"URLs to request (default: {' '.join(DEFAULT_URLS)})")
+        parser.add_argument("--iterations", type=int, default=50, help="Requests per URL and mode")
+        parser.add_argument("--persistent-age", type=int, default=600, help="CONN_MAX_AGE for the persistent mode")
+
+    def handle(self, *args, **options):
+        urls = options["urls"] or DEFAULT_URLS
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        connection = connections["default"]
+        original_age = connection.settings_dict["CONN_MAX_AGE"]
+
+        self.stdout.write(f"{'url':<24} {'mode':<11} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+        try:
+            for url in urls:
+                means = {}
+                for mode, age in (("per-request", 0), ("persistent", options["persistent_age"])):
+                    connection.close()
+                    connection.settings_dict["CONN_MAX_AGE"] = age
+                    latencies = self.measure(handler, factory, url, options["iterations"])
+                    means[mode] = statistics.mean(latencies)
+                    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+                    self.stdout.write(
+                        f"{url:<24} {mode:<11} {statistics.median(latencies):>8.2f} {p95:>8.2f} {means[mode]:>8.2f}"
+                    )
+                saving = means["per-request"] - means["persistent"]
+                self.stdout.write(self.style.SUCCESS(f"{url:<24} saving     {saving:>8.2f} ms per request"))
+        finally:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = original_age
+
+    def measure(self, handler, factory, url, iterations):
+        """Полный цикл запроса через WSGIHandler, включая закрытие соединения по request_finished"""
+        environ = factory.get(url).environ
+        # Первый запрос прогревает импорт и кеши и не учитывается
+        self.request(handler, environ, url)
+        latencies = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            self.request(handler, environ, url)
+            latencies.append((time.perf_counter() - started) * 1000)
+        return sorted(latencies)
+
+    def request(self, handler, environ, url):
+        statuses = []
+        response = handler(dict(environ), lambda status, headers, *args: statuses.append(status))
+        b"".join(response)
+        response.close()
+        if not statuses[0].startswith("200"):
+            raise RuntimeError(f"{url}: {statuses[0]}")
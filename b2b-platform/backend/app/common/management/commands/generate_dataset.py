@@ -0,0 +1,411 @@
+import multiprocessing
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from multiprocessing.util import Finalize
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from app.categories.models import Category
+from app.companies import map_grid
+from app.companies.models import Company
+from app.products.models import Product
+from app.reviews.models import Review
+from app.tenders.models import Tender
+
+User = get_user_model()
+
+# Домен email всех сгенерированных пользователей: по нему набор удаляется (--clear)
+DATASET_EMAIL_DOMAIN = "dataset.local"
+
+# Города с весами (доля компаний/тендеров) и страной
+CITIES = [
+    ("Алматы", "Казахстан", 30),
+    ("Астана", "Казахстан", 20),
+    ("Шымкент", "Казахстан", 10),
+    ("Караганда", "Казахстан", 7),
+    ("Актобе", "Казахстан", 5),
+    ("Тараз", "Казахстан", 4),
+    ("Павлодар", "Казахстан", 4),
+    ("Усть-Каменогорск", "Казахстан", 4),
+    ("Атырау", "Казахстан", 3),
+    ("Костанай", "Казахстан", 3),
+    ("Москва", "Россия", 6),
+    ("Новосибирск", "Россия", 2),
+    ("Бишкек", "Кыргызстан", 2),
+]
+CURRENCIES = [("KZT", 70), ("RUB", 15), ("USD", 15)]
+# Средняя цена по валюте; цены распределены логнормально вокруг нее
+CURRENCY_PRICE = {"KZT": 25000, "RUB": 5000, "USD": 60}
+
+CATEGORY_TREE = {
+    "Строительные материалы": ["Цемент и смеси", "Кирпич и блоки", "Кровельные материалы"],
+    "Сантехника": ["Трубы и фитинги", "Смесители", "Водонагреватели"],
+    "Электрика": ["Кабель и провод", "Автоматика", "Освещение"],
+    "Инструменты": ["Электроинструмент", "Ручной инструмент"],
+    "Услуги": ["Монтаж", "Доставка", "Проектирование"],
+}
+PRODUCT_NOUNS = [
+    "Цемент", "Кирпич", "Блок газобетонный", "Профнастил", "Труба ПНД", "Фитинг",
+    "Смеситель", "Бойлер", "Кабель ВВГ", "Автомат", "Светильник LED", "Перфоратор",
+    "Шуруповерт", "Краска фасадная", "Утеплитель", "Гипсокартон", "Арматура", "Ламинат",
+]
+PRODUCT_GRADES = ["М400", "М500", "стандарт", "премиум", "эконом", "PRO", "2.5 мм", "10 м", "20 кг"]
+SERVICE_NOUNS = ["Монтаж", "Доставка", "Проектирование", "Демонтаж", "Консультация"]
+COMPANY_PREFIXES = ["ТОО", "ТОО", "ТОО", "ИП", "АО"]
+COMPANY_WORDS = [
+    "СТРОЙ", "САНТЕХ", "ЭЛЕКТРО", "МАСТЕР", "КОМПЛЕКТ", "ТРЕЙД", "ПЛЮС", "ЦЕНТР",
+    "СЕРВИС", "ИНДУСТРИЯ", "ПРОФИ", "ДОМ", "КРОВЛЯ", "БЕТОН", "ЭКСПЕРТ",
+]
+REVIEW_TEXTS = [
+    "Отличная компания, рекомендую!",
+    "Качественные товары, быстрая доставка.",
+    "Хорошее соотношение цена-качество.",
+    "Профессиональный подход к работе.",
+    "Сроки поставки сорвали, но товар хороший.",
+    "Не ответили на заявку.",
+]
+
+
+def weighted_choice(rng, items):
+    """Выбор значения из [(значение..., вес)] с учетом веса (последний элемент)"""
+    total = sum(item[-1] for item in items)
+    point = rng.uniform(0, total)
+    for item in items:
+        point -= item[-1]
+        if point <= 0:
+            return item
+    return items[-1]
+
+
+def skewed_index(rng, size, power=2.0):
+    """Индекс в [0, size) со смещением к началу: небольшое число крупных компаний"""
+    return min(size - 1, int(size * rng.random() ** power))
+
+
+def chunk_ranges(total, chunk_size):
+    """Разбивает total строк на пачки (номер, начало, размер)"""
+    for index, start in enumerate(range(0, total, chunk_size)):
+        yield index, start, min(chunk_size, total - start)
+
+
+def id_at(id_range, position):
+    """Id строки по ее позиции в диапазоне (lo, hi) или в явном списке id"""
+    if isinstance(id_range, list):
+        return id_range[position]
+    return id_range[0] + position
+
+
+def id_count(id_range):
+    if isinstance(id_range, list):
+        return len(id_range)
+    return id_range[1] - id_range[0] + 1
+
+
+def generate_users(rng, start, count, context):
+    role = context["role"]
+    prefix = "supplier" if role == "ROLE_SUPPLIER" else "buyer"
+    seed = context["seed"]
+    User.objects.bulk_create(
+        [
+            User(
+                email=f"{prefix}{number}.s{seed}@{DATASET_EMAIL_DOMAIN}",
+                username=f"{prefix}{number}_s{seed}",
+                password=context["password"],
+                role=role,
+                first_name=prefix.capitalize(),
+                last_name=str(number),
+            )
+            for number in range(start, start + count)
+        ],
+        batch_size=context["batch_size"],
+    )
+    return count
+
+
+def generate_companies(rng, start, count, context):
+    suppliers = context["suppliers"]
+    categories = context["categories"]
+    companies = []
+    for number in range(start, start + count):
+        city, country, _ = weighted_choice(rng, CITIES)
+        name = f"{rng.choice(COMPANY_PREFIXES)} {rng.choice(COMPANY_WORDS)}-{rng.choice(COMPANY_WORDS)} {number}"
+        companies.append(
+            Company(
+                owner_id=id_at(suppliers, number % id_count(suppliers)),
+                name=name,
+                description=f"{name}: поставки и услуги для строительства, г. {city}",
+                city=city,
+                country=country,
+                address=f"ул. Абая, {rng.randint(1, 300)}",
+                status=rng.choices(["APPROVED", "PENDING", "DRAFT"], weights=[90, 7, 3])[0],
+                # Рейтинг близок к нормальному со средним 4.2
+                rating=round(min(5.0, max(1.0, rng.gauss(4.2, 0.5))), 1),
+                staff_count=int(rng.lognormvariate(2.5, 1)),
+                branches_count=1 + int(rng.expovariate(1.5)),
+                latitude=round(rng.uniform(40.5, 55.5), 6),
+                longitude=round(rng.uniform(50.0, 87.0), 6),
+                contacts={"phones": [f"+7 7{rng.randint(10, 99)} {rng.randint(1000000, 9999999)}"]},
+            )
+        )
+    companies = Company.objects.bulk_create(companies, batch_size=context["batch_size"])
+
+    if categories and all(company.pk for company in companies):
+        through = Company.categories.through
+        through.objects.bulk_create(
+            [
+                through(company_id=company.pk, category_id=category_id)
+                for company in companies
+                for category_id in rng.sample(categories, k=min(len(categories), rng.randint(1, 3)))
+            ],
+            batch_size=context["batch_size"],
+        )
+    return count
+
+
+def generate_products(rng, start, count, context):
+    companies = context["companies"]
+    categories = context["categories"]
+    company_total = id_count(companies)
+    products = []
+    for number in range(start, start + count):
+        is_service = rng.random() < 0.15
+        currency = weighted_choice(rng, CURRENCIES)[0]
+        if is_service:
+            title = f"{rng.choice(SERVICE_NOUNS)} {rng.choice(PRODUCT_NOUNS).lower()}"
+        else:
+            title = f"{rng.choice(PRODUCT_NOUNS)} {rng.choice(PRODUCT_GRADES)}"
+        price = None
+        if rng.random() > 0.05:
+            price = Decimal(str(round(CURRENCY_PRICE[currency] * rng.lognormvariate(0, 1.2), 2)))
+        products.append(
+            Product(
+                company_id=id_at(companies, skewed_index(rng, company_total)),
+                title=title,
+                sku=f"SKU-{number:08d}",
+                description=f"{title}. Поставка со склада, оптовые скидки.",
+                price=min(price, Decimal("99999999.99")) if price is not None else None,
+                currency=currency,
+                is_service=is_service,
+                category_id=rng.choice(categories) if categories else None,
+                in_stock=rng.random() < 0.85,
+                is_active=rng.random() < 0.95,
+                on_sale=rng.random() < 0.1,
+                rating=Decimal(str(round(rng.uniform(4.0, 5.0), 2))),
+            )
+        )
+    Product.objects.bulk_create(products, batch_size=context["batch_size"])
+    return count
+
+
+def generate_reviews(rng, start, count, context):
+    """Отзывы для компаний с позиции start: у каждой компании разные авторы"""
+    companies = context["companies"]
+    buyers = context["buyers"]
+    buyer_total = id_count(buyers)
+    average = context["reviews_per_company"]
+    reviews = []
+    for position in range(start, start + count):
+        # Число отзывов распределено экспоненциально: у большинства компаний их мало
+        amount = min(buyer_total, int(rng.expovariate(1 / average)) if average else 0)
+        for buyer_position in rng.sample(range(buyer_total), amount):
+            rating = rng.choices([1, 2, 3, 4, 5], weights=[3, 4, 10, 33, 50])[0]
+            reviews.append(
+                Review(
+                    company_id=id_at(companies, position),
+                    author_id=id_at(buyers, buyer_position),
+                    rating=rating,
+                    text=rng.choice(REVIEW_TEXTS),
+                    status=rng.choices(["APPROVED", "PENDING", "REJECTED"], weights=[85, 10, 5])[0],
+                )
+            )
+    Review.objects.bulk_create(reviews, batch_size=context["batch_size"])
+    return len(reviews)
+
+
+def generate_tenders(rng, start, count, context):
+    companies = context["companies"]
+    buyers = context["buyers"]
+    categories = context["categories"]
+    today = timezone.now().date()
+    tenders = []
+    for number in range(start, start + count):
+        city = weighted_choice(rng, CITIES)[0]
+        currency = weighted_choice(rng, CURRENCIES)[0]
+        budget_min = round(CURRENCY_PRICE[currency] * 10 * rng.lognormvariate(0, 1.5), -2)
+        noun = rng.choice(PRODUCT_NOUNS)
+        tenders.append(
+            Tender(
+                author_id=id_at(buyers, rng.randrange(id_count(buyers))),
+                company_id=id_at(companies, rng.randrange(id_count(companies))),
+                title=f"Закуп: {noun} ({number})",
+                description=f"Требуется поставка: {noun.lower()}, доставка в г. {city}",
+                city=city,
+                status=rng.choices(["APPROVED", "PENDING", "REJECTED"], weights=[80, 15, 5])[0],
+                currency=currency,
+                budget_min=Decimal(str(budget_min)),
+                budget_max=Decimal(str(round(budget_min * rng.uniform(1.2, 3), -2))),
+                deadline_date=today + timedelta(days=rng.randint(-30, 90)),
+            )
+        )
+    tenders = Tender.objects.bulk_create(tenders, batch_size=context["batch_size"])
+
+    if categories and all(tender.pk for tender in tenders):
+        through = Tender.categories.through
+        through.objects.bulk_create(
+            [
+                through(tender_id=tender.pk, category_id=category_id)
+                for tender in tenders
+                for category_id in rng.sample(categories, k=min(len(categories), rng.randint(1, 2)))
+            ],
+            batch_size=context["batch_size"],
+        )
+    return count
+
+
+GENERATORS = {
+    "suppliers": generate_users,
+    "buyers": generate_users,
+    "companies": generate_companies,
+    "products": generate_products,
+    "reviews": generate_reviews,
+    "tenders": generate_tenders,
+}
+
+
+def run_chunk(task):
+    """
+    Генерирует одну пачку строк. Генератор случайных чисел пачки зависит
+    только от seed, вида данных и номера пачки, поэтому результат не зависит
+    от числа процессов и порядка выполнения пачек.
+    """
+    kind, index, start, count, context = task
+    rng = random.Random(f"{context['seed']}:{kind}:{index}")
+    with transaction.atomic():
+        return GENERATORS[kind](rng, start, count, context)
+
+
+def init_pool_worker():
+    """
+    Инициализация дочернего процесса пула: соединение с БД закрывается при
+    штатном завершении процесса. В основном процессе соединение и
+    транзакция вызывающего кода не трогаются.
+    """
+    Finalize(None, connections.close_all, exitpriority=10)
+
+
+class Command(BaseCommand):
+    help = "Generate a large synthetic dataset (companies, products, reviews, tenders) for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=1000, help="Number of companies")
+        parser.add_argument("--products", type=int, default=None, help="Number of products (default: 10 per company)")
+        parser.add_argument("--reviews", type=int, default=None, help="Approximate number of reviews (default: 3 per company)")
+        parser.add_argument("--tenders", type=int, default=None, help="Number of tenders (default: 1 per 5 companies)")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed; the same seed produces the same data")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Rows generated per transaction")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per INSERT statement")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes (PostgreSQL only)")
+        parser.add_argument("--clear", action="store_true", help="Delete previously generated data first")
+
+    def handle(self, *args, **options):
+        companies = options["companies"]
+        products = options["products"] if options["products"] is not None else companies * 10
+        reviews = options["reviews"] if options["reviews"] is not None else companies * 3
+        tenders = options["tenders"] if options["tenders"] is not None else max(1, companies // 5)
+        seed = options["seed"]
+        self.chunk_size = max(1, options["chunk_size"])
+        self.workers = max(1, options["workers"])
+        if self.workers > 1 and connection.vendor == "sqlite":
+            self.stdout.write(self.style.WARNING("SQLite does not support parallel writes, using one worker"))
+            self.workers = 1
+
+        if options["clear"]:
+            with map_grid.suspended():
+                deleted, _ = User.objects.filter(email__endswith=f"@{DATASET_EMAIL_DOMAIN}").delete()
+            self.stdout.write(f"Deleted {deleted} previously generated rows")
+
+        if User.objects.filter(email__endswith=f".s{seed}@{DATASET_EMAIL_DOMAIN}").exists():
+            raise CommandError(f"A dataset with seed {seed} already exists, use --clear or another --seed")
+
+        context = {
+            "seed": seed,
+            "batch_size": options["batch_size"],
+            # Хеш пароля считается один раз: make_password на каждого пользователя слишком медленный
+            "password": make_password("password123"),
+            "categories": self.ensure_categories(),
+        }
+
+        started = time.monotonic()
+        supplier_count = max(1, companies // 3)
+        buyer_count = max(20, min(companies, reviews // 5 + 1))
+
+        context["suppliers"] = self.run_phase("suppliers", supplier_count, User, {**context, "role": "ROLE_SUPPLIER"})
+        context["buyers"] = self.run_phase("buyers", buyer_count, User, {**context, "role": "ROLE_SEEKER"})
+        context["companies"] = self.run_phase("companies", companies, Company, context)
+        self.run_phase("products", products, Product, context)
+        # Отзывы генерируются пачками компаний: внутри пачки авторы у компании не повторяются
+        context["reviews_per_company"] = reviews / companies if companies else 0
+        self.run_phase("reviews", companies, Review, context)
+        self.run_phase("tenders", tenders, Tender, context)
+        # Пакетные вставки идут в обход сигналов, сетка карты пересчитывается целиком
+        map_grid.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated dataset with seed {seed} in {time.monotonic() - started:.1f}s")
+        )
+
+    def ensure_categories(self):
+        """Id активных категорий; если категорий нет, создается базовое дерево"""
+        if not Category.objects.filter(is_active=True).exists():
+            for name, children in CATEGORY_TREE.items():
+                parent = Category.objects.create(name=name)
+                for child in children:
+                    Category.objects.create(name=child, parent=parent)
+        return list(Category.objects.filter(is_active=True).values_list("id", flat=True))
+
+    def run_phase(self, kind, total, model, context):
+        """
+        Генерирует total строк пачками и возвращает диапазон id созданных
+        строк (lo, hi) либо явный список id, если диапазон не сплошной.
+        """
+        if total <= 0:
+            return []
+        last_id = model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        started = time.monotonic()
+
+        tasks = [(kind, index, start, count, context) for index, start, count in chunk_ranges(total, self.chunk_size)]
+        created = 0
+        if self.workers > 1:
+            # Дочерние процессы открывают собственные соединения с БД
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(self.workers, initializer=init_pool_worker) as pool:
+                for count in pool.imap_unordered(run_chunk, tasks):
+                    created += count
+                # Штатное завершение процессов, чтобы они закрыли свои соединения
+                pool.close()
+                pool.join()
+        else:
+            for task in tasks:
+                created += run_chunk(task)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"{kind}: {created} rows in {elapsed:.1f}s ({created / max(elapsed, 1e-6):,.0f} rows/s)"
+        )
+
+        ids = model.objects.filter(pk__gt=last_id)
+        if model is User:
+            ids = ids.filter(email__endswith=f".s{context['seed']}@{DATASET_EMAIL_DOMAIN}", role=context["role"])
+        id_values = ids.order_by("pk").values_list("pk", flat=True)
+        first, last = id_values.first(), id_values.last()
+        if first is None:
+            return []
+        if last - first + 1 == ids.count():
+            return (first, last)
+        return list(id_values)
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.products.tasks import (process_pending_gallery_images,
+                                process_pending_product_images)
+
+
+class Command(BaseCommand):
+    help = (
+        'Process product images that are still waiting for background processing, '
+        'including jobs lost when a worker was restarted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-failed',
+            action='store_true',
+            help='Retry images that previously failed to process',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Maximum number of products to process',
+        )
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=0,
+            help='Skip images uploaded less than N seconds ago (still queued in web workers)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running: repeat every N seconds (0 - run once)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending_product_images(
+                include_failed=options['include_failed'],
+                limit=options['limit'],
+                older_than=options['older_than'],
+            )
+
+            gallery_processed = process_pending_gallery_images(
+                include_failed=options['include_failed'],
+                limit=options['limit'],
+                older_than=options['older_than'],
+            )
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Processed images for {processed} products and {gallery_processed} gallery images'
+                )
+            )
+            if options['interval'] <= 0:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,260 @@
+"""
+Метрики приложения в формате Prometheus (text exposition 0.0.4).
+
+Реестр живет в памяти процесса и не требует внешних сервисов: метрики
+обновляются в коде, а /metrics отдает их текущее состояние.
+
+Ограничение: при нескольких воркерах gunicorn каждый процесс ведет свои
+счетчики, а скрейп попадает в случайный воркер. Поэтому у каждой серии
+есть метка pid: без нее значения "прыгали" бы между воркерами. Сводные
+значения считаются в Prometheus, например
+sum without (pid) (rate(http_requests_total[5m])). После перезапуска
+воркера (max_requests, деплой) появляются серии с новым pid, а старые
+перестают обновляться; rate() и increase() это учитывают.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _process_labels():
+    return (("pid", os.getpid()),)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(Metric):
+    """
+    Монотонно растущий счетчик. С callback значение берется из него при
+    каждом скрейпе (счетчик, который ведет другой объект).
+    """
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self):
+        process = _process_labels()
+        if self.callback is not None:
+            return [f"{self.name}{_format_labels((), (), process)} {_format_value(self.callback())}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, process)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Metric):
+    """
+    Текущее значение. Если передан callback, значение вычисляется при
+    каждом скрейпе (например, глубина очереди).
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def collect(self):
+        process = _process_labels()
+        if self.callback is not None:
+            return [f"{self.name}{_format_labels((), (), process)} {_format_value(self.callback())}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key, process)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(Metric):
+    """Гистограмма с накопительными корзинами, суммой и количеством наблюдений"""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def collect(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        process = _process_labels()
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, process + (("le", _format_value(float(bound))),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, process)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by URL name, method and status", ["view", "method", "status"]
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by URL name", ["view", "method"]
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database queries per HTTP request", ["view"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+db_queries_total = registry.counter("db_queries_total", "Database queries executed by HTTP requests", ["view"])
+cache_requests_total = registry.counter(
+    "cache_requests_total", "Application cache lookups by cache and result (hit/miss)", ["cache", "result"]
+)
+import_rows_total = registry.counter(
+    "import_rows_total", "Rows processed by spreadsheet imports", ["kind", "result"]
+)
+import_duration_seconds = registry.histogram(
+    "import_duration_seconds", "Spreadsheet import duration", ["kind"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+image_processing_duration_seconds = registry.histogram(
+    "image_processing_duration_seconds", "Background image processing duration", ["kind", "result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+registry.gauge("process_pid", "PID of the process serving these metrics", callback=os.getpid)
+
+
+def record_cache_lookup(cache_name, hit):
+    """Учет обращения к кешу для расчета доли попаданий"""
+    cache_requests_total.inc(cache=cache_name, result="hit" if hit else "miss")
+
+
+def _action_log_buffer():
+    from app.logs import buffer
+
+    return buffer._buffer
+
+
+registry.gauge(
+    "action_log_buffer_depth", "Action log entries waiting to be written",
+    callback=lambda: _action_log_buffer().depth if _action_log_buffer() else 0,
+)
+registry.counter(
+    "action_log_dropped_total", "Action log entries dropped by the buffer",
+    callback=lambda: _action_log_buffer().dropped if _action_log_buffer() else 0,
+)
+registry.counter(
+    "action_log_written_total", "Action log entries written by the buffer",
+    callback=lambda: _action_log_buffer().written if _action_log_buffer() else 0,
+)
@@ -1,8 +1,18 @@
-import json
+import random
+import time
+from contextlib import ExitStack
 
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
+from django.utils import timezone
 
-from app.logs.models import ActionLog
+from app.common.metrics import (db_queries_total, http_request_db_queries,
+                                http_request_duration_seconds, http_requests_total)
+from app.common.profiling import (RequestProfile, current_profile,
+                                  install_serializer_timing, profiling_registry)
+from app.logs.buffer import log_action
 
 
 class ActionLogMiddleware(MiddlewareMixin):
@@ -19,14 +29,92 @@ class ActionLogMiddleware(MiddlewareMixin):
                     "status_code": response.status_code,
                 }
 
-                ActionLog.objects.create(
-                    user=request.user,
+                # Запись уходит в буфер и сохраняется фоновым потоком пачкой,
+                # поэтому время ответа не включает INSERT в журнал
+                log_action(
+                    user_id=request.user.pk,
                     action=f"{request.method} {request.path}",
                     entity_type="HTTP_REQUEST",
                     entity_id=None,
                     payload=payload,
+                    created_at=timezone.now(),
                 )
             except Exception:
                 pass
 
         return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запросов (включается PROFILING_ENABLED).
+
+    Для доли запросов PROFILING_SAMPLE_RATE считает SQL-запросы, время БД,
+    повторяющиеся запросы, время сериализации и размер ответа, добавляет
+    их в заголовок Server-Timing и в статистику маршрута.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+        install_serializer_timing()
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+
+        total = time.perf_counter() - profile.started
+        size = 0 if response.streaming else len(response.content)
+        response["Server-Timing"] = profile.server_timing(total, size)
+
+        match = getattr(request, "resolver_match", None)
+        route = f"{request.method} /{match.route}" if match else f"{request.method} <unmatched>"
+        profiling_registry.record(route, profile, total, size)
+        return response
+
+
+
+class MetricsMiddleware:
+    """
+    Метрики запросов для /metrics: количество и задержка по имени URL,
+    число SQL-запросов на запрос (включается METRICS_ENABLED).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count_queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<unmatched>"
+        http_requests_total.inc(view=view, method=request.method, status=response.status_code)
+        http_request_duration_seconds.observe(elapsed, view=view, method=request.method)
+        http_request_db_queries.observe(queries[0], view=view)
+        db_queries_total.inc(queries[0], view=view)
+        return response
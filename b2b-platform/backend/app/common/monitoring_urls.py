@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .monitoring_views import ProfilingStatsView
+
+urlpatterns = [
+    path("profiling/", ProfilingStatsView.as_view(), name="profiling-stats"),
+]
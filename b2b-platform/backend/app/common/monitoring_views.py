@@ -0,0 +1,55 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from app.common.metrics import registry
+from app.common.permissions import IsAdmin
+from app.common.profiling import profiling_registry
+
+
+class ProfilingStatsView(APIView):
+    """
+    Статистика профилирования по маршрутам (текущий процесс).
+    GET /api/monitoring/profiling/?limit=20 - самые затратные маршруты
+    DELETE /api/monitoring/profiling/ - сброс статистики
+    """
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        routes = profiling_registry.snapshot()
+        limit = request.query_params.get("limit")
+        if limit and limit.isdigit():
+            routes = routes[: int(limit)]
+        return Response(
+            {
+                "enabled": getattr(settings, "PROFILING_ENABLED", False),
+                "sample_rate": getattr(settings, "PROFILING_SAMPLE_RATE", 1.0),
+                "pid": os.getpid(),
+                "routes": routes,
+            }
+        )
+
+    def delete(self, request):
+        profiling_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def metrics_view(request):
+    """
+    Метрики в текстовом формате Prometheus: GET /metrics.
+    Отдаются только при METRICS_ENABLED и заданном METRICS_TOKEN
+    (заголовок Authorization: Bearer <token>), иначе 404.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not getattr(settings, "METRICS_ENABLED", False) or not token:
+        return HttpResponse(status=404)
+    provided = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(provided, token):
+        return HttpResponse(status=403)
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,310 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_EXACT = "exact"
+COUNT_APPROX = "approx"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_APPROX, COUNT_NONE)
+
+
+def estimate_count(queryset):
+    """
+    Оценка количества строк без COUNT(*).
+
+    На PostgreSQL берется оценка планировщика из EXPLAIN; если она меньше
+    PAGINATION_APPROX_COUNT_THRESHOLD, выполняется точный подсчет, так как
+    на небольших выборках он дешев, а оценка может заметно ошибаться.
+    На других СУБД всегда выполняется точный подсчет.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+    if estimate < settings.PAGINATION_APPROX_COUNT_THRESHOLD:
+        return queryset.count()
+    return estimate
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Пагинация списков с двумя режимами.
+
+    По умолчанию работает как PageNumberPagination (page/page_size), но
+    подсчет общего количества можно отключить (?count=none) или заменить
+    оценкой планировщика (?count=approx).
+
+    С параметром ?cursor= включается курсорная (keyset) пагинация: вместо
+    OFFSET выборка продолжается с последней строки предыдущей страницы
+    условием по полям сортировки, к которым добавляется id для
+    однозначного порядка строк с одинаковыми значениями. Глубина листания
+    не влияет на скорость запроса, если сортировка покрыта индексом.
+    В курсорном режиме общее количество по умолчанию не считается.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    # Режим подсчета по умолчанию для обычных страниц и для курсорного режима
+    page_count_mode = COUNT_EXACT
+    cursor_count_mode = COUNT_NONE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        self.count_mode = self.get_count_mode(request)
+        self.count = None
+
+        if self.cursor_mode:
+            return self.paginate_by_cursor(queryset, request)
+        if self.count_mode == COUNT_EXACT:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_by_offset(queryset, request)
+
+    def get_count_mode(self, request):
+        default = self.cursor_count_mode if self.cursor_mode else self.page_count_mode
+        mode = request.query_params.get(self.count_query_param, default)
+        if mode not in COUNT_MODES:
+            raise ValidationError(
+                {self.count_query_param: f"Допустимые значения: {', '.join(COUNT_MODES)}"}
+            )
+        return mode
+
+    def get_count(self, queryset):
+        if self.count_mode == COUNT_EXACT:
+            return queryset.count()
+        if self.count_mode == COUNT_APPROX:
+            return estimate_count(queryset)
+        return None
+
+    # Обычные страницы без точного COUNT(*)
+
+    def paginate_by_offset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound("Неверная страница.")
+
+        offset = (self.page_number - 1) * page_size
+        # Лишняя строка показывает, есть ли следующая страница
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.page_number > 1:
+            raise NotFound("Неверная страница.")
+
+        self.has_next = len(rows) > page_size
+        self.count = self.get_count(queryset)
+        return rows[:page_size]
+
+    # Курсорная пагинация
+
+    def paginate_by_cursor(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.ordering = self.get_keyset_ordering(queryset)
+        values, reverse = self.decode_cursor(request)
+
+        # Предыдущая страница читается в обратном порядке от первой строки текущей
+        ordering = [(name, descending != reverse, field) for name, descending, field in self.ordering]
+        page_queryset = queryset.order_by(
+            *[f"-{name}" if descending else name for name, descending, _ in ordering]
+        )
+        if values is not None:
+            page_queryset = page_queryset.filter(self.keyset_filter(ordering, values))
+
+        rows = list(page_queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+
+        self.rows = rows
+        self.count = self.get_count(queryset)
+        return rows
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Поля сортировки выборки (после OrderingFilter) с id в конце:
+        [(имя поля, по убыванию, поле модели)].
+        """
+        order_by = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        ordering = []
+        for item in order_by:
+            if not isinstance(item, str) or item == "?":
+                raise ValidationError(
+                    {self.cursor_query_param: "Сортировка не поддерживает курсорную пагинацию"}
+                )
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+            if name == "pk":
+                name = "id"
+            if name in queryset.query.annotations:
+                # Вычисляемое поле (например, distance в поиске ?near=)
+                field = queryset.query.annotations[name].output_field
+            else:
+                field = self.resolve_field(queryset.model, name)
+            # Сравнение с NULL не работает в условии keyset
+            if field.null:
+                raise ValidationError(
+                    {self.cursor_query_param: f"Курсорная пагинация недоступна при сортировке по {name}"}
+                )
+            ordering.append((name, descending, field))
+            if name == "id":
+                return ordering
+
+        # id делает порядок однозначным для строк с одинаковыми значениями
+        last_descending = ordering[-1][1] if ordering else False
+        ordering.append(("id", last_descending, queryset.model._meta.pk))
+        return ordering
+
+    def resolve_field(self, model, name):
+        field = None
+        for part in name.split("__"):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                raise ValidationError(
+                    {self.cursor_query_param: f"Неизвестное поле сортировки {name}"}
+                )
+            model = field.related_model or model
+        if field.is_relation:
+            field = field.target_field
+        return field
+
+    def keyset_filter(self, ordering, values):
+        """
+        Условие «строка после курсора» для составного ключа:
+        (a < x) OR (a = x AND b < y) OR (a = x AND b = y AND id < z).
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending, _), value in zip(ordering, values):
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for name, _, _ in self.ordering:
+            value = row
+            for part in name.split("__"):
+                value = getattr(value, part)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        data = json.dumps({"v": values, "r": int(reverse)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        """Значения ключа и направление из параметра cursor; пустой cursor - первая страница"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+            raw_values = data["v"]
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            values = [field.to_python(raw) for (_, _, field), raw in zip(self.ordering, raw_values)]
+            return values, bool(data.get("r"))
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise NotFound("Неверный курсор.")
+
+    # Ссылки и ответ
+
+    def get_next_link(self):
+        if not self.cursor_mode and self.count_mode == COUNT_EXACT:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.cursor_mode:
+            if not self.rows:
+                return None
+            return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.rows[-1], False))
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if not self.cursor_mode and self.count_mode == COUNT_EXACT:
+            return super().get_previous_link()
+        url = self.request.build_absolute_uri()
+        if self.cursor_mode:
+            if not self.has_previous:
+                return None
+            if not self.rows:
+                return replace_query_param(url, self.cursor_query_param, "")
+            return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.rows[0], True))
+        if self.page_number <= 1:
+            return None
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode and self.count_mode == COUNT_EXACT:
+            return super().get_paginated_response(data)
+        fields = [
+            ("count", self.count),
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]
+        if self.count_mode == COUNT_APPROX:
+            fields.insert(1, ("count_approximate", True))
+        return Response(OrderedDict(fields))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"]["nullable"] = True
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters += [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор страницы; пустое значение включает курсорную пагинацию с первой страницы",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Подсчет общего количества: exact, approx или none",
+                "schema": {"type": "string", "enum": list(COUNT_MODES)},
+            },
+        ]
+        return parameters
@@ -0,0 +1,203 @@
+"""
+Профилирование запросов: SQL, сериализация и размер ответа.
+
+ProfilingMiddleware (app.common.middleware) создает RequestProfile на
+каждый профилируемый запрос. SQL перехватывается через
+connection.execute_wrapper, поэтому работает и при DEBUG=False. Итоги
+запроса уходят в заголовок Server-Timing и в статистику маршрута
+(profiling_registry), которую администратор читает через
+/api/monitoring/profiling/. Статистика хранится в памяти процесса.
+"""
+import contextvars
+import re
+import threading
+import time
+from collections import Counter, deque
+from hashlib import blake2b
+
+# Профиль текущего запроса (для замера сериализации из кода DRF)
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+_IN_LIST_RE = re.compile(r"IN \((?:%s, )*%s\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+def fingerprint_sql(sql):
+    """
+    Отпечаток SQL без значений: запросы, отличающиеся только параметрами,
+    LIMIT/OFFSET или длиной списка IN, получают одинаковый отпечаток.
+    """
+    normalized = _NUMBER_RE.sub("?", _IN_LIST_RE.sub("IN (...)", sql))
+    return blake2b(normalized.encode(), digest_size=8).hexdigest(), normalized
+
+
+class RequestProfile:
+    """Замеры одного запроса"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.fingerprints = Counter()
+        self.statements = {}
+        self._serialize_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обертка connection.execute_wrapper: время каждого SQL-запроса
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            key, normalized = fingerprint_sql(sql)
+            self.fingerprints[key] += 1
+            self.statements.setdefault(key, normalized[:500])
+
+    @property
+    def duplicates(self):
+        """Отпечатки, выполненные больше одного раза (признак N+1)"""
+        return {key: count for key, count in self.fingerprints.items() if count > 1}
+
+    def server_timing(self, total, size):
+        duplicates = sum(count - 1 for count in self.duplicates.values())
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+                f'dup;desc="{duplicates} duplicate queries"',
+                f"serialize;dur={self.serialize_time * 1000:.1f}",
+                f'app;dur={total * 1000:.1f};desc="{size} bytes"',
+            ]
+        )
+
+
+class RouteStats:
+    """Накопленная статистика маршрута"""
+
+    def __init__(self, sample_size=200):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.bytes = 0
+        self.requests_with_duplicates = 0
+        self.duplicates = Counter()
+        self.statements = {}
+        self.durations = deque(maxlen=sample_size)
+
+    def add(self, profile, total, size):
+        self.count += 1
+        self.total_time += total
+        self.max_time = max(self.max_time, total)
+        self.db_time += profile.db_time
+        self.serialize_time += profile.serialize_time
+        self.queries += profile.queries
+        self.max_queries = max(self.max_queries, profile.queries)
+        self.bytes += size
+        self.durations.append(total)
+
+        duplicates = profile.duplicates
+        if duplicates:
+            self.requests_with_duplicates += 1
+            for key, count in duplicates.items():
+                self.duplicates[key] += count
+                self.statements.setdefault(key, profile.statements[key])
+
+    def as_dict(self, route):
+        durations = sorted(self.durations)
+
+        def percentile(value):
+            if not durations:
+                return 0.0
+            return round(durations[min(len(durations) - 1, int(value * len(durations)))] * 1000, 2)
+
+        return {
+            "route": route,
+            "count": self.count,
+            "avg_ms": round(self.total_time / self.count * 1000, 2),
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_time * 1000, 2),
+            "total_ms": round(self.total_time * 1000, 2),
+            "avg_db_ms": round(self.db_time / self.count * 1000, 2),
+            "avg_serialize_ms": round(self.serialize_time / self.count * 1000, 2),
+            "avg_queries": round(self.queries / self.count, 2),
+            "max_queries": self.max_queries,
+            "avg_bytes": int(self.bytes / self.count),
+            "requests_with_duplicates": self.requests_with_duplicates,
+            "top_duplicates": [
+                {"fingerprint": key, "count": count, "sql": self.statements[key]}
+                for key, count in self.duplicates.most_common(5)
+            ],
+        }
+
+
+class ProfilingRegistry:
+    """Статистика по маршрутам в памяти процесса"""
+
+    # Ограничение числа маршрутов, чтобы неизвестные URL не раздували память
+    max_routes = 500
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, profile, total, size):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                if len(self._routes) >= self.max_routes:
+                    route = "other"
+                stats = self._routes.setdefault(route, RouteStats())
+            stats.add(profile, total, size)
+
+    def snapshot(self):
+        with self._lock:
+            routes = [stats.as_dict(route) for route, stats in self._routes.items()]
+        return sorted(routes, key=lambda item: item["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+profiling_registry = ProfilingRegistry()
+
+
+def _timed_data(prop):
+    """Обертка свойства serializer.data: время сериализации внешнего сериализатора"""
+
+    def data(serializer):
+        profile = current_profile.get()
+        if profile is None:
+            return prop.fget(serializer)
+        profile._serialize_depth += 1
+        started = time.perf_counter()
+        try:
+            return prop.fget(serializer)
+        finally:
+            profile._serialize_depth -= 1
+            # Вложенные сериализаторы не учитываются повторно
+            if profile._serialize_depth == 0:
+                profile.serialize_time += time.perf_counter() - started
+
+    return property(data)
+
+
+_serializer_timing_installed = False
+
+
+def install_serializer_timing():
+    """Подключает замер Serializer.data/ListSerializer.data (один раз на процесс)"""
+    global _serializer_timing_installed
+    if _serializer_timing_installed:
+        return
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        cls.data = _timed_data(cls.__dict__["data"])
+    _serializer_timing_installed = True
@@ -3,6 +3,8 @@ from decimal import Decimal
 from django.core.cache import cache
 import logging
 
+from app.common.metrics import record_cache_lookup
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,7 +49,8 @@ class CurrencyConverter:
     def get_exchange_rates(cls, base_currency='USD'):
         """Get exchange rates from cache or API"""
         rates = cache.get(cls.CACHE_KEY)
-        
+        record_cache_lookup(cls.CACHE_KEY, rates is not None)
+
         if rates is not None:
             return rates
         
@@ -0,0 +1,37 @@
+"""
+Ленивая загрузка библиотек для импорта/экспорта таблиц.
+
+pandas (вместе с numpy) и openpyxl импортируются сотни миллисекунд и
+занимают десятки МБ в каждом воркере, хотя нужны только эндпоинтам
+импорта и шаблонов. Модули приложения обращаются к ним через функции
+этого модуля, а не импортируют на уровне модуля; tests/test_startup.py
+проверяет, что django.setup() и загрузка URLconf не подгружают pandas.
+
+tablib, openpyxl и numpy при старте все равно загружаются: их импортирует
+django-import-export (ImportExportModelAdmin в admin.py), а tablib
+регистрирует формат xlsx при импорте. Отложить их можно только вместе с
+админкой импорта/экспорта; тест проверяет, что код приложения их не
+импортирует.
+"""
+
+
+def pandas():
+    """Модуль pandas (импортируется при первом вызове)"""
+    import pandas
+
+    return pandas
+
+
+def read_table(file):
+    """DataFrame из загруженного CSV или Excel файла (по расширению)"""
+    pd = pandas()
+    if file.name.endswith(".csv"):
+        return pd.read_csv(file)
+    return pd.read_excel(file)
+
+
+def load_workbook(file, **kwargs):
+    """openpyxl.load_workbook с отложенным импортом openpyxl"""
+    from openpyxl import load_workbook
+
+    return load_workbook(file, **kwargs)
@@ -0,0 +1,49 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Ленивое создание общего пула фоновых потоков процесса"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "BACKGROUND_TASK_WORKERS", 2),
+                    thread_name_prefix="bg-task",
+                )
+    return _executor
+
+
+def _run_task(func, args, kwargs):
+    """Выполняет задачу в фоновом потоке с собственным соединением к БД"""
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, "__name__", func))
+    finally:
+        close_old_connections()
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Ставит задачу в фоновую очередь после коммита текущей транзакции.
+
+    Если BACKGROUND_TASKS_ASYNC выключен (тесты, management-команды),
+    задача выполняется синхронно в текущем потоке.
+    """
+    if not getattr(settings, "BACKGROUND_TASKS_ASYNC", True):
+        func(*args, **kwargs)
+        return
+
+    transaction.on_commit(lambda: _get_executor().submit(_run_task, func, args, kwargs))
@@ -1,104 +1,160 @@
-from PIL import Image
-from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from django.conf import settings
 from io import BytesIO
+from collections import namedtuple
+import hashlib
 import os
 from django.core.exceptions import ValidationError
 
+# Сведения об изображении, прочитанные из заголовка файла
+ImageInfo = namedtuple('ImageInfo', ['format', 'width', 'height'])
 
-def resize_image(image_file, max_size=(300, 300), quality=90):
-    """
-    Функция для автоматического ресайза изображений до указанного размера.
-
-    Args:
-        image_file: Django UploadedFile объект
-        max_size: Кортеж с максимальными размерами (ширина, высота), по умолчанию 300x300
-        quality: Качество JPEG сжатия (1-100)
+# Соответствие форматов вариантов изображений форматам Pillow и расширениям файлов
+IMAGE_VARIANT_PIL_FORMATS = {'webp': 'WEBP', 'avif': 'AVIF', 'jpeg': 'JPEG'}
+IMAGE_VARIANT_EXTENSIONS = {'webp': 'webp', 'avif': 'avif', 'jpeg': 'jpg'}
 
-    Returns:
-        ContentFile: Обработанное изображение размером 300x300 пикселей
-    """
-    try:
-        # Открываем изображение
-        image = Image.open(image_file)
-
-        # Конвертируем в RGB если нужно (для поддержки PNG с прозрачностью)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            # Создаем белый фон для прозрачных изображений
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
-
-        # Вычисляем новые размеры с сохранением пропорций
-        original_width, original_height = image.size
-        max_width, max_height = max_size
-
-        # Если изображение меньше максимального размера, не изменяем его
-        if original_width <= max_width and original_height <= max_height:
-            # Сохраняем как есть, но оптимизируем качество
-            output = BytesIO()
-            image.save(output, format='JPEG', quality=quality, optimize=True)
-            output.seek(0)
 
-            # Определяем имя файла
-            original_name = getattr(image_file, 'name', 'image.jpg')
-            name, ext = os.path.splitext(original_name)
-            new_name = f"{name}_optimized.jpg"
+def _unwrap_upload(image_file):
+    """Для FieldFile возвращает вложенный загруженный файл, чтобы кэш жил на нем"""
+    return getattr(image_file, '_file', None) or image_file
 
-            return ContentFile(output.getvalue(), name=new_name)
 
-        # Вычисляем коэффициент масштабирования
-        width_ratio = max_width / original_width
-        height_ratio = max_height / original_height
-        ratio = min(width_ratio, height_ratio)
-
-        # Новые размеры
-        new_width = int(original_width * ratio)
-        new_height = int(original_height * ratio)
+def inspect_image(image_file):
+    """
+    Определяет формат и размеры изображения по заголовку файла без декодирования пикселей.
 
-        # Ресайзим изображение
-        resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    Результат кэшируется на объекте загрузки, поэтому повторные проверки
+    (валидатор модели, сериализатор, обработка) не читают файл заново.
+    Изображения с числом пикселей больше IMAGE_MAX_PIXELS отклоняются
+    до декодирования (защита от decompression bomb).
+    """
+    upload = _unwrap_upload(image_file)
+    info = getattr(upload, '_image_info', None)
+
+    if info is None:
+        # Django forms.ImageField уже открыл заголовок и сохранил его в .image
+        header = getattr(upload, 'image', None)
+        if isinstance(header, Image.Image):
+            info = ImageInfo(header.format, header.width, header.height)
+        else:
+            try:
+                upload.seek(0)
+                # Image.open читает только заголовок, пиксели не декодируются
+                with Image.open(upload) as image:
+                    info = ImageInfo(image.format, image.width, image.height)
+            except Image.DecompressionBombError:
+                raise ValidationError("Изображение слишком большое")
+            except Exception as e:
+                raise ValidationError(f"Не удалось прочитать изображение: {str(e)}")
+            finally:
+                upload.seek(0)
+        try:
+            upload._image_info = info
+        except AttributeError:
+            pass
+
+    check_image_pixels(info.width, info.height)
+    return info
+
+
+def check_image_pixels(width, height):
+    """Отклоняет изображения, которые слишком велики для декодирования"""
+    max_pixels = getattr(settings, 'IMAGE_MAX_PIXELS', None)
+    if max_pixels and width * height > max_pixels:
+        raise ValidationError(
+            f"Изображение слишком большое: {width}x{height}. "
+            f"Максимум {max_pixels // 1_000_000} мегапикселей"
+        )
 
-        # Если нужно сделать изображение точно 300x300, добавляем padding
-        if new_width != max_width or new_height != max_height:
-            # Создаем новое изображение с нужным размером и белым фоном
-            final_image = Image.new('RGB', max_size, (255, 255, 255))
 
-            # Вычисляем позицию для центрирования
-            x = (max_width - new_width) // 2
-            y = (max_height - new_height) // 2
+def validate_image_header(image):
+    """
+    Проверка нового загруженного файла: изображение допустимого размера.
+    Вызывается для загрузок (сериализатор, форма админки), а не как
+    валидатор поля модели, чтобы full_clean() не открывал уже сохраненный файл.
+    """
+    if image:
+        inspect_image(image)
+
+
+def compute_file_sha256(file_obj):
+    """SHA-256 содержимого файла, читаемого по частям; указатель возвращается в начало"""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in file_obj.chunks() if hasattr(file_obj, 'chunks') else iter(lambda: file_obj.read(65536), b''):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def convert_to_rgb(image):
+    """Конвертирует изображение в RGB, заменяя прозрачность белым фоном"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Создаем белый фон для прозрачных изображений
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def generate_image_variants(image_file, variants, formats, quality=82):
+    """
+    Генерация набора вариантов изображения разной ширины в нескольких форматах.
 
-            # Вставляем ресайзенное изображение по центру
-            final_image.paste(resized_image, (x, y))
-            resized_image = final_image
+    Изображение декодируется один раз, варианты строятся от большего к меньшему,
+    чтобы каждый следующий ресайз работал с уже уменьшенной картинкой.
 
-        # Сохраняем в BytesIO
-        output = BytesIO()
-        resized_image.save(output, format='JPEG', quality=quality, optimize=True)
-        output.seek(0)
+    Args:
+        image_file: Файл исходного изображения
+        variants: Словарь {имя варианта: максимальная ширина или None для исходной}
+        formats: Список форматов ('webp', 'avif', 'jpeg')
+        quality: Качество сжатия (1-100)
 
-        # Определяем имя файла
-        original_name = getattr(image_file, 'name', 'image.jpg')
-        name, ext = os.path.splitext(original_name)
-        new_name = f"{name}_resized.jpg"
+    Returns:
+        dict: {имя варианта: {'width', 'height', 'files': {формат: bytes}}}
+    """
+    with Image.open(image_file) as source:
+        # Проверяем размер по заголовку до декодирования пикселей
+        check_image_pixels(source.width, source.height)
+        # Учитываем ориентацию из EXIF (фото с телефонов)
+        image = convert_to_rgb(ImageOps.exif_transpose(source))
+
+    ordered = sorted(
+        variants.items(),
+        key=lambda item: item[1] if item[1] else image.width,
+        reverse=True,
+    )
+
+    result = {}
+    current = image
+    for name, max_width in ordered:
+        if max_width and current.width > max_width:
+            height = max(1, round(current.height * max_width / current.width))
+            current = current.resize((max_width, height), Image.Resampling.LANCZOS)
+
+        files = {}
+        for image_format in formats:
+            output = BytesIO()
+            save_kwargs = {'quality': quality}
+            if image_format == 'jpeg':
+                save_kwargs.update(optimize=True, progressive=True)
+            current.save(output, format=IMAGE_VARIANT_PIL_FORMATS[image_format], **save_kwargs)
+            files[image_format] = output.getvalue()
 
-        return ContentFile(output.getvalue(), name=new_name)
+        result[name] = {'width': current.width, 'height': current.height, 'files': files}
 
-    except Exception as e:
-        # В случае ошибки возвращаем оригинальный файл
-        print(f"Ошибка при обработке изображения: {e}")
-        return image_file
+    return result
 
 
-def validate_and_process_image(image_file):
+def validate_image_upload(image_file):
     """
-    Валидация и обработка изображения товара:
-    - Проверка формата (jpg, png, webp)
-    - Автоматический ресайз до 300x300
-    - Возврат обработанного файла
+    Быстрая проверка загружаемого изображения товара без декодирования пикселей:
+    - Проверка расширения файла (jpg, png, webp)
+    - Проверка формата по заголовку файла
     """
     # Допустимые форматы изображений
     allowed_formats = ['JPEG', 'PNG', 'WEBP']
@@ -113,25 +169,14 @@ def validate_and_process_image(image_file):
             f"Неподдерживаемый формат файла. Разрешены только: {', '.join(allowed_extensions)}"
         )
 
-    try:
-        # Открываем изображение для проверки
-        image = Image.open(image_file)
-
-        # Проверяем формат
-        if image.format not in allowed_formats:
-            raise ValidationError(
-                f"Неподдерживаемый формат изображения. Разрешены только: JPG, PNG, WebP"
-            )
-
-        # Сбрасываем указатель файла
-        image_file.seek(0)
+    # Формат и размеры читаются из заголовка один раз и кэшируются на файле
+    info = inspect_image(image_file)
 
-        # Обрабатываем изображение (ресайз)
-        processed_image = resize_image(image_file)
+    # Проверяем формат
+    if info.format not in allowed_formats:
+        raise ValidationError(
+            f"Неподдерживаемый формат изображения. Разрешены только: JPG, PNG, WebP"
+        )
 
-        return processed_image
+    return image_file
 
-    except Exception as e:
-        if isinstance(e, ValidationError):
-            raise e
-        raise ValidationError(f"Ошибка при обработке изображения: {str(e)}")
\ No newline at end of file
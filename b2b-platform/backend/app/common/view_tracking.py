@@ -0,0 +1,88 @@
+"""
+Просмотры карточек компаний и товаров.
+
+Детальные GET не пишут в БД: просмотр добавляется в CounterBuffer
+(app.common.counters) по ключу (вид, id, дата), и раз в
+VIEW_STATS_FLUSH_INTERVAL секунд приращения попадают в дневные строки
+CompanyDailyViews и ProductDailyViews. Просмотры владельца не
+учитываются. Поставщик видит статистику своих компаний и товаров через
+/api/companies/my/view-stats/ и /api/products/my/view-stats/.
+"""
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from app.common.counters import CounterBuffer, add_daily_counts
+
+COMPANY = "company"
+PRODUCT = "product"
+
+
+def get_kinds():
+    """Вид -> (модель дневных строк, поле объекта, путь к владельцу, поле названия)"""
+    from app.companies.models import CompanyDailyViews
+    from app.products.models import ProductDailyViews
+
+    return {
+        COMPANY: (CompanyDailyViews, "company", "company__owner", "company__name"),
+        PRODUCT: (ProductDailyViews, "product", "product__company__owner", "product__title"),
+    }
+
+
+def write_daily_views(counts):
+    """Прибавляет приращения {(kind, id, date): n} к дневным строкам"""
+    rows = defaultdict(dict)
+    for (kind, object_id, date), amount in counts.items():
+        rows[kind][(object_id, date)] = {"views": amount}
+    kinds = get_kinds()
+    for kind, kind_rows in rows.items():
+        model, owner_field, _, _ = kinds[kind]
+        add_daily_counts(model, owner_field, kind_rows)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_views_buffer():
+    """Общий буфер просмотров процесса"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = CounterBuffer(
+                    "view-stats", write_daily_views, flush_interval=settings.VIEW_STATS_FLUSH_INTERVAL
+                )
+    return _buffer
+
+
+def record_view(kind, object_id, owner_id, user):
+    """Учитывает просмотр карточки, если ее смотрит не владелец"""
+    if user.is_authenticated and user.pk == owner_id:
+        return
+    get_views_buffer().add((kind, object_id, timezone.localdate()))
+
+
+def supplier_report(user, kind, date_from, date_to, limit=50):
+    """Просмотры объектов пользователя за период: итого, по объектам и по дням"""
+    model, owner_field, owner_path, title_field = get_kinds()[kind]
+    rows = model.objects.filter(**{owner_path: user}, date__gte=date_from, date__lte=date_to)
+    items = (
+        rows.values(f"{owner_field}_id", title_field)
+        .annotate(views=Sum("views"))
+        .order_by("-views", f"{owner_field}_id")[:limit]
+    )
+    daily = rows.values("date").annotate(views=Sum("views")).order_by("date")
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "total": rows.aggregate(total=Sum("views"))["total"] or 0,
+        "results": [
+            {"id": item[f"{owner_field}_id"], "title": item[title_field], "views": item["views"]}
+            for item in items
+        ],
+        "daily": list(daily),
+    }
@@ -1,7 +1,7 @@
 import os
+import time
 from decimal import Decimal, InvalidOperation
 
-import pandas as pd
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from rest_framework import generics, status
@@ -10,7 +10,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from app.categories.models import Category
+from app.common.metrics import import_duration_seconds, import_rows_total
 from app.common.permissions import IsAdmin, IsSupplierOrAdmin
+from app.common.spreadsheets import pandas, read_table
 from app.companies.models import Branch, Company, Employee
 
 
@@ -35,13 +37,14 @@ class ExcelImportView(generics.GenericAPIView):
 
         try:
             # Read the file
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
+            df = read_table(file)
 
             # Process the data
+            started = time.perf_counter()
             result = self.process_companies_data(df, request.user)
+            import_duration_seconds.observe(time.perf_counter() - started, kind="companies")
+            for key in ("created", "updated", "skipped"):
+                import_rows_total.inc(result[key], kind="companies", result=key)
 
             return Response(result, status=status.HTTP_200_OK)
 
@@ -53,6 +56,7 @@ class ExcelImportView(generics.GenericAPIView):
 
     def process_companies_data(self, df, user):
         """Process companies data from DataFrame"""
+        pd = pandas()
         results = {
             "total_rows": len(df),
             "created": 0,
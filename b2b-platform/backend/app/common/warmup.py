@@ -0,0 +1,48 @@
+"""
+Прогрев процесса перед приемом запросов.
+
+preload() выполняется в мастер-процессе gunicorn (preload_app): импорт
+URLconf, представлений и сериализаторов попадает в память до fork и
+делится между воркерами. warm_up() выполняется в каждом воркере после
+fork: открывает соединение с БД и заполняет кеши процесса, чтобы первые
+запросы не платили за холодный старт.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """Импорт URLconf и всех модулей представлений (до fork)"""
+    started = time.perf_counter()
+    get_resolver().url_patterns
+    # Соединения не должны наследоваться воркерами
+    connections.close_all()
+    logger.info("Application preloaded in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def warm_up():
+    """
+    Соединение с БД и кеши процесса (после fork, в каждом воркере).
+
+    Прогревается только локальное состояние: внешние запросы (курсы валют)
+    задерживали бы старт каждого воркера, в том числе после max_requests.
+    Каждый шаг выполняется отдельно, ошибка одного не отменяет остальные.
+    """
+    from app.ads.schedule import schedule
+
+    started = time.perf_counter()
+    steps = [
+        ("database connection", connections["default"].ensure_connection),
+        ("ad schedule", schedule.current),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception:
+            logger.exception("Worker warmup step failed: %s", name)
+    logger.info("Worker warmed up in %.0f ms", (time.perf_counter() - started) * 1000)
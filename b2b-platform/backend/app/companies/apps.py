@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CompaniesConfig(AppConfig):
+    name = "app.companies"
+
+    def ready(self):
+        # Подключаем обработчики сигналов (сетка кластеров карты)
+        from . import signals  # noqa: F401
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.companies import map_grid
+
+
+class Command(BaseCommand):
+    help = "Rebuild the map cluster grid from company and branch coordinates"
+
+    def handle(self, *args, **options):
+        points = map_grid.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Map grid rebuilt from {points} points"))
@@ -0,0 +1,151 @@
+"""
+Сетка кластеров для карты поставщиков.
+
+Каждая точка (адрес одобренной компании или ее филиала) учитывается в одной
+ячейке MapCell на каждом уровне масштаба 0..MAP_CLUSTER_MAX_ZOOM. Ячейки -
+квадраты проекции Web Mercator размером 1/4 тайла (64 px). В ячейке хранятся
+количество точек и суммы координат, поэтому изменение одной точки
+обновляет по одной ячейке на уровень (сигналы в app.companies.signals), а
+/api/companies/map/ читает готовые кластеры по диапазону ячеек. Массовые
+изменения в обход сигналов (bulk_create, update) исправляет команда
+rebuild_map_grid.
+"""
+import math
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+# Ячеек на сторону тайла: 2 ** CELL_BITS
+CELL_BITS = 2
+MAX_LATITUDE = 85.05112878
+
+_state = threading.local()
+
+
+def max_cluster_zoom():
+    return settings.MAP_CLUSTER_MAX_ZOOM
+
+
+def cell_xy(latitude, longitude, zoom):
+    """Координаты ячейки точки на уровне zoom"""
+    size = 2 ** (zoom + CELL_BITS)
+    latitude = max(min(latitude, MAX_LATITUDE), -MAX_LATITUDE)
+    x = int((longitude + 180) / 360 * size)
+    y = int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * size)
+    return min(max(x, 0), size - 1), min(max(y, 0), size - 1)
+
+
+def point_cells(latitude, longitude):
+    """(zoom, x, y) точки на всех уровнях сетки"""
+    for zoom in range(max_cluster_zoom() + 1):
+        yield (zoom, *cell_xy(latitude, longitude, zoom))
+
+
+def company_point(company):
+    """Точка адреса компании, если она показывается на карте"""
+    if company.status == "APPROVED" and company.latitude is not None and company.longitude is not None:
+        return company.latitude, company.longitude
+    return None
+
+
+@contextmanager
+def suspended():
+    """
+    Отключает инкрементальное обновление сетки в текущем потоке (массовые
+    операции); после них сетку нужно пересчитать через rebuild().
+    """
+    previous = getattr(_state, "suspended", False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def apply_changes(removed=(), added=()):
+    """Инкрементальное обновление сетки: точки removed убираются, added добавляются"""
+    from .models import MapCell
+
+    if getattr(_state, "suspended", False):
+        return
+
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for points, sign in ((removed, -1), (added, 1)):
+        for latitude, longitude in points:
+            for key in point_cells(latitude, longitude):
+                delta = deltas[key]
+                delta[0] += sign
+                delta[1] += sign * latitude
+                delta[2] += sign * longitude
+
+    # Опустеть могут только ячейки, из которых убирались точки
+    emptied = Q()
+    with transaction.atomic():
+        for (zoom, x, y), (count, lat_sum, lng_sum) in deltas.items():
+            if count == 0 and lat_sum == 0 and lng_sum == 0:
+                continue
+            if count < 0:
+                emptied |= Q(zoom=zoom, x=x, y=y)
+            cells = MapCell.objects.filter(zoom=zoom, x=x, y=y)
+            updates = {
+                "count": F("count") + count,
+                "lat_sum": F("lat_sum") + lat_sum,
+                "lng_sum": F("lng_sum") + lng_sum,
+            }
+            if cells.update(**updates):
+                continue
+            if count <= 0:
+                continue
+            try:
+                with transaction.atomic():
+                    MapCell.objects.create(zoom=zoom, x=x, y=y, count=count, lat_sum=lat_sum, lng_sum=lng_sum)
+            except IntegrityError:
+                # Ячейку одновременно создал другой процесс
+                cells.update(**updates)
+        if emptied:
+            MapCell.objects.filter(emptied, count__lte=0).delete()
+
+
+def iter_points(apps=global_apps):
+    """Все точки карты: адреса одобренных компаний и их филиалы"""
+    Company = apps.get_model("companies", "Company")
+    Branch = apps.get_model("companies", "Branch")
+
+    companies = Company.objects.filter(status="APPROVED", latitude__isnull=False, longitude__isnull=False)
+    yield from companies.values_list("latitude", "longitude").iterator(chunk_size=5000)
+    branches = Branch.objects.filter(company__status="APPROVED")
+    yield from branches.values_list("latitude", "longitude").iterator(chunk_size=5000)
+
+
+def rebuild(batch_size=5000, apps=global_apps):
+    """
+    Полный пересчет сетки; возвращает количество учтенных точек.
+    apps - реестр моделей (в миграции передается исторический).
+    """
+    MapCell = apps.get_model("companies", "MapCell")
+
+    cells = defaultdict(lambda: [0, 0.0, 0.0])
+    points = 0
+    for latitude, longitude in iter_points(apps):
+        points += 1
+        for key in point_cells(latitude, longitude):
+            cell = cells[key]
+            cell[0] += 1
+            cell[1] += latitude
+            cell[2] += longitude
+
+    with transaction.atomic():
+        MapCell.objects.all().delete()
+        MapCell.objects.bulk_create(
+            (
+                MapCell(zoom=zoom, x=x, y=y, count=count, lat_sum=lat_sum, lng_sum=lng_sum)
+                for (zoom, x, y), (count, lat_sum, lng_sum) in cells.items()
+            ),
+            batch_size=batch_size,
+        )
+    return points
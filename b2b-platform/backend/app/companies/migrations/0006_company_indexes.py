@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:33
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("categories", "0001_initial"),
+        ("companies", "0005_company_country"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                condition=models.Q(("status", "APPROVED")),
+                fields=["-rating", "name", "id"],
+                name="company_approved_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                django.db.models.functions.text.Upper("city"),
+                name="company_city_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                django.db.models.functions.text.Upper("country"),
+                name="company_country_upper_idx",
+            ),
+        ),
+    ]
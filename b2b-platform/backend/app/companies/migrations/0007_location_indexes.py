@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("categories", "0001_initial"),
+        ("companies", "0006_company_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="branch",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="branch_location_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="company_location_idx"
+            ),
+        ),
+    ]
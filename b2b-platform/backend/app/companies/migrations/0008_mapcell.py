@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0007_location_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MapCell",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("zoom", models.PositiveSmallIntegerField()),
+                ("x", models.PositiveIntegerField()),
+                ("y", models.PositiveIntegerField()),
+                ("count", models.IntegerField(default=0)),
+                ("lat_sum", models.FloatField(default=0)),
+                ("lng_sum", models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="mapcell",
+            constraint=models.UniqueConstraint(
+                fields=("zoom", "x", "y"), name="mapcell_zoom_xy_uniq"
+            ),
+        ),
+    ]
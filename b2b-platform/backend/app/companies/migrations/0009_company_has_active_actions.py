@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+
+def backfill_action_flags(apps, schema_editor):
+    """Начальные значения флагов по текущим акциям (см. app.ads.lifecycle)"""
+    Action = apps.get_model("ads", "Action")
+    Company = apps.get_model("companies", "Company")
+    Product = apps.get_model("products", "Product")
+
+    now = timezone.now()
+    current = Action.objects.filter(is_active=True, starts_at__lte=now, ends_at__gte=now)
+    Company.objects.filter(Exists(current.filter(company_id=OuterRef("pk")))).update(has_active_actions=True)
+
+    memberships = Action.products.through.objects.filter(product_id=OuterRef("pk"))
+    in_current = Exists(memberships.filter(action__in=current))
+    Product.objects.filter(in_current).update(on_sale=True)
+    Product.objects.filter(Exists(memberships), ~in_current).update(on_sale=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0008_action_action_active_period_idx_and_more"),
+        ("categories", "0001_initial"),
+        ("companies", "0008_mapcell"),
+        ("products", "0012_product_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="has_active_actions",
+            field=models.BooleanField(
+                default=False, editable=False, verbose_name="Есть текущие акции"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                condition=models.Q(
+                    ("has_active_actions", True), ("status", "APPROVED")
+                ),
+                fields=["-rating", "name", "id"],
+                name="company_active_actions_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_action_flags, migrations.RunPython.noop),
+    ]
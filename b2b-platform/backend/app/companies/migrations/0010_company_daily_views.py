@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0009_company_has_active_actions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompanyDailyViews",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_views",
+                        to="companies.company",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="companydailyviews",
+            constraint=models.UniqueConstraint(
+                fields=("company", "date"), name="company_daily_views_unique"
+            ),
+        ),
+    ]
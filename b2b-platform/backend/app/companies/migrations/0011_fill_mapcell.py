@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def fill_map_grid(apps, schema_editor):
+    """Сетка карты по уже существующим компаниям и филиалам (дальше ее ведут сигналы)"""
+    from app.companies import map_grid
+
+    map_grid.rebuild(apps=apps)
+
+
+def clear_map_grid(apps, schema_editor):
+    apps.get_model("companies", "MapCell").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0010_company_daily_views"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_map_grid, clear_map_grid),
+    ]
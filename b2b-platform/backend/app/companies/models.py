@@ -3,7 +3,11 @@ import os
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
-from PIL import Image
+from django.db.models import Exists, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least, Upper
+
+from app.common.geo import FAR_KM, bounding_box, bounding_box_q, haversine_km
+from app.common.utils import inspect_image
 
 User = get_user_model()
 
@@ -30,6 +34,29 @@ class CompanyQuerySet(models.QuerySet):
         """Возвращает заблокированные компании"""
         return self.filter(status="BANNED")
 
+    def near(self, latitude, longitude, radius_km, include_branches=False):
+        """
+        Компании в радиусе radius_km от точки с аннотацией distance (км).
+        С include_branches учитываются и филиалы: distance - расстояние до
+        ближайшей из точек компании.
+        """
+        box = bounding_box(latitude, longitude, radius_km)
+        located = bounding_box_q(box)
+        distance = Coalesce(haversine_km(latitude, longitude), Value(FAR_KM))
+        if include_branches:
+            branches = Branch.objects.filter(bounding_box_q(box), company=OuterRef("pk"))
+            nearest_branch = (
+                branches.annotate(distance=haversine_km(latitude, longitude))
+                .order_by("distance")
+                .values("distance")[:1]
+            )
+            located |= Exists(branches)
+            distance = Least(
+                distance,
+                Coalesce(Subquery(nearest_branch, output_field=FloatField()), Value(FAR_KM)),
+            )
+        return self.filter(located).annotate(distance=distance).filter(distance__lte=radius_km)
+
 
 class CompanyManager(models.Manager):
     """
@@ -60,9 +87,9 @@ class CompanyManager(models.Manager):
 
 def validate_logo_size(image):
     if image:
-        img = Image.open(image)
-        width, height = img.size
-        if width != 600 or height != 600:
+        # Размеры читаются из заголовка файла без декодирования пикселей
+        info = inspect_image(image)
+        if info.width != 600 or info.height != 600:
             raise ValidationError("Logo must be exactly 600x600 pixels")
 
 
@@ -143,6 +170,8 @@ class Company(models.Model):
         max_length=20, choices=STATUS_CHOICES, default=STATUS_APPROVED, verbose_name="Статус"
     )
     rating = models.FloatField(default=0.0, verbose_name="Рейтинг")
+    # Есть текущая акция; поддерживается app.ads.lifecycle
+    has_active_actions = models.BooleanField(default=False, editable=False, verbose_name="Есть текущие акции")
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
@@ -154,6 +183,25 @@ class Company(models.Model):
         verbose_name = "Компания"
         verbose_name_plural = "Компании"
         ordering = ["-created_at"]
+        indexes = [
+            # Публичный список: одобренные компании в сортировке по умолчанию
+            models.Index(
+                fields=["-rating", "name", "id"],
+                condition=models.Q(status="APPROVED"),
+                name="company_approved_rating_idx",
+            ),
+            # Фильтры city/country используют iexact, который PostgreSQL выполняет как UPPER(...) = UPPER(...)
+            models.Index(Upper("city"), name="company_city_upper_idx"),
+            models.Index(Upper("country"), name="company_country_upper_idx"),
+            # Предварительный отбор по прямоугольнику в поиске ?near=
+            models.Index(fields=["latitude", "longitude"], name="company_location_idx"),
+            # Фильтр has_actions=true
+            models.Index(
+                fields=["-rating", "name", "id"],
+                condition=models.Q(status="APPROVED", has_active_actions=True),
+                name="company_active_actions_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -176,6 +224,11 @@ class Branch(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["latitude", "longitude"], name="branch_location_idx"),
+        ]
+
     def __str__(self):
         return f"{self.company.name} - {self.address}"
 
@@ -192,3 +245,42 @@ class Employee(models.Model):
 
     def __str__(self):
         return f"{self.full_name} - {self.company.name}"
+
+
+class MapCell(models.Model):
+    """
+    Кластер карты: точки компаний и филиалов в ячейке сетки уровня zoom
+    (см. app.companies.map_grid). Центр кластера - средние координаты точек.
+    """
+
+    zoom = models.PositiveSmallIntegerField()
+    x = models.PositiveIntegerField()
+    y = models.PositiveIntegerField()
+    count = models.IntegerField(default=0)
+    lat_sum = models.FloatField(default=0)
+    lng_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["zoom", "x", "y"], name="mapcell_zoom_xy_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.zoom}/{self.x}/{self.y}: {self.count}"
+
+
+class CompanyDailyViews(models.Model):
+    """Просмотры карточки компании за день (заполняется буфером app.common.view_tracking)"""
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="daily_views")
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["company", "date"], name="company_daily_views_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.company} - {self.date}: {self.views}"
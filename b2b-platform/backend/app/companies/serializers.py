@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from app.categories.serializers import CategorySerializer
+from app.users.favorites import request_favorite_company_ids
 
 from .models import Branch, Company, Employee
 
@@ -41,6 +42,7 @@ class CompanyListSerializer(serializers.ModelSerializer):
     staff_count = serializers.IntegerField()
     reviews_count = serializers.SerializerMethodField()
     products = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Company
@@ -60,18 +62,19 @@ class CompanyListSerializer(serializers.ModelSerializer):
             "staff_count",
             "reviews_count",
             "products",
+            "distance_km",  # Только в поиске ?near=
             "created_at",
         ]
 
     def get_is_favorite(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            from app.users.models import Favorite
-            return Favorite.objects.filter(user=request.user, company=obj).exists()
-        return False
+        return obj.pk in request_favorite_company_ids(self.context.get("request"))
 
     def get_reviews_count(self, obj):
         return obj.reviews.filter(status="APPROVED").count()
+
+    def get_distance_km(self, obj):
+        distance = getattr(obj, "distance", None)
+        return round(distance, 2) if distance is not None else None
     
     def get_products(self, obj):
         # Get first 4 active products for the company card
@@ -118,11 +121,7 @@ class CompanyDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_favorite(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            from app.users.models import Favorite
-            return Favorite.objects.filter(user=request.user, company=obj).exists()
-        return False
+        return obj.pk in request_favorite_company_ids(self.context.get("request"))
 
     def get_reviews_count(self, obj):
         return obj.reviews.filter(status="APPROVED").count()
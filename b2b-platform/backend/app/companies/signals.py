@@ -0,0 +1,95 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from app.common import facets
+
+from . import map_grid
+from .models import Branch, Company
+
+
+@receiver(pre_save, sender=Company)
+def remember_company_map_point(sender, instance, raw=False, **kwargs):
+    """Запоминает точку компании до сохранения, чтобы обновить сетку карты разницей"""
+    if raw:
+        return
+    old = None
+    if instance.pk:
+        old = Company.objects.filter(pk=instance.pk).only("status", "latitude", "longitude").first()
+    instance._map_old_point = map_grid.company_point(old) if old else None
+    instance._map_old_approved = bool(old and old.status == "APPROVED")
+
+
+@receiver(post_save, sender=Company)
+def update_company_map_point(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, "_map_old_point"):
+        return
+    old_point = instance._map_old_point
+    new_point = map_grid.company_point(instance)
+    removed = [old_point] if old_point else []
+    added = [new_point] if new_point else []
+
+    # Филиалы показываются на карте только у одобренных компаний
+    approved = instance.status == "APPROVED"
+    if approved != instance._map_old_approved:
+        branch_points = list(instance.branches.values_list("latitude", "longitude"))
+        (added if approved else removed).extend(branch_points)
+
+    if removed != added:
+        map_grid.apply_changes(removed, added)
+    del instance._map_old_point
+
+
+@receiver(pre_delete, sender=Company)
+def remember_deleted_company_map_point(sender, instance, **kwargs):
+    instance._map_old_point = map_grid.company_point(instance)
+
+
+@receiver(post_delete, sender=Company)
+def remove_company_map_point(sender, instance, **kwargs):
+    if getattr(instance, "_map_old_point", None):
+        map_grid.apply_changes(removed=[instance._map_old_point])
+
+
+def branch_point(branch, approved):
+    return (branch.latitude, branch.longitude) if approved else None
+
+
+@receiver(pre_save, sender=Branch)
+def remember_branch_map_point(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._map_approved = Company.objects.filter(pk=instance.company_id, status="APPROVED").exists()
+    old = Branch.objects.filter(pk=instance.pk).only("latitude", "longitude").first() if instance.pk else None
+    instance._map_old_point = branch_point(old, instance._map_approved) if old else None
+
+
+@receiver(post_save, sender=Branch)
+def update_branch_map_point(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, "_map_old_point"):
+        return
+    old_point = instance._map_old_point
+    new_point = branch_point(instance, instance._map_approved)
+    if old_point != new_point:
+        map_grid.apply_changes([old_point] if old_point else [], [new_point] if new_point else [])
+    del instance._map_old_point
+
+
+@receiver(pre_delete, sender=Branch)
+def remember_deleted_branch_map_point(sender, instance, **kwargs):
+    # При каскадном удалении компании ее строка еще существует
+    approved = Company.objects.filter(pk=instance.company_id, status="APPROVED").exists()
+    instance._map_old_point = branch_point(instance, approved)
+
+
+@receiver(post_delete, sender=Branch)
+def remove_branch_map_point(sender, instance, **kwargs):
+    if getattr(instance, "_map_old_point", None):
+        map_grid.apply_changes(removed=[instance._map_old_point])
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_facets(sender, **kwargs):
+    """Город, страна и статус компании входят в фасеты компаний и товаров"""
+    facets.invalidate("companies")
+    facets.invalidate("products")
@@ -5,6 +5,9 @@ from . import views
 urlpatterns = [
     path("", views.CompanyListCreateView.as_view(), name="company-list-create"),
     path("my/", views.MyCompaniesView.as_view(), name="my-companies"),
+    path("my/view-stats/", views.my_company_view_stats, name="my-company-view-stats"),
+    path("map/", views.company_map, name="company-map"),
+    path("filter-options/", views.company_filter_options, name="company-filter-options"),
     path(
         "supplier-types/",
         views.supplier_types_list,
@@ -7,14 +7,21 @@ from django_filters import rest_framework as filters
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters.widgets import BooleanWidget
 from rest_framework import generics, permissions, serializers, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 import json
 
+from app.common import view_tracking
+from app.common.counters import parse_period
+from app.common.facets import Facet, get_facets
+from app.common.geo import parse_point
+from app.common.pagination import KeysetPagination
 from app.common.permissions import IsOwnerOrReadOnly, IsSupplierOrAdmin
 
-from .models import Branch, Company, Employee
+from . import map_grid
+from .models import Branch, Company, Employee, MapCell
 from .serializers import (BranchSerializer, CompanyCreateUpdateSerializer,
                           CompanyDetailSerializer, CompanyListSerializer,
                           EmployeeSerializer)
@@ -29,6 +36,7 @@ class CompanyFilter(filters.FilterSet):
     status = filters.CharFilter(field_name="status")
     # Фильтрация по городу (одиночный город)
     city = filters.CharFilter(field_name="city", lookup_expr="iexact")
+    country = filters.CharFilter(field_name="country", lookup_expr="iexact")
     # Фильтрация по нескольким городам (CSV формат: cities=Алматы,Астана)
     cities = filters.CharFilter(method="filter_cities")
 
@@ -41,12 +49,13 @@ class CompanyFilter(filters.FilterSet):
             "has_actions",
             "status",
             "city",
+            "country",
             "cities",
         ]
 
     def filter_has_actions(self, queryset, name, value):
         if value:
-            return queryset.filter(actions__is_active=True).distinct()
+            return queryset.filter(has_active_actions=True)
         return queryset
 
     def filter_cities(self, queryset, name, value):
@@ -71,13 +80,44 @@ class CompanyFilter(filters.FilterSet):
         return queryset.filter(city_filter)
 
 
+# Фасеты боковой панели фильтров компаний (filter-options)
+COMPANY_FACETS = [
+    Facet("category", "categories__id", labels=("categories__name", "categories__slug"), distinct=True),
+    Facet("city", "city", params=("city", "cities")),
+    Facet("country", "country"),
+    Facet("supplier_type", "supplier_type"),
+]
+
+
+class CompanyOrderingFilter(OrderingFilter):
+    """
+    Сортировка ordering=distance доступна только в поиске ?near=;
+    при поиске по расстоянию ближайшие компании идут первыми по умолчанию.
+    """
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid = super().remove_invalid_fields(queryset, fields, view, request)
+        if "distance" in queryset.query.annotations:
+            return valid
+        return [term for term in valid if term.lstrip("-") != "distance"]
+
+    def get_default_ordering(self, view):
+        if "near" in view.request.query_params:
+            return ["distance"]
+        return super().get_default_ordering(view)
+
+
 class CompanyListCreateView(generics.ListCreateAPIView):
     queryset = Company.objects.approved()  # Только одобренные компании для публичного API
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, CompanyOrderingFilter]
     filterset_class = CompanyFilter
     search_fields = ["name", "description", "city"]
-    ordering_fields = ["name", "rating", "created_at"]
+    ordering_fields = ["name", "rating", "created_at", "distance"]
     ordering = ["-rating", "name"]
+    pagination_class = KeysetPagination
+    # Радиус поиска ?near= по умолчанию и максимальный (км)
+    default_radius_km = 25
+    max_radius_km = 500
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -88,8 +128,29 @@ class CompanyListCreateView(generics.ListCreateAPIView):
             # Возвращаем все компании пользователя (не только одобренные)
             return Company.objects.filter(owner=self.request.user)
 
+        # Поиск поставщиков рядом: ?near=lat,lng&radius_km=&include_branches=true
+        near = self.request.query_params.get('near')
+        if near is not None:
+            latitude, longitude = parse_point(near)
+            queryset = queryset.near(
+                latitude, longitude, self.get_radius_km(),
+                include_branches=self.request.query_params.get('include_branches') in ('1', 'true', 'True'),
+            )
+
         return queryset
 
+    def get_radius_km(self):
+        value = self.request.query_params.get('radius_km')
+        if value is None:
+            return self.default_radius_km
+        try:
+            radius = float(value)
+        except ValueError:
+            raise ValidationError({'radius_km': 'Ожидается число'})
+        if not 0 < radius <= self.max_radius_km:
+            raise ValidationError({'radius_km': f'Радиус должен быть от 0 до {self.max_radius_km} км'})
+        return radius
+
     def get_serializer_class(self):
         if self.request.method == "POST":
             return CompanyCreateUpdateSerializer
@@ -125,6 +186,13 @@ class CompanyRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
             return CompanyCreateUpdateSerializer
         return CompanyDetailSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        # Просмотр копится в памяти и пишется в CompanyDailyViews фоновым сбросом
+        view_tracking.record_view(view_tracking.COMPANY, instance.pk, instance.owner_id, request.user)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
     def update(self, request, *args, **kwargs):
         # Use the update serializer for validation and saving
         partial = kwargs.pop("partial", False)
@@ -334,3 +402,107 @@ def supplier_types_list(request):
     return Response({
         "supplier_types": supplier_types
     })
+
+
+# Максимум отдельных точек в ответе /map/ на крупных масштабах
+MAP_POINTS_LIMIT = 5000
+
+
+def parse_bbox(value):
+    """Границы "min_lng,min_lat,max_lng,max_lat"; без параметра - весь мир"""
+    if not value:
+        return -180.0, -90.0, 180.0, 90.0
+    try:
+        west, south, east, north = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValidationError({"bbox": "Ожидается формат min_lng,min_lat,max_lng,max_lat"})
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise ValidationError({"bbox": "Координаты вне допустимого диапазона"})
+    return west, south, east, north
+
+
+def longitude_q(west, east, field="longitude"):
+    # Область, пересекающая линию смены дат, задается west > east
+    if west <= east:
+        return Q(**{f"{field}__range": (west, east)})
+    return Q(**{f"{field}__gte": west}) | Q(**{f"{field}__lte": east})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def company_map(request):
+    """
+    Точки поставщиков для карты: ?zoom=&bbox=min_lng,min_lat,max_lng,max_lat
+
+    До MAP_CLUSTER_MAX_ZOOM возвращаются готовые кластеры из сетки MapCell,
+    на больших масштабах - отдельные адреса компаний и филиалов. Точки
+    кодируются массивами в порядке fields; company_id есть только у
+    отдельных точек.
+    """
+    try:
+        zoom = int(request.query_params.get("zoom", 0))
+    except ValueError:
+        raise ValidationError({"zoom": "Ожидается целое число"})
+    if not 0 <= zoom <= 22:
+        raise ValidationError({"zoom": "Масштаб должен быть от 0 до 22"})
+    west, south, east, north = parse_bbox(request.query_params.get("bbox"))
+
+    clustered = zoom <= map_grid.max_cluster_zoom()
+    truncated = False
+    if clustered:
+        west_x, north_y = map_grid.cell_xy(north, west, zoom)
+        east_x, south_y = map_grid.cell_xy(south, east, zoom)
+        if west <= east:
+            x_range = Q(x__range=(west_x, east_x))
+        else:
+            x_range = Q(x__gte=west_x) | Q(x__lte=east_x)
+        cells = MapCell.objects.filter(x_range, zoom=zoom, y__range=(north_y, south_y))
+        points = [
+            [round(lat_sum / count, 5), round(lng_sum / count, 5), count, None]
+            for count, lat_sum, lng_sum in cells.values_list("count", "lat_sum", "lng_sum")
+        ]
+    else:
+        companies = Company.objects.approved().filter(
+            longitude_q(west, east), latitude__range=(south, north)
+        ).values_list("latitude", "longitude", "id")
+        branches = Branch.objects.filter(
+            longitude_q(west, east), latitude__range=(south, north), company__status="APPROVED"
+        ).values_list("latitude", "longitude", "company_id")
+        rows = list(companies[:MAP_POINTS_LIMIT + 1]) + list(branches[:MAP_POINTS_LIMIT + 1])
+        truncated = len(rows) > MAP_POINTS_LIMIT
+        points = [
+            [round(latitude, 5), round(longitude, 5), 1, company_id]
+            for latitude, longitude, company_id in rows[:MAP_POINTS_LIMIT]
+        ]
+
+    return Response({
+        "zoom": zoom,
+        "clustered": clustered,
+        "truncated": truncated,
+        "fields": ["lat", "lng", "count", "company_id"],
+        "points": points,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def company_filter_options(request):
+    """
+    Варианты фильтров компаний с количеством одобренных компаний.
+    Принимает параметры CompanyFilter (см. filter_options товаров).
+    """
+    facets = get_facets(
+        "companies", CompanyFilter, Company.objects.approved(), request.query_params, COMPANY_FACETS, request
+    )
+    return Response({"facets": facets})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def my_company_view_stats(request):
+    """
+    Просмотры карточек компаний текущего пользователя за период.
+    GET /companies/my/view-stats/?date_from=2024-01-01&date_to=2024-01-31
+    """
+    date_from, date_to = parse_period(request.query_params)
+    return Response(view_tracking.supplier_report(request.user, view_tracking.COMPANY, date_from, date_to))
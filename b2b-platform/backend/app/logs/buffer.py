@@ -0,0 +1,149 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ActionLogBuffer:
+    """
+    Буфер записей журнала действий.
+
+    Middleware кладет записи в ограниченную очередь в памяти процесса,
+    фоновый поток сбрасывает их в БД одним bulk_create при накоплении
+    flush_size записей или раз в flush_interval секунд. При переполнении
+    очереди записи отбрасываются и учитываются в счетчике dropped.
+    """
+
+    def __init__(self, max_size=10000, flush_size=200, flush_interval=2.0):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        # Счетчики меняются из потоков запросов и из фонового потока
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def depth(self):
+        """Количество записей, ожидающих записи в БД"""
+        return self._queue.qsize()
+
+    def add(self, **fields):
+        """Ставит запись в очередь; при переполнении запись отбрасывается"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+        if self._queue.qsize() >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Записывает накопленные записи в БД пачками, возвращает количество записанных"""
+        from .models import ActionLog
+
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.flush_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                try:
+                    ActionLog.objects.bulk_create([ActionLog(**fields) for fields in batch])
+                    written += len(batch)
+                except Exception:
+                    # Журнал не должен ломать работу приложения
+                    self._count(dropped=len(batch))
+                    logger.exception("Failed to write %s action log entries", len(batch))
+        self._count(written=written)
+        return written
+
+    def _count(self, dropped=0, written=0):
+        with self._lock:
+            self.dropped += dropped
+            self.written += written
+
+    def stop(self):
+        """Останавливает фоновый поток и сбрасывает остаток очереди"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="action-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            started = time.monotonic()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+            logger.debug("Action log flush took %.3fs", time.monotonic() - started)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_action_log_buffer():
+    """Общий буфер журнала действий процесса"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                options = getattr(settings, "ACTION_LOG_BUFFER", {})
+                _buffer = ActionLogBuffer(
+                    max_size=options.get("MAX_SIZE", 10000),
+                    flush_size=options.get("FLUSH_SIZE", 200),
+                    flush_interval=options.get("FLUSH_INTERVAL", 2.0),
+                )
+                # Сбрасываем остаток очереди при штатном завершении процесса
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def log_action(**fields):
+    """
+    Записывает действие в журнал: через буфер, если ACTION_LOG_ASYNC включен,
+    иначе сразу в БД.
+    """
+    if getattr(settings, "ACTION_LOG_ASYNC", True):
+        return get_action_log_buffer().add(**fields)
+
+    from .models import ActionLog
+
+    ActionLog.objects.create(**fields)
+    return True
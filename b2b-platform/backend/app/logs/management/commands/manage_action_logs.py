@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from app.logs.retention import add_months, archive_months, ensure_partitions, month_start
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming action log partitions and archive/prune months past retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=settings.ACTION_LOG_RETENTION_MONTHS,
+            help='Number of months (including the current one) to keep in the database',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=2,
+            help='Number of future monthly partitions to create (PostgreSQL only)',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=settings.ACTION_LOG_ARCHIVE_DIR,
+            help='Directory for compressed JSONL archives',
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Delete old months without exporting them',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be archived',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running: repeat every N seconds (0 - run once)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options)
+            if options['interval'] <= 0 or options['dry_run']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def run_once(self, options):
+        if not options['dry_run']:
+            created = ensure_partitions(months_ahead=options['months_ahead'])
+            for name in created:
+                self.stdout.write(f'Created partition {name}')
+
+        cutoff = add_months(month_start(timezone.now()), 1 - options['retention_months'])
+        archive_dir = None if options['no_archive'] else options['archive_dir']
+
+        results = archive_months(cutoff, archive_dir=archive_dir, dry_run=options['dry_run'])
+
+        if not results:
+            self.stdout.write(f'No action logs older than {cutoff:%Y-%m}')
+            return
+
+        action = 'Would archive' if options['dry_run'] else 'Archived'
+        for month, count in results:
+            self.stdout.write(f'{action} {count} entries for {month:%Y-%m}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{action} {sum(count for _, count in results)} action log entries')
+        )
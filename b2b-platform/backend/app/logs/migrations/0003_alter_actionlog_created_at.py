@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "logs",
+            "0002_rename_logs_actionlog_user_id_created_at_idx_logs_action_user_id_03575c_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="actionlog",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
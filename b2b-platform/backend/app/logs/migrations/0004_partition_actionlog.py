@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def partition_action_log(apps, schema_editor):
+    # Секционирование по месяцам доступно только на PostgreSQL
+    from app.logs.retention import convert_to_partitioned
+
+    convert_to_partitioned(schema_editor.connection)
+
+
+def unpartition_action_log(apps, schema_editor):
+    from app.logs.retention import convert_to_regular
+
+    convert_to_regular(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logs", "0003_alter_actionlog_created_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_action_log, unpartition_action_log),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -12,7 +13,8 @@ class ActionLog(models.Model):
         null=True, blank=True, help_text="ID of affected entity"
     )
     payload = models.JSONField(default=dict, help_text="Additional action data")
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Время действия передается буфером журнала, запись в БД происходит позже
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
@@ -0,0 +1,290 @@
+"""
+Хранение журнала действий по месяцам.
+
+На PostgreSQL таблица logs_actionlog секционируется по created_at
+(декларативное секционирование, одна секция на календарный месяц по UTC
+и секция DEFAULT для всего, что не попало в диапазоны). Старые месяцы
+выгружаются в сжатый JSONL и удаляются отсоединением секции целиком.
+На других СУБД таблица остается одной, а очистка выполняется DELETE по
+диапазону created_at, который покрыт индексом.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection as default_connection
+from django.db import transaction
+
+TABLE = "logs_actionlog"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def month_start(value):
+    """Начало месяца (UTC) для даты/времени"""
+    if value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(start, count):
+    """Сдвигает начало месяца на count месяцев"""
+    month_index = start.year * 12 + start.month - 1 + count
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(start):
+    """Имя секции месяца: logs_actionlog_p202610"""
+    return f"{TABLE}_p{start:%Y%m}"
+
+
+def is_partitioned(connection=None):
+    """True, если logs_actionlog - секционированная таблица PostgreSQL"""
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection=None):
+    """Имена месячных секций журнала"""
+    connection = connection or default_connection
+    if not is_partitioned(connection):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND c.relname <> %s ORDER BY c.relname",
+            [TABLE, DEFAULT_PARTITION],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(start, connection=None):
+    """
+    Создает секцию месяца, если ее еще нет. Строки этого месяца, успевшие
+    попасть в секцию DEFAULT, переносятся в новую секцию.
+    """
+    connection = connection or default_connection
+    name = partition_name(start)
+    end = add_months(start, 1)
+    if name in list_partitions(connection):
+        return False
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+    return True
+
+
+def ensure_partitions(months_ahead=2, now=None, connection=None):
+    """Создает секции текущего месяца и months_ahead следующих, возвращает созданные"""
+    connection = connection or default_connection
+    if not is_partitioned(connection):
+        return []
+    start = month_start(now or datetime.now(dt_timezone.utc))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(start, offset)
+        if create_partition(month, connection):
+            created.append(partition_name(month))
+    return created
+
+
+def convert_to_partitioned(connection, months_ahead=2):
+    """
+    Переводит существующую таблицу logs_actionlog в секционированную по месяцам.
+    Используется миграцией; на других СУБД ничего не делает.
+    """
+    if connection.vendor != "postgresql" or is_partitioned(connection):
+        return
+
+    legacy = f"{TABLE}_legacy"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+
+        # Освобождаем имена таблицы, индексов и ограничений для новой таблицы
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{legacy}_pkey"')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:55]}_legacy"')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{name}"')
+
+        # Первичный ключ секционированной таблицы обязан включать ключ секционирования
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{legacy}" INCLUDING DEFAULTS) '
+            "PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, created_at)')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        # id получает значения из обычной последовательности, принадлежащей новой таблице
+        # (IDENTITY на секционированных таблицах поддерживается не во всех версиях PostgreSQL)
+        sequence = f"{TABLE}_id_partitioned_seq"
+        cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{TABLE}".id')
+        cursor.execute(f"ALTER TABLE \"{TABLE}\" ALTER COLUMN id SET DEFAULT nextval('\"{sequence}\"')")
+
+        cursor.execute(f'SELECT MIN(created_at), MAX(id) FROM "{legacy}"')
+        first_created_at, max_id = cursor.fetchone()
+
+    # Секции для всех месяцев с данными и months_ahead вперед
+    now = datetime.now(dt_timezone.utc)
+    month = month_start(first_created_at or now)
+    last_month = add_months(month_start(now), months_ahead)
+    while month <= last_month:
+        create_partition(month, connection)
+        month = add_months(month, 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{legacy}"')
+        if max_id:
+            cursor.execute("SELECT setval(%s, %s)", [f'"{sequence}"', max_id])
+        cursor.execute(f'DROP TABLE "{legacy}"')
+
+
+def convert_to_regular(connection):
+    """
+    Обратное преобразование: секционированная logs_actionlog снова становится
+    обычной таблицей с первичным ключом по id. Используется для отката
+    миграции; на других СУБД ничего не делает.
+    """
+    if connection.vendor != "postgresql" or not is_partitioned(connection):
+        return
+
+    partitioned = f"{TABLE}_partitioned"
+    sequence = f"{TABLE}_id_partitioned_seq"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{partitioned}"')
+        cursor.execute(f'ALTER TABLE "{partitioned}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{partitioned}_pkey"')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:51]}_partitioned"')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{partitioned}" DROP CONSTRAINT "{name}"')
+
+        # id снова IDENTITY, как у таблицы, созданной Django
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{partitioned}" INCLUDING DEFAULTS)')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id)')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        # Определения секционированных индексов содержат ON ONLY, для обычной таблицы он не нужен
+        for _, definition in indexes:
+            cursor.execute(definition.replace(" ON ONLY ", " ON "))
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{partitioned}"')
+        cursor.execute(f'SELECT MAX(id) FROM "{TABLE}"')
+        max_id = cursor.fetchone()[0]
+        if max_id:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [TABLE, max_id])
+        # Секции и последовательность удаляются вместе с таблицей
+        cursor.execute(f'DROP TABLE "{partitioned}" CASCADE')
+        cursor.execute(f'DROP SEQUENCE IF EXISTS "{sequence}"')
+
+
+def archive_months(cutoff, archive_dir=None, dry_run=False):
+    """
+    Выгружает и удаляет записи журнала старше месяца cutoff.
+
+    Каждый месяц выгружается в archive_dir/actionlog-YYYY-MM.jsonl.gz
+    (если archive_dir не задан, записи удаляются без выгрузки). Возвращает
+    список (месяц, количество записей).
+    """
+    from .models import ActionLog
+
+    cutoff = month_start(cutoff)
+    months = sorted(
+        {
+            month_start(created_at)
+            for created_at in ActionLog.objects.filter(created_at__lt=cutoff).datetimes(
+                "created_at", "month", tzinfo=dt_timezone.utc
+            )
+        }
+    )
+
+    partitions = set(list_partitions())
+    results = []
+    for start in months:
+        end = add_months(start, 1)
+        rows = ActionLog.objects.filter(created_at__gte=start, created_at__lt=end)
+        count = rows.count()
+        if dry_run:
+            results.append((start, count))
+            continue
+
+        if archive_dir:
+            write_archive(rows, os.path.join(archive_dir, f"actionlog-{start:%Y-%m}.jsonl.gz"))
+
+        name = partition_name(start)
+        if name in partitions:
+            # Отсоединение и удаление секции не сканирует строки
+            with default_connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+                cursor.execute(f'DROP TABLE "{name}"')
+        # Остаток (например, строки из секции DEFAULT) удаляется по диапазону
+        rows.delete()
+        results.append((start, count))
+    return results
+
+
+def write_archive(rows, path):
+    """Потоково пишет записи журнала в сжатый JSONL"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Повторная выгрузка того же месяца не перезаписывает прежний архив
+    base, suffix, counter = path[: -len(".jsonl.gz")], ".jsonl.gz", 1
+    while os.path.exists(path):
+        path = f"{base}.{counter}{suffix}"
+        counter += 1
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+        for row in rows.order_by("id").values().iterator(chunk_size=2000):
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            archive.write("\n")
+    # Архив появляется под итоговым именем только после полной записи
+    os.replace(tmp_path, path)
+    return path
@@ -1,11 +1,15 @@
+from django.conf import settings
+from django.utils import timezone
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
 from rest_framework.filters import OrderingFilter, SearchFilter
 
+from app.common.pagination import COUNT_APPROX, KeysetPagination
 from app.common.permissions import IsAdmin
 
 from .models import ActionLog
+from .retention import add_months, month_start
 from .serializers import ActionLogSerializer
 
 
@@ -22,8 +26,12 @@ class ActionLogFilter(filters.FilterSet):
         fields = ["user", "user_email", "entity_type", "action", "date_from", "date_to"]
 
 
+class ActionLogPagination(KeysetPagination):
+    # Журнал большой: общее количество по умолчанию берется из оценки планировщика
+    page_count_mode = COUNT_APPROX
+
+
 class ActionLogListView(generics.ListAPIView):
-    queryset = ActionLog.objects.all()
     serializer_class = ActionLogSerializer
     permission_classes = [IsAdmin]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -31,3 +39,28 @@ class ActionLogListView(generics.ListAPIView):
     search_fields = ["action", "entity_type", "user__email"]
     ordering_fields = ["created_at", "action", "entity_type"]
     ordering = ["-created_at"]
+    pagination_class = ActionLogPagination
+
+    retention_start = None
+
+    def get_queryset(self):
+        """
+        Без date_from выборка ограничивается сроком хранения журнала, чтобы
+        PostgreSQL читал только секции хранимых месяцев, а не всю таблицу.
+        Начало окна возвращается в ответе как retention_start; более старые
+        записи (если их еще не выгрузил manage_action_logs) доступны с явным
+        date_from.
+        """
+        queryset = ActionLog.objects.select_related("user")
+        if "date_from" not in self.request.query_params:
+            self.retention_start = add_months(
+                month_start(timezone.now()), 1 - settings.ACTION_LOG_RETENTION_MONTHS
+            )
+            queryset = queryset.filter(created_at__gte=self.retention_start)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self.retention_start is not None:
+            response.data["retention_start"] = self.retention_start
+        return response
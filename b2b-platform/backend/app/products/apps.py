@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProductsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "app.products"
+
+    def ready(self):
+        # Подключаем обработчики сигналов (учет ссылок на изображения)
+        from . import signals  # noqa: F401
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0008_product_on_sale"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Ожидает обработки"),
+                    ("READY", "Готово"),
+                    ("FAILED", "Ошибка обработки"),
+                ],
+                default="READY",
+                help_text="Статус фоновой обработки основного изображения",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0009_product_image_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Варианты основного изображения разной ширины: {имя: {width, height, формат: путь}}",
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0010_product_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageAsset",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sha256",
+                    models.CharField(
+                        help_text="SHA-256 исходного файла", max_length=64, unique=True
+                    ),
+                ),
+                (
+                    "variants",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Варианты изображения: {имя: {width, height, формат: путь}}",
+                    ),
+                ),
+                (
+                    "ref_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Количество ссылок из товаров"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="image_asset",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Общий обработанный файл изображения",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="products",
+                to="products.imageasset",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_asset",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Общий обработанный файл изображения",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="product_images",
+                to="products.imageasset",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("categories", "0001_initial"),
+        ("companies", "0006_company_indexes"),
+        ("products", "0011_imageasset"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-rating", "-created_at", "-id"],
+                name="product_active_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["company", "-created_at"],
+                name="product_company_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["category", "-rating", "-created_at"],
+                name="product_category_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("on_sale", True)),
+                fields=["-created_at"],
+                name="product_on_sale_idx",
+            ),
+        ),
+    ]
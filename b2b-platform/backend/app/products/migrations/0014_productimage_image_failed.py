@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0013_product_daily_views"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="image_failed",
+            field=models.BooleanField(
+                default=False, help_text="Фоновая обработка файла завершилась ошибкой"
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.core.files.storage import default_storage
 from django.db import models
+from django.db.models import F
 from decimal import Decimal
 
 
@@ -6,7 +8,69 @@ def product_image_upload_path(instance, filename):
     return f"product_images/{instance.product.company.id}/{filename}"
 
 
+class ImageAsset(models.Model):
+    """
+    Обработанное изображение, хранящееся один раз на уникальное содержимое.
+    Товары и их изображения ссылаются на него, ref_count считает ссылки.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True, help_text="SHA-256 исходного файла")
+    variants = models.JSONField(
+        default=dict, help_text="Варианты изображения: {имя: {width, height, формат: путь}}"
+    )
+    ref_count = models.PositiveIntegerField(default=0, help_text="Количество ссылок из товаров")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+    @property
+    def main_image_path(self):
+        """JPEG самого большого варианта - используется как основное изображение"""
+        largest = max(self.variants.values(), key=lambda variant: variant["width"])
+        return largest["jpeg"]
+
+    def file_paths(self):
+        """Пути всех файлов вариантов в хранилище"""
+        for variant in self.variants.values():
+            for key, value in variant.items():
+                if key not in ("width", "height"):
+                    yield value
+
+    @classmethod
+    def acquire(cls, asset_id):
+        """Добавляет ссылку на изображение; False, если его уже удалили"""
+        return bool(cls.objects.filter(pk=asset_id).update(ref_count=F("ref_count") + 1))
+
+    @classmethod
+    def release(cls, asset_id, storage=None):
+        """Снимает ссылку и удаляет изображение с файлами, когда ссылок не осталось"""
+        if not asset_id:
+            return
+        cls.objects.filter(pk=asset_id, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+
+        asset = cls.objects.filter(pk=asset_id, ref_count=0).first()
+        if asset is None:
+            return
+        # Удаляем строку условно, чтобы не потерять ссылку, добавленную параллельно
+        deleted, _ = cls.objects.filter(pk=asset_id, ref_count=0).delete()
+        if deleted:
+            storage = storage or default_storage
+            for path in asset.file_paths():
+                storage.delete(path)
+
+
 class Product(models.Model):
+    IMAGE_STATUS_PENDING = "PENDING"
+    IMAGE_STATUS_READY = "READY"
+    IMAGE_STATUS_FAILED = "FAILED"
+
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_STATUS_PENDING, "Ожидает обработки"),
+        (IMAGE_STATUS_READY, "Готово"),
+        (IMAGE_STATUS_FAILED, "Ошибка обработки"),
+    ]
+
     CURRENCY_CHOICES = [
         ("KZT", "Kazakhstani Tenge"),
         ("RUB", "Russian Ruble"),
@@ -26,6 +90,25 @@ class Product(models.Model):
         "categories.Category", on_delete=models.SET_NULL, null=True, blank=True, related_name="products"
     )
     image = models.ImageField(upload_to="products/", null=True, blank=True, help_text="Основное изображение товара")
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_STATUS_READY,
+        help_text="Статус фоновой обработки основного изображения",
+    )
+    image_asset = models.ForeignKey(
+        ImageAsset,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="products",
+        help_text="Общий обработанный файл изображения",
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Варианты основного изображения разной ширины: {имя: {width, height, формат: путь}}",
+    )
     images = models.JSONField(default=list, help_text="List of image URLs")
     in_stock = models.BooleanField(default=True)
     is_active = models.BooleanField(default=True)
@@ -36,6 +119,32 @@ class Product(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Публичный каталог: активные товары в сортировке по умолчанию (и для курсорной пагинации)
+            models.Index(
+                fields=["-rating", "-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="product_active_rating_idx",
+            ),
+            # Товары компании на ее странице
+            models.Index(
+                fields=["company", "-created_at"],
+                condition=models.Q(is_active=True),
+                name="product_company_active_idx",
+            ),
+            # Каталог с фильтром по категории
+            models.Index(
+                fields=["category", "-rating", "-created_at"],
+                condition=models.Q(is_active=True),
+                name="product_category_active_idx",
+            ),
+            # Товары по акции
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(is_active=True, on_sale=True),
+                name="product_on_sale_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.company.name}"
@@ -75,6 +184,17 @@ class ProductImage(models.Model):
         Product, on_delete=models.CASCADE, related_name="product_images"
     )
     image = models.ImageField(upload_to=product_image_upload_path)
+    image_asset = models.ForeignKey(
+        ImageAsset,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="product_images",
+        help_text="Общий обработанный файл изображения",
+    )
+    image_failed = models.BooleanField(
+        default=False, help_text="Фоновая обработка файла завершилась ошибкой"
+    )
     alt_text = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -86,3 +206,20 @@ class ProductImage(models.Model):
         return f"Image for {self.product.title}"
 
 
+
+
+class ProductDailyViews(models.Model):
+    """Просмотры карточки товара за день (заполняется буфером app.common.view_tracking)"""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_views")
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "date"], name="product_daily_views_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.product} - {self.date}: {self.views}"
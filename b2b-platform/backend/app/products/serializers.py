@@ -1,10 +1,67 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 
 from app.categories.serializers import CategorySerializer
-from app.common.utils import validate_and_process_image
-
-from .models import Product, ProductImage
+from app.common.utils import validate_image_upload
+
+from .models import ImageAsset, Product, ProductImage
+from .tasks import find_image_asset_for_upload, schedule_product_image_processing
+
+
+def get_main_image_url(product):
+    """
+    URL основного изображения товара.
+    Пока изображение обрабатывается в фоне, возвращается заглушка.
+    """
+    if product.image_status != Product.IMAGE_STATUS_READY:
+        return settings.PRODUCT_IMAGE_PLACEHOLDER_URL
+    return product.image.url
+
+
+def get_product_image_url(product, request=None):
+    """
+    URL изображения товара для списков и карточек.
+
+    Сначала основное изображение, затем первичное из галереи, затем первое
+    из галереи. Галерея берется через product_images.all(), поэтому при
+    prefetch_related('product_images') дополнительных запросов нет.
+    """
+    if product.image:
+        url = get_main_image_url(product)
+    else:
+        # Порядок модели: первичные изображения идут первыми
+        gallery = product.product_images.all()
+        image = next((item for item in gallery if item.is_primary), None)
+        if image is None:
+            image = next(iter(gallery), None)
+        if image is None:
+            return None
+        url = image.image.url
+
+    return request.build_absolute_uri(url) if request else url
+
+
+def get_image_srcset(product, request=None):
+    """
+    Карта вариантов основного изображения для srcset/<picture>:
+    {имя: {'width', 'height', 'webp': url, 'jpeg': url}}
+    """
+    if not product.image or product.image_status != Product.IMAGE_STATUS_READY:
+        return {}
+
+    storage = product.image.storage
+    srcset = {}
+    for name, variant in (product.image_variants or {}).items():
+        entry = {'width': variant['width'], 'height': variant['height']}
+        for key, path in variant.items():
+            if key in ('width', 'height'):
+                continue
+            url = storage.url(path)
+            entry[key] = request.build_absolute_uri(url) if request else url
+        srcset[name] = entry
+    return srcset
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -32,6 +89,7 @@ class ProductListSerializer(serializers.ModelSerializer):
     # добавлена страна компании для фильтрации
     company_country = serializers.CharField(source="company.country", read_only=True)
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -47,6 +105,7 @@ class ProductListSerializer(serializers.ModelSerializer):
             "company_city",  # добавлен город для фильтрации
             "company_country",  # добавлена страна для фильтрации
             "image",
+            "image_srcset",  # варианты изображения для адаптивной загрузки
             "rating",
             "in_stock",
             "on_sale",  # добавлен флаг акции
@@ -55,36 +114,18 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     def get_image(self, obj):
         """Возвращает полный URL изображения товара"""
-        # Сначала проверяем основное изображение
-        if obj.image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
+        return get_product_image_url(obj, self.context.get("request"))
 
-        # Если основного изображения нет, ищем первичное изображение из ProductImage
-        primary_image = obj.product_images.filter(is_primary=True).first()
-        if primary_image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(primary_image.image.url)
-            return primary_image.image.url
-
-        # Если первичного нет, берем первое доступное изображение
-        first_image = obj.product_images.first()
-        if first_image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-            return first_image.image.url
-
-        return None
+    def get_image_srcset(self, obj):
+        """Возвращает варианты основного изображения разной ширины"""
+        return get_image_srcset(obj, self.context.get("request"))
 
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     company = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -99,6 +140,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             "category",
             "company",
             "image",
+            "image_srcset",  # варианты изображения для адаптивной загрузки
             "rating",
             "in_stock",
             "on_sale",  # добавлен флаг акции
@@ -123,30 +165,11 @@ class ProductDetailSerializer(serializers.ModelSerializer):
 
     def get_image(self, obj):
         """Возвращает полный URL изображения товара"""
-        # Сначала проверяем основное изображение
-        if obj.image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-
-        # Если основного изображения нет, ищем первичное изображение из ProductImage
-        primary_image = obj.product_images.filter(is_primary=True).first()
-        if primary_image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(primary_image.image.url)
-            return primary_image.image.url
-
-        # Если первичного нет, берем первое доступное изображение
-        first_image = obj.product_images.first()
-        if first_image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-            return first_image.image.url
+        return get_product_image_url(obj, self.context.get("request"))
 
-        return None
+    def get_image_srcset(self, obj):
+        """Возвращает варианты основного изображения разной ширины"""
+        return get_image_srcset(obj, self.context.get("request"))
 
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
@@ -176,24 +199,56 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
             'company': {'read_only': True}
         }
 
+    def validate_image(self, value):
+        """Быстрая проверка формата; ресайз выполняется фоновым обработчиком"""
+        if value:
+            try:
+                validate_image_upload(value)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.messages)
+        return value
+
+    def get_image_fields(self, image_data):
+        """
+        Поля товара для нового изображения. Если файл с таким содержимым уже
+        обрабатывался, товар сразу ссылается на готовые варианты, иначе
+        исходник сохраняется как есть и ждет фоновой обработки.
+        """
+        asset = find_image_asset_for_upload(image_data)
+        if asset:
+            return {
+                'image': asset.main_image_path,
+                'image_variants': asset.variants,
+                'image_asset': asset,
+                'image_status': Product.IMAGE_STATUS_READY,
+            }
+        return {
+            'image': image_data,
+            'image_variants': {},
+            'image_asset': None,
+            'image_status': Product.IMAGE_STATUS_PENDING,
+        }
+
     def create(self, validated_data):
         """
-        Создание продукта с автоматическим присваиванием компании и обработкой изображения.
+        Создание продукта с автоматическим присваиванием компании.
+        Исходное изображение сохраняется сразу, обработка выполняется в фоне.
         """
         # Извлекаем изображение из validated_data
         image_data = validated_data.pop('image', None)
 
-        request = self.context.get('request')
-
-        # Создаем продукт с переданными данными
         # Компания устанавливается в view через serializer.save(company=user_company)
-        product = Product.objects.create(**validated_data)
+        # Ссылка на общее изображение добавляется в одной транзакции с INSERT,
+        # чтобы при ошибке создания товара счетчик ссылок не остался увеличенным
+        with transaction.atomic():
+            if image_data:
+                validated_data.update(self.get_image_fields(image_data))
 
-        # Обрабатываем и сохраняем изображение
-        if image_data:
-            processed_image = validate_and_process_image(image_data)
-            product.image = processed_image
-            product.save()
+            # Создаем продукт одним INSERT вместе с исходным изображением
+            product = Product.objects.create(**validated_data)
+
+        if product.image_status == Product.IMAGE_STATUS_PENDING:
+            schedule_product_image_processing(product)
 
         return product
 
@@ -214,12 +269,27 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        # Если передано новое изображение, обрабатываем его
+        # Новое изображение сохраняется как есть и обрабатывается в фоне
+        previous_asset_id = instance.image_asset_id
+        # Необработанный исходник принадлежит только этому товару
+        previous_raw_name = (
+            instance.image.name if instance.image_status != Product.IMAGE_STATUS_READY else None
+        )
+        with transaction.atomic():
+            if image_data:
+                for attr, value in self.get_image_fields(image_data).items():
+                    setattr(instance, attr, value)
+
+            instance.save()
+
         if image_data:
-            processed_image = validate_and_process_image(image_data)
-            instance.image = processed_image
+            # Старое общее изображение больше не используется этим товаром
+            ImageAsset.release(previous_asset_id)
+            if previous_asset_id is None and previous_raw_name and previous_raw_name != instance.image.name:
+                instance.image.storage.delete(previous_raw_name)
+            if instance.image_status == Product.IMAGE_STATUS_PENDING:
+                schedule_product_image_processing(instance)
 
-        instance.save()
         return instance
 
     def to_representation(self, instance):
@@ -230,30 +300,7 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
             data['company'] = instance.company.name
 
         # Добавляем информацию об изображении
-        # Сначала проверяем основное изображение
-        if instance.image:
-            request = self.context.get('request')
-            if request:
-                data['image'] = request.build_absolute_uri(instance.image.url)
-            else:
-                data['image'] = instance.image.url
-        else:
-            # Если основного изображения нет, ищем первичное изображение из ProductImage
-            primary_image = instance.product_images.filter(is_primary=True).first()
-            if primary_image:
-                request = self.context.get('request')
-                if request:
-                    data['image'] = request.build_absolute_uri(primary_image.image.url)
-                else:
-                    data['image'] = primary_image.image.url
-            else:
-                # Если первичного нет, берем первое доступное изображение
-                first_image = instance.product_images.first()
-                if first_image:
-                    request = self.context.get('request')
-                    if request:
-                        data['image'] = request.build_absolute_uri(first_image.image.url)
-                    else:
-                        data['image'] = first_image.image.url
+        data['image_srcset'] = get_image_srcset(instance, self.context.get('request'))
+        data['image'] = get_product_image_url(instance, self.context.get('request'))
 
         return data
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from app.common import facets
+
+from .models import ImageAsset, Product, ProductImage
+from .tasks import schedule_gallery_image_processing
+
+
+@receiver(post_delete, sender=Product)
+def release_product_image_asset(sender, instance, **kwargs):
+    """Снимает ссылку на общее изображение при удалении товара"""
+    ImageAsset.release(instance.image_asset_id)
+
+
+@receiver(pre_save, sender=ProductImage)
+def detach_replaced_gallery_image(sender, instance, **kwargs):
+    """При замене файла изображение отвязывается от старого общего файла"""
+    if not instance.pk or not (instance.image_asset_id or instance.image_failed):
+        return
+    current_name = (
+        ProductImage.objects.filter(pk=instance.pk).values_list("image", flat=True).first()
+    )
+    if current_name != instance.image.name:
+        # Новый файл обрабатывается заново, прежняя ошибка к нему не относится
+        instance.image_failed = False
+        if instance.image_asset_id:
+            instance._released_asset_id = instance.image_asset_id
+            instance.image_asset = None
+
+
+@receiver(post_save, sender=ProductImage)
+def schedule_gallery_image_asset(sender, instance, **kwargs):
+    """Новые файлы галереи переводятся на общие обработанные изображения в фоне"""
+    released_asset_id = getattr(instance, "_released_asset_id", None)
+    if released_asset_id:
+        ImageAsset.release(released_asset_id)
+        instance._released_asset_id = None
+    if instance.image and not instance.image_asset_id:
+        schedule_gallery_image_processing(instance)
+
+
+@receiver(post_delete, sender=ProductImage)
+def release_gallery_image_asset(sender, instance, **kwargs):
+    """Снимает ссылку на общее изображение при удалении изображения галереи"""
+    ImageAsset.release(instance.image_asset_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_facets(sender, **kwargs):
+    """Счетчики фасетов товаров пересчитываются после изменения товаров"""
+    facets.invalidate("products")
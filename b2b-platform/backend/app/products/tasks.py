@@ -0,0 +1,226 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError
+from django.utils import timezone
+
+from app.common.metrics import image_processing_duration_seconds
+from app.common.tasks import enqueue
+from app.common.utils import (IMAGE_VARIANT_EXTENSIONS, compute_file_sha256,
+                              generate_image_variants)
+
+from .models import ImageAsset, Product, ProductImage
+
+logger = logging.getLogger(__name__)
+
+
+def image_asset_key(sha256, width, image_format):
+    """Путь варианта в хранилище, определяемый содержимым исходного файла"""
+    extension = IMAGE_VARIANT_EXTENSIONS[image_format]
+    return f"images/{sha256[:2]}/{sha256}/{width}w.{extension}"
+
+
+def get_variant_settings():
+    """Набор вариантов и форматов из настроек; JPEG нужен всегда как запасной вариант"""
+    variants = dict(settings.IMAGE_VARIANTS)
+    if "original" in variants and variants["original"] is None:
+        variants["original"] = settings.IMAGE_ORIGINAL_MAX_WIDTH
+    formats = list(settings.IMAGE_VARIANT_FORMATS)
+    if "jpeg" not in formats:
+        formats.append("jpeg")
+    return variants, formats
+
+
+def find_image_asset(sha256):
+    """Возвращает уже обработанное изображение с таким содержимым, добавляя на него ссылку"""
+    asset = ImageAsset.objects.filter(sha256=sha256).first()
+    if asset and ImageAsset.acquire(asset.pk):
+        return asset
+    return None
+
+
+def find_image_asset_for_upload(image_file):
+    """Поиск обработанного изображения для загружаемого файла по хешу содержимого"""
+    return find_image_asset(compute_file_sha256(image_file))
+
+
+def create_image_asset(storage, source_file, sha256):
+    """
+    Строит варианты изображения и сохраняет их под ключами по хешу.
+    Возвращает ImageAsset с уже добавленной ссылкой.
+    """
+    variant_sizes, formats = get_variant_settings()
+    variants = generate_image_variants(
+        source_file, variant_sizes, formats, quality=settings.IMAGE_VARIANT_QUALITY
+    )
+
+    asset_variants = {}
+    for name, variant in variants.items():
+        entry = {"width": variant["width"], "height": variant["height"]}
+        for image_format, content in variant["files"].items():
+            key = image_asset_key(sha256, variant["width"], image_format)
+            # Содержимое по ключу определяется хешем, существующий файл переиспользуем
+            entry[image_format] = key if storage.exists(key) else storage.save(key, ContentFile(content))
+        asset_variants[name] = entry
+
+    try:
+        asset, _ = ImageAsset.objects.get_or_create(
+            sha256=sha256, defaults={"variants": asset_variants}
+        )
+    except IntegrityError:
+        asset = ImageAsset.objects.get(sha256=sha256)
+    ImageAsset.acquire(asset.pk)
+    return asset
+
+
+def get_or_create_image_asset(storage, name):
+    """Находит или создает обработанное изображение для файла из хранилища"""
+    with storage.open(name, "rb") as raw_file:
+        sha256 = compute_file_sha256(raw_file)
+        asset = find_image_asset(sha256)
+        if asset is None:
+            asset = create_image_asset(storage, raw_file, sha256)
+    return asset
+
+
+def schedule_product_image_processing(product):
+    """Ставит обработку загруженного изображения товара в фоновую очередь"""
+    enqueue(process_product_image, product.pk)
+
+
+def schedule_gallery_image_processing(product_image):
+    """Ставит обработку изображения из галереи товара в фоновую очередь"""
+    enqueue(process_gallery_image, product_image.pk)
+
+
+def timed_image_asset(kind, storage, raw_name):
+    """get_or_create_image_asset с учетом длительности в метриках"""
+    started = time.perf_counter()
+    result = "failed"
+    try:
+        asset = get_or_create_image_asset(storage, raw_name)
+        result = "ok"
+        return asset
+    finally:
+        image_processing_duration_seconds.observe(time.perf_counter() - started, kind=kind, result=result)
+
+
+def process_product_image(product_id):
+    """
+    Фоновая обработка исходного изображения товара.
+
+    Исходный файл уже сохранён в хранилище при загрузке. Если изображение
+    с таким содержимым уже обрабатывалось, товар просто ссылается на него,
+    иначе строятся варианты разной ширины (WebP + JPEG). После этого товар
+    переключается на JPEG исходного размера, а исходник удаляется.
+    """
+    product = Product.objects.filter(pk=product_id).only("id", "image", "image_status").first()
+    if not product or not product.image or product.image_status == Product.IMAGE_STATUS_READY:
+        return
+
+    raw_name = product.image.name
+    storage = product.image.storage
+
+    try:
+        asset = timed_image_asset("product", storage, raw_name)
+    except Exception:
+        logger.exception("Failed to process image for product %s", product_id)
+        Product.objects.filter(pk=product_id, image=raw_name).update(
+            image_status=Product.IMAGE_STATUS_FAILED
+        )
+        return
+
+    # Обновляем только если за время обработки изображение не заменили
+    updated = Product.objects.filter(pk=product_id, image=raw_name).update(
+        image=asset.main_image_path,
+        image_variants=asset.variants,
+        image_asset=asset,
+        image_status=Product.IMAGE_STATUS_READY,
+    )
+    if updated:
+        storage.delete(raw_name)
+    else:
+        ImageAsset.release(asset.pk, storage)
+
+
+def process_gallery_image(product_image_id):
+    """Переводит изображение из галереи товара на общий обработанный файл"""
+    product_image = (
+        ProductImage.objects.filter(pk=product_image_id, image_asset__isnull=True)
+        .only("id", "image")
+        .first()
+    )
+    if not product_image or not product_image.image:
+        return
+
+    raw_name = product_image.image.name
+    storage = product_image.image.storage
+
+    try:
+        asset = timed_image_asset("gallery", storage, raw_name)
+    except Exception:
+        logger.exception("Failed to process gallery image %s", product_image_id)
+        # Повторно такие изображения обрабатываются только с --include-failed
+        ProductImage.objects.filter(pk=product_image_id, image=raw_name).update(image_failed=True)
+        return
+
+    updated = ProductImage.objects.filter(
+        pk=product_image_id, image=raw_name, image_asset__isnull=True
+    ).update(image=asset.main_image_path, image_asset=asset)
+    if updated:
+        storage.delete(raw_name)
+    else:
+        ImageAsset.release(asset.pk, storage)
+
+
+def process_pending_product_images(include_failed=False, limit=None, older_than=None):
+    """
+    Синхронно обрабатывает все изображения, ожидающие обработки.
+
+    Задачи фоновой очереди живут в памяти воркера и теряются при его
+    перезапуске (max_requests, деплой), поэтому команда
+    process_product_images периодически подбирает такие изображения.
+    older_than (секунды) пропускает недавно загруженные изображения,
+    которые еще обрабатываются в воркерах.
+    """
+    statuses = [Product.IMAGE_STATUS_PENDING]
+    if include_failed:
+        statuses.append(Product.IMAGE_STATUS_FAILED)
+
+    products = Product.objects.filter(image_status__in=statuses, image__isnull=False)
+    if older_than:
+        products = products.filter(updated_at__lt=timezone.now() - timedelta(seconds=older_than))
+    product_ids = products.exclude(image="").values_list("id", flat=True)
+    if limit:
+        product_ids = product_ids[:limit]
+
+    processed = 0
+    for product_id in list(product_ids):
+        if include_failed:
+            Product.objects.filter(pk=product_id).update(image_status=Product.IMAGE_STATUS_PENDING)
+        process_product_image(product_id)
+        processed += 1
+    return processed
+
+
+def process_pending_gallery_images(include_failed=False, limit=None, older_than=None):
+    """Синхронно переводит на общие файлы изображения галереи, еще не прошедшие обработку"""
+    images = ProductImage.objects.filter(image_asset__isnull=True)
+    if not include_failed:
+        images = images.filter(image_failed=False)
+    if older_than:
+        images = images.filter(created_at__lt=timezone.now() - timedelta(seconds=older_than))
+    image_ids = images.exclude(image="").values_list("id", flat=True)
+    if limit:
+        image_ids = image_ids[:limit]
+
+    processed = 0
+    for image_id in list(image_ids):
+        if include_failed:
+            ProductImage.objects.filter(pk=image_id).update(image_failed=False)
+        process_gallery_image(image_id)
+        processed += 1
+    return processed
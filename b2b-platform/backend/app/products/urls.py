@@ -5,6 +5,7 @@ from . import views
 urlpatterns = [
     path("", views.ProductListCreateView.as_view(), name="product-list-create"),
     path("my/", views.MyProductsView.as_view(), name="my-products"),
+    path("my/view-stats/", views.my_product_view_stats, name="my-product-view-stats"),
     path("category/<str:category_name>/", views.products_by_category, name="products-by-category"),
     path("exchange-rates/", views.get_exchange_rates, name="exchange-rates"),
     path("convert-price/", views.convert_price, name="convert-price"),
@@ -6,11 +6,17 @@ from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.http import JsonResponse, HttpResponse
-import pandas as pd
 import io
+import time
 from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.exceptions import ValidationError
 
+from app.common import view_tracking
+from app.common.counters import parse_period
+from app.common.facets import Facet, get_facets
+from app.common.metrics import import_duration_seconds, import_rows_total
+from app.common.pagination import KeysetPagination
+from app.common.spreadsheets import pandas
 from app.common.permissions import IsOwnerOrReadOnly
 # from app.common.services import CurrencyConverter
 
@@ -31,6 +37,8 @@ class ProductFilter(filters.FilterSet):
     city = filters.CharFilter(field_name="company__city", lookup_expr="iexact")
     # добавлен фильтр по стране компании
     country = filters.CharFilter(field_name="company__country", lookup_expr="iexact")
+    supplier_type = filters.CharFilter(field_name="company__supplier_type")
+    currency = filters.CharFilter(field_name="currency")
 
     class Meta:
         model = Product
@@ -44,9 +52,22 @@ class ProductFilter(filters.FilterSet):
             "on_sale",  # добавлен фильтр по акциям
             "city",  # добавлен фильтр по городу
             "country",  # добавлен фильтр по стране
+            "supplier_type",
+            "currency",
         ]
 
 
+# Фасеты боковой панели фильтров товаров (filter-options)
+PRODUCT_FACETS = [
+    Facet("category", "category__id", labels=("category__name", "category__slug")),
+    Facet("city", "company__city"),
+    Facet("country", "company__country"),
+    Facet("supplier_type", "company__supplier_type"),
+    Facet("in_stock", "in_stock"),
+    Facet("currency", "currency"),
+]
+
+
 class ProductListCreateView(generics.ListCreateAPIView):
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = ProductFilter
@@ -54,6 +75,7 @@ class ProductListCreateView(generics.ListCreateAPIView):
     # добавлена сортировка по цене (по возрастанию и убыванию)
     ordering_fields = ["title", "price", "created_at", "rating"]
     ordering = ["-rating", "-created_at"]  # сортировка по умолчанию
+    pagination_class = KeysetPagination
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
     def get_queryset(self):
@@ -144,6 +166,13 @@ class ProductRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        # Просмотр копится в памяти и пишется в ProductDailyViews фоновым сбросом
+        view_tracking.record_view(view_tracking.PRODUCT, instance.pk, instance.company.owner_id, request.user)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
     def get_queryset(self):
         if self.request.method in ["PUT", "PATCH", "DELETE"]:
             # Users can only edit products from their own companies
@@ -163,6 +192,17 @@ class MyProductsView(generics.ListAPIView):
         return Product.objects.select_related('company', 'category').prefetch_related('product_images').filter(company__owner=self.request.user)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def my_product_view_stats(request):
+    """
+    Просмотры карточек товаров текущего пользователя за период (топ-50 товаров).
+    GET /products/my/view-stats/?date_from=2024-01-01&date_to=2024-01-31
+    """
+    date_from, date_to = parse_period(request.query_params)
+    return Response(view_tracking.supplier_report(request.user, view_tracking.PRODUCT, date_from, date_to))
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def products_by_category(request, category_name):
@@ -244,6 +284,8 @@ def download_import_template(request):
     """
     Скачать шаблон Excel для импорта товаров
     """
+    pd = pandas()
+
     # Создаем DataFrame с примерами данных
     template_data = {
         'name': [
@@ -322,6 +364,8 @@ def import_products_from_excel(request):
             'error': 'Поддерживаются только файлы Excel (.xlsx, .xls)'
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    pd = pandas()
+    started = time.perf_counter()
     try:
         # Читаем Excel файл
         df = pd.read_excel(excel_file)
@@ -431,6 +475,10 @@ def import_products_from_excel(request):
             except Exception as e:
                 skipped_products.append(f"Строка {index + 2}: {str(e)}")
 
+        import_rows_total.inc(len(imported_products), kind="products", result="imported")
+        import_rows_total.inc(len(skipped_products), kind="products", result="skipped")
+        import_duration_seconds.observe(time.perf_counter() - started, kind="products")
+
         return Response({
             'success': True,
             'message': f'Импортировано {len(imported_products)} товаров',
@@ -451,34 +499,24 @@ def import_products_from_excel(request):
 @permission_classes([permissions.AllowAny])
 def filter_options(request):
     """
-    Возвращает доступные варианты для фильтров на странице акций
-    """
-    from app.categories.models import Category
+    Возвращает доступные варианты для фильтров с количеством товаров.
 
-    try:
-        # Получаем товары в акции для фильтров
-        sale_products = Product.objects.filter(on_sale=True, is_active=True)
-
-        # Получаем уникальные категории
-        categories = Category.objects.filter(
-            products__in=sale_products
-        ).distinct().values('id', 'name', 'slug')
-
-        # Получаем уникальные города
-        cities = list(set(sale_products.values_list('company__city', flat=True)))
-        cities = [city for city in cities if city]  # Убираем пустые значения
-
-        # Получаем уникальные страны
-        countries = list(set(sale_products.values_list('company__country', flat=True)))
-        countries = [country for country in countries if country]  # Убираем пустые значения
-
-        return Response({
-            'categories': list(categories),
-            'cities': sorted(cities),
-            'countries': sorted(countries)
-        }, status=status.HTTP_200_OK)
-
-    except Exception as e:
-        return Response({
-            'error': f'Ошибка получения опций фильтров: {str(e)}'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    Принимает параметры ProductFilter: счетчики каждого фасета учитывают
+    все примененные фильтры, кроме его собственного. Выборка совпадает с
+    прежней версией эндпоинта (страница акций): активные товары, без
+    параметра on_sale - только товары в акции. Другие товары считаются
+    только при явном on_sale=false.
+    """
+    params = request.query_params.copy()
+    params.setdefault('on_sale', 'true')
+    queryset = Product.objects.filter(is_active=True)
+    facets = get_facets("products", ProductFilter, queryset, params, PRODUCT_FACETS, request)
+
+    return Response({
+        'categories': [
+            {'id': item['value'], 'name': item['name'], 'slug': item['slug']} for item in facets['category']
+        ],
+        'cities': sorted(item['value'] for item in facets['city']),
+        'countries': sorted(item['value'] for item in facets['country']),
+        'facets': facets,
+    }, status=status.HTTP_200_OK)
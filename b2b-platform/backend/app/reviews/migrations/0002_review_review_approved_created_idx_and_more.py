@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0006_company_indexes"),
+        ("reviews", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                condition=models.Q(("status", "APPROVED")),
+                fields=["-created_at"],
+                name="review_approved_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                condition=models.Q(("status", "APPROVED")),
+                fields=["company", "rating"],
+                name="review_company_approved_idx",
+            ),
+        ),
+    ]
@@ -36,6 +36,20 @@ class Review(models.Model):
     class Meta:
         ordering = ["-created_at"]
         unique_together = ["company", "author"]  # One review per user per company
+        indexes = [
+            # Public review list: approved reviews, newest first
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(status="APPROVED"),
+                name="review_approved_created_idx",
+            ),
+            # Company rating recalculation reads only approved ratings
+            models.Index(
+                fields=["company", "rating"],
+                condition=models.Q(status="APPROVED"),
+                name="review_company_approved_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Review by {self.author.email} for {self.company.name}"
@@ -5,6 +5,7 @@ from pathlib import Path
 
 import dj_database_url
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Базовая директория проекта - путь к корневой папке проекта
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,6 +58,8 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 # Middleware - промежуточное ПО для обработки запросов и ответов
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # CORS политики - ДОЛЖЕН БЫТЬ ПЕРВЫМ
+    "app.common.middleware.MetricsMiddleware",  # Метрики запросов для /metrics (METRICS_ENABLED)
+    "app.common.middleware.ProfilingMiddleware",  # Профилирование SQL/сериализации (PROFILING_ENABLED)
     "django.middleware.security.SecurityMiddleware",  # Безопасность
     "django.contrib.sessions.middleware.SessionMiddleware",  # Сессии
     "django.middleware.common.CommonMiddleware",  # Общие функции
@@ -91,12 +94,48 @@ TEMPLATES = [
 WSGI_APPLICATION = "app.wsgi.application"
 
 # Конфигурация базы данных (по умолчанию SQLite, можно переопределить через переменные окружения)
+# Постоянные соединения: соединение живет DB_CONN_MAX_AGE секунд и
+# переиспользуется между запросами воркера (0 - новое соединение на запрос,
+# none - без ограничения). По умолчанию 0, как раньше; в production
+# рекомендуется DB_CONN_MAX_AGE=60 (см. DEPLOYMENT.md). Перед
+# переиспользованием проверяется живость соединения.
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=0, cast=lambda value: None if value == "none" else int(value))
+DB_CONN_HEALTH_CHECKS = config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool)
+# Пул соединений: "none" или "pgbouncer" (PgBouncer в режиме transaction
+# pooling перед PostgreSQL). Встроенный пул psycopg появился только в Django 5.1.
+DB_POOL_MODE = config("DB_POOL_MODE", default="none")
+if DB_POOL_MODE not in ("none", "pgbouncer"):
+    raise ImproperlyConfigured(f"Unsupported DB_POOL_MODE {DB_POOL_MODE!r}: expected none or pgbouncer")
+
 DATABASES = {
     "default": dj_database_url.config(
-        default=config("DATABASE_URL", default="sqlite:///db.sqlite3")
+        default=config("DATABASE_URL", default="sqlite:///db.sqlite3"),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
     )
 }
 
+if DB_POOL_MODE == "pgbouncer":
+    # В transaction pooling серверные курсоры (iterator()) и подготовленные
+    # выражения не переживают смену серверного соединения между транзакциями
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# Кеш приложения. По умолчанию LocMem - отдельный в каждом процессе, что
+# подходит только для одного процесса (runserver, тесты). При нескольких
+# воркерах gunicorn нужен общий кеш, иначе сброс кеша в одном воркере не
+# виден остальным (избранное, фасеты, расписание баннеров):
+# CACHE_URL=redis://host:6379/1 (пакет redis) или CACHE_URL=db (таблица
+# django_cache, создается командой createcachetable).
+CACHE_URL = config("CACHE_URL", default="")
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
+elif CACHE_URL == "db":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"}}
+elif CACHE_URL:
+    raise ImproperlyConfigured(f"Unsupported CACHE_URL {CACHE_URL!r}: expected redis://... or db")
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
 # Валидаторы паролей для обеспечения безопасности
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -149,8 +188,44 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",  # Сортировка
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",  # Автогенерация схемы OpenAPI
+    "DEFAULT_THROTTLE_RATES": {  # Лимиты для ScopedRateThrottle (по пользователю или IP)
+        "ad_click": config("AD_CLICK_THROTTLE_RATE", default="30/minute"),
+    },
 }
 
+# Профилирование запросов: Server-Timing и статистика маршрутов в /api/monitoring/profiling/
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=1.0, cast=float)  # Доля профилируемых запросов
+
+# Максимальный уровень масштаба с кластерами на /api/companies/map/ (ближе -
+# отдельные точки). После изменения нужно выполнить rebuild_map_grid
+MAP_CLUSTER_MAX_ZOOM = config("MAP_CLUSTER_MAX_ZOOM", default=14, cast=int)
+
+# Время жизни кеша фасетов фильтров (сек); кеш также сбрасывается при изменении товаров и компаний
+FACETS_CACHE_TIMEOUT = config("FACETS_CACHE_TIMEOUT", default=300, cast=int)
+
+# Максимальный возраст расписания баннеров в памяти процесса (сек) для /api/ads/serve/
+ADS_SCHEDULE_MAX_AGE = config("ADS_SCHEDULE_MAX_AGE", default=60, cast=int)
+
+# Буферизованные счетчики (показы рекламы, просмотры карточек): False - без фонового потока, сброс только явным flush()
+COUNTER_BUFFER_ASYNC = config("COUNTER_BUFFER_ASYNC", default=True, cast=bool)
+# Интервал записи показов и кликов рекламы в AdDailyStats (сек)
+AD_STATS_FLUSH_INTERVAL = config("AD_STATS_FLUSH_INTERVAL", default=10.0, cast=float)
+# Интервал записи просмотров компаний и товаров в CompanyDailyViews/ProductDailyViews (сек)
+VIEW_STATS_FLUSH_INTERVAL = config("VIEW_STATS_FLUSH_INTERVAL", default=30.0, cast=float)
+
+# Время жизни кеша id избранных компаний пользователя (сек); сбрасывается при изменении избранного
+FAVORITES_CACHE_TIMEOUT = config("FAVORITES_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Метрики Prometheus на /metrics (выключены по умолчанию). Отдаются только при
+# заданном METRICS_TOKEN с заголовком Authorization: Bearer <token>; серии
+# каждого воркера gunicorn различаются меткой pid (см. app.common.metrics)
+METRICS_ENABLED = config("METRICS_ENABLED", default=False, cast=bool)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Ниже этой оценки планировщика ?count=approx выполняет точный COUNT(*) (app.common.pagination)
+PAGINATION_APPROX_COUNT_THRESHOLD = config("PAGINATION_APPROX_COUNT_THRESHOLD", default=10000, cast=int)
+
 # Настройки JWT токенов для аутентификации
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(  # Время жизни access токена
@@ -195,6 +270,7 @@ CORS_ALLOW_METHODS = [  # Разрешенные HTTP методы
     'DELETE',
     'OPTIONS',
 ]
+CORS_EXPOSE_HEADERS = ["Server-Timing"]  # Замеры профилирования доступны фронтенду
 
 # Настройки CSRF для безопасной работы с продакшн доменами
 CSRF_TRUSTED_ORIGINS = [
@@ -228,8 +304,40 @@ LOGO_MAX_SIZE = (600, 600)  # Максимальный размер логоти
 LOGO_ALLOWED_EXTENSIONS = ["jpg", "jpeg", "png", "gif", "bmp", "webp"]  # Разрешенные форматы изображений
 # Для рекламных изображений разрешены любые размеры и форматы
 AD_ALLOWED_EXTENSIONS = ["jpg", "jpeg", "png", "gif", "bmp", "webp"]  # Все популярные форматы для рекламы
+# Максимальное число пикселей загружаемого изображения (защита от decompression bomb)
+IMAGE_MAX_PIXELS = config("IMAGE_MAX_PIXELS", default=40_000_000, cast=int)
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
+# Фоновая обработка задач (ресайз изображений и т.д.) в пуле потоков процесса
+BACKGROUND_TASKS_ASYNC = config("BACKGROUND_TASKS_ASYNC", default=True, cast=bool)  # False - выполнять синхронно
+BACKGROUND_TASK_WORKERS = config("BACKGROUND_TASK_WORKERS", default=2, cast=int)  # Количество фоновых потоков
+# Варианты изображений товаров: имя -> максимальная ширина в пикселях (None - исходный размер)
+IMAGE_VARIANTS = {
+    "thumbnail": 320,  # Карточки в каталоге
+    "medium": 800,  # Страница товара
+    "original": None,  # Исходный размер (ограничен IMAGE_ORIGINAL_MAX_WIDTH)
+}
+IMAGE_ORIGINAL_MAX_WIDTH = config("IMAGE_ORIGINAL_MAX_WIDTH", default=2000, cast=int)
+# Форматы вариантов: WebP для современных браузеров и JPEG как запасной вариант
+IMAGE_VARIANT_FORMATS = ["webp", "jpeg"]
+if config("IMAGE_AVIF_ENABLED", default=False, cast=bool):  # AVIF сжимает лучше, но кодируется медленно
+    IMAGE_VARIANT_FORMATS.insert(0, "avif")
+IMAGE_VARIANT_QUALITY = config("IMAGE_VARIANT_QUALITY", default=82, cast=int)
+# Журнал действий: записи буферизуются в памяти и пишутся в БД пачками фоновым потоком
+ACTION_LOG_ASYNC = config("ACTION_LOG_ASYNC", default=True, cast=bool)  # False - писать сразу в запросе
+ACTION_LOG_BUFFER = {
+    "MAX_SIZE": config("ACTION_LOG_BUFFER_MAX_SIZE", default=10000, cast=int),  # Лимит очереди, сверх него записи отбрасываются
+    "FLUSH_SIZE": config("ACTION_LOG_FLUSH_SIZE", default=200, cast=int),  # Размер пачки bulk_create
+    "FLUSH_INTERVAL": config("ACTION_LOG_FLUSH_INTERVAL", default=2.0, cast=float),  # Максимальная задержка записи, сек
+}
+# Хранение журнала действий: сколько месяцев держать в БД и куда выгружать старые (manage_action_logs)
+ACTION_LOG_RETENTION_MONTHS = config("ACTION_LOG_RETENTION_MONTHS", default=12, cast=int)
+ACTION_LOG_ARCHIVE_DIR = config("ACTION_LOG_ARCHIVE_DIR", default=os.path.join(BASE_DIR, "archive", "action_logs"))
+# Заглушка, которую API отдает вместо изображения товара, пока оно обрабатывается
+PRODUCT_IMAGE_PLACEHOLDER_URL = config(
+    "PRODUCT_IMAGE_PLACEHOLDER_URL", default=STATIC_URL + "products/img/placeholder.svg"
+)
+
 # Настройки email для отправки писем
 # Используем значение из .env файла, по умолчанию console backend для разработки
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-19 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("categories", "0001_initial"),
+        ("companies", "0006_company_indexes"),
+        ("tenders", "0006_tender_contact_phone"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tender",
+            index=models.Index(
+                condition=models.Q(("status", "APPROVED")),
+                fields=["-created_at", "-id"],
+                name="tender_approved_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tender",
+            index=models.Index(
+                fields=["author", "status", "-created_at"],
+                name="tender_author_status_idx",
+            ),
+        ),
+    ]
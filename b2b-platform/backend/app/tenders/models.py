@@ -69,6 +69,16 @@ class Tender(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Тендер"
         verbose_name_plural = "Тендеры"
+        indexes = [
+            # Публичный список: одобренные тендеры, новые сначала
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(status="APPROVED"),
+                name="tender_approved_created_idx",
+            ),
+            # Тендеры автора на странице компании
+            models.Index(fields=["author", "status", "-created_at"], name="tender_author_status_idx"),
+        ]
 
     def __str__(self):
         return self.title
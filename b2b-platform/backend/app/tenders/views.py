@@ -4,6 +4,7 @@ from rest_framework import generics, permissions, status
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 
+from app.common.pagination import KeysetPagination
 from app.common.permissions import IsAdmin
 
 from .models import Tender
@@ -30,6 +31,7 @@ class TenderListCreateView(generics.ListCreateAPIView):
     search_fields = ["title", "description", "city"]
     ordering_fields = ["title", "deadline_date", "created_at"]
     ordering = ["-created_at"]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         if (
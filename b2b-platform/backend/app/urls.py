@@ -5,6 +5,8 @@ from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from app.common.monitoring_views import metrics_view
+
 # Основные URL маршруты приложения
 urlpatterns = [
     # Административная панель Django
@@ -22,6 +24,8 @@ urlpatterns = [
     path("api/import/", include("app.common.urls")),  # Импорт данных
     path("api/moderation/", include("app.common.moderation_urls")),  # Модерация контента
     path("api/logs/", include("app.logs.urls")),  # Логирование действий
+    path("api/monitoring/", include("app.common.monitoring_urls")),  # Профилирование и мониторинг
+    path("metrics", metrics_view, name="metrics"),  # Метрики Prometheus
     
     # Документация API через Swagger/OpenAPI
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),  # Схема API в формате OpenAPI
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    name = "app.users"
+
+    def ready(self):
+        # Подключаем обработчики сигналов (кеш множества избранного)
+        from . import signals  # noqa: F401
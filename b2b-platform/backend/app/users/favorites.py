@@ -0,0 +1,46 @@
+"""
+Множество id избранных компаний пользователя.
+
+Множество загружается одним запросом и хранится в кеше до изменения
+избранного (сигналы app.users.signals сбрасывают ключ) или до
+FAVORITES_CACHE_TIMEOUT. В пределах запроса оно запоминается на объекте
+запроса, поэтому признак is_favorite в списках компаний не стоит ни
+запросов к БД, ни обращений к кешу на каждую строку.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from app.common.metrics import record_cache_lookup
+
+
+def _cache_key(user_id):
+    return f"favorites:{user_id}:companies"
+
+
+def favorite_company_ids(user_id):
+    """frozenset id избранных компаний пользователя"""
+    key = _cache_key(user_id)
+    ids = cache.get(key)
+    record_cache_lookup("favorites", ids is not None)
+    if ids is None:
+        from .models import Favorite
+
+        ids = frozenset(Favorite.objects.filter(user_id=user_id).values_list("company_id", flat=True))
+        cache.set(key, ids, settings.FAVORITES_CACHE_TIMEOUT)
+    return ids
+
+
+def request_favorite_company_ids(request):
+    """Избранное текущего пользователя, один раз на запрос; для анонимных - пустое множество"""
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    # Атрибут ставится на исходный HttpRequest, общий для сериализаторов запроса
+    raw = getattr(request, "_request", request)
+    ids = getattr(raw, "_favorite_company_ids", None)
+    if ids is None:
+        ids = raw._favorite_company_ids = favorite_company_ids(request.user.pk)
+    return ids
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
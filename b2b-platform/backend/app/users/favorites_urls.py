@@ -4,5 +4,6 @@ from . import views
 
 urlpatterns = [
     path("", views.FavoriteListView.as_view(), name="favorites-list"),
+    path("ids/", views.favorite_ids, name="favorite-ids"),
     path("<int:company_id>/", views.toggle_favorite, name="toggle-favorite"),
 ]
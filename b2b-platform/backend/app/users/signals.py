@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import favorites
+from .models import Favorite
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_favorite_ids(sender, instance, **kwargs):
+    """Множество избранного перечитывается при следующем обращении"""
+    favorites.invalidate(instance.user_id)
@@ -9,6 +9,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 import random
 import string
 
+from . import favorites
 from .models import Favorite, SearchHistory
 from .serializers import (FavoriteSerializer, SearchHistorySerializer,
                           UserRegistrationSerializer, UserSerializer)
@@ -62,28 +63,35 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
 def toggle_favorite(request, company_id):
-    try:
-        from app.companies.models import Company
-
-        company = Company.objects.get(id=company_id)
-    except Company.DoesNotExist:
+    # Состояние определяет БД: кеш множества избранного может отставать
+    # (сигналы app.users.signals сбрасывают его после записи)
+    deleted, _ = Favorite.objects.filter(user=request.user, company_id=company_id).delete()
+    if deleted:
         return Response(
-            {"error": "Company not found"}, status=status.HTTP_404_NOT_FOUND
+            {"message": "Removed from favorites"}, status=status.HTTP_200_OK
         )
 
-    favorite, created = Favorite.objects.get_or_create(
-        user=request.user, company=company
-    )
+    from app.companies.models import Company
 
-    if not created:
-        favorite.delete()
+    if not Company.objects.filter(id=company_id).exists():
         return Response(
-            {"message": "Removed from favorites"}, status=status.HTTP_200_OK
+            {"error": "Company not found"}, status=status.HTTP_404_NOT_FOUND
         )
 
+    Favorite.objects.get_or_create(user=request.user, company_id=company_id)
     return Response({"message": "Added to favorites"}, status=status.HTTP_201_CREATED)
 
 
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def favorite_ids(request):
+    """
+    Id избранных компаний текущего пользователя (для отметок в списках).
+    GET /api/favorites/ids/
+    """
+    return Response({"company_ids": sorted(favorites.favorite_company_ids(request.user.pk))})
+
+
 class FavoriteListView(generics.ListAPIView):
     serializer_class = FavoriteSerializer
     permission_classes = [permissions.IsAuthenticated]
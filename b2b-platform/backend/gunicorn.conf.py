@@ -0,0 +1,103 @@
+"""
+Конфигурация gunicorn для production.
+
+Запуск: gunicorn app.wsgi:application -c gunicorn.conf.py
+ASGI (uvicorn-воркеры): GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+и gunicorn app.asgi:application -c gunicorn.conf.py
+
+Все параметры переопределяются переменными окружения GUNICORN_*.
+"""
+import math
+import os
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def read_cgroup_quota():
+    """Лимит CPU контейнера из cgroup (v2 cpu.max или v1 cfs_quota), None без лимита"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as quota_file, \
+                open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as period_file:
+            quota, period = int(quota_file.read()), int(period_file.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus():
+    """
+    Ядра, доступные процессу: cpu_count() видит все ядра хоста, а не
+    affinity процесса и лимит CPU контейнера
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = read_cgroup_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Воркеры: 2 * ядра + 1 (классическая рекомендация gunicorn для sync-воркеров)
+# по ядрам, доступным контейнеру. При DB_CONN_MAX_AGE > 0 каждый воркер держит
+# постоянное соединение с БД, поэтому число воркеров по умолчанию ограничено
+# GUNICORN_MAX_WORKERS; больше задается явно через GUNICORN_WORKERS.
+workers = env_int(
+    "GUNICORN_WORKERS", min(available_cpus() * 2 + 1, env_int("GUNICORN_MAX_WORKERS", 8))
+)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+threads = env_int("GUNICORN_THREADS", 1)
+
+# Keep-alive за nginx: соединение держится дольше, чем между запросами одного клиента
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+timeout = env_int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+
+# Перезапуск воркера после N запросов (с разбросом, чтобы воркеры не
+# перезапускались одновременно) ограничивает рост памяти
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+# Приложение загружается в мастере и делится с воркерами через copy-on-write
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+# Временные файлы воркеров в памяти: heartbeat не упирается в диск контейнера
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def when_ready(server):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    from django.conf import settings
+
+    if workers > 1 and "LocMemCache" in settings.CACHES["default"]["BACKEND"]:
+        server.log.warning(
+            "CACHE_URL is not set: each of %s workers has its own cache and misses "
+            "invalidations from the others", workers
+        )
+    if preload_app:
+        from app.common.warmup import preload
+
+        preload()
+
+
+def post_worker_init(worker):
+    from app.common.warmup import warm_up
+
+    warm_up()
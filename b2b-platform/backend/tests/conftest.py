@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def synchronous_action_log(settings):
+    """Журнал действий в тестах пишется сразу, без фонового потока"""
+    settings.ACTION_LOG_ASYNC = False
+
+
+@pytest.fixture(autouse=True)
+def synchronous_counters(settings):
+    """Буферизованные счетчики в тестах сбрасываются только явным flush()"""
+    settings.COUNTER_BUFFER_ASYNC = False
@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from app.ads.lifecycle import next_boundary, sync_action_flags
+from app.ads.models import Action
+from app.companies.models import Company
+from app.products.models import Product
+
+User = get_user_model()
+
+
+class ActionLifecycleTestCase(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        self.company = Company.objects.create(
+            owner=owner, name='Company', description='Description', city='Almaty', address='Address',
+        )
+        self.product = Product.objects.create(company=self.company, title='Product', description='Description', price=100)
+        self.manual = Product.objects.create(
+            company=self.company, title='Manual', description='Description', price=100, on_sale=True,
+        )
+        self.now = timezone.now()
+
+    def create_action(self, starts_in, ends_in):
+        action = Action.objects.create(
+            company=self.company, title='Sale', description='Description',
+            starts_at=self.now + timedelta(days=starts_in), ends_at=self.now + timedelta(days=ends_in),
+        )
+        action.products.add(self.product)
+        return action
+
+    def assertFlags(self, on_sale, has_actions):
+        self.product.refresh_from_db()
+        self.company.refresh_from_db()
+        self.assertEqual(self.product.on_sale, on_sale)
+        self.assertEqual(self.company.has_active_actions, has_actions)
+
+    def test_flags_follow_action_period(self):
+        """Flags turn on when an action starts and off when it ends"""
+        self.create_action(1, 3)
+        self.assertFlags(False, False)
+
+        # Планировщик просыпается к ближайшему началу или окончанию акции
+        self.assertEqual(next_boundary(self.now), self.now + timedelta(days=1))
+        self.assertEqual(next_boundary(self.now + timedelta(days=2)), self.now + timedelta(days=3))
+        self.assertIsNone(next_boundary(self.now + timedelta(days=4)))
+
+        sync_action_flags(now=self.now + timedelta(days=2))
+        self.assertFlags(True, True)
+
+        sync_action_flags(now=self.now + timedelta(days=4))
+        self.assertFlags(False, False)
+        # Флаг товара без акций задан вручную и не снимается
+        self.manual.refresh_from_db()
+        self.assertTrue(self.manual.on_sale)
+
+    def test_signals_update_flags(self):
+        """Adding, removing products and deactivating an action update flags immediately"""
+        action = self.create_action(-1, 1)
+        self.assertFlags(True, True)
+
+        action.products.remove(self.product)
+        self.assertFlags(False, True)
+
+        action.products.add(self.product)
+        action.is_active = False
+        action.save()
+        self.assertFlags(False, False)
+
+        action.is_active = True
+        action.save()
+        action.delete()
+        self.assertFlags(False, False)
+
+    def test_command_and_company_filter(self):
+        """The cron command fixes stale flags; has_actions filters on the flag"""
+        self.create_action(-1, 1)
+        Product.objects.filter(pk=self.product.pk).update(on_sale=False)
+        Company.objects.filter(pk=self.company.pk).update(has_active_actions=False, status='APPROVED')
+
+        call_command('sync_action_flags', stdout=open('/dev/null', 'w'))
+        self.assertFlags(True, True)
+
+        response = self.client.get('/api/companies/', {'has_actions': 'true'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.company.pk])
+
+
+class ActionProductsBulkTestCase(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        company = Company.objects.create(
+            owner=self.owner, name='Company', description='Description', city='Almaty', address='Address',
+        )
+        Product.objects.bulk_create([
+            Product(company=company, title=f'Product {index}', description='Description', price=100)
+            for index in range(50)
+        ])
+        now = timezone.now()
+        self.action = Action.objects.create(
+            company=company, title='Sale', description='Description',
+            starts_at=now - timedelta(days=1), ends_at=now + timedelta(days=1),
+        )
+        self.client.force_authenticate(user=self.owner)
+
+    def post(self, name, data):
+        return self.client.post(
+            f'/api/ads/actions/{self.action.pk}/{name}/', data, format='json'
+        )
+
+    def test_bulk_add_and_remove(self):
+        """Adding and removing products runs a constant number of queries and keeps on_sale in sync"""
+        ids = list(Product.objects.values_list('pk', flat=True))
+        with self.assertNumQueries(9):
+            response = self.post('add-products', {'product_ids': ids[:40]})
+        self.assertEqual(response.json()['total_products'], 40)
+        self.assertEqual(Product.objects.filter(on_sale=True).count(), 40)
+
+        response = self.post('add-products', {'all': True})
+        self.assertEqual(response.json()['message'], 'Добавлено 10 товаров в акцию')
+
+        response = self.post('remove-products', {'product_ids': ids[:30]})
+        self.assertEqual(response.json()['total_products'], 20)
+        self.assertEqual(Product.objects.filter(on_sale=True).count(), 20)
+
+        self.assertEqual(self.post('add-products', {'product_ids': ['x']}).status_code, 400)
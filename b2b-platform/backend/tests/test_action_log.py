@@ -0,0 +1,135 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.core.management import call_command
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from app.logs.buffer import ActionLogBuffer
+from app.logs.models import ActionLog
+
+User = get_user_model()
+
+
+class ActionLogBufferTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            username='user',
+            password='TestPass123!',
+        )
+
+    def make_entry(self, index=0):
+        return {
+            'user_id': self.user.id,
+            'action': f'POST /api/test/{index}/',
+            'entity_type': 'HTTP_REQUEST',
+            'payload': {},
+            'created_at': timezone.now(),
+        }
+
+    def test_flush_writes_entries_in_batches(self):
+        """Queued entries are written with one bulk INSERT per batch"""
+        buffer = ActionLogBuffer(flush_size=3)
+        with mock.patch.object(buffer, '_ensure_thread'):
+            for index in range(5):
+                buffer.add(**self.make_entry(index))
+
+        with self.assertNumQueries(2):
+            written = buffer.flush()
+
+        self.assertEqual(written, 5)
+        self.assertEqual(buffer.depth, 0)
+        self.assertEqual(ActionLog.objects.count(), 5)
+
+    def test_overflow_is_dropped_and_counted(self):
+        """A full queue drops new entries instead of blocking the request"""
+        buffer = ActionLogBuffer(max_size=2)
+        with mock.patch.object(buffer, '_ensure_thread'):
+            results = [buffer.add(**self.make_entry(index)) for index in range(4)]
+
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(buffer.dropped, 2)
+        self.assertEqual(buffer.depth, 2)
+
+    @override_settings(ACTION_LOG_ASYNC=True)
+    def test_middleware_enqueues_without_writing(self):
+        """Mutating requests are logged through the buffer, not in the response path"""
+        buffer = ActionLogBuffer()
+        self.client.force_authenticate(user=self.user)
+
+        with mock.patch('app.logs.buffer.get_action_log_buffer', return_value=buffer), \
+                mock.patch.object(buffer, '_ensure_thread'):
+            response = self.client.post('/api/auth/search-history/', {'query': 'cement'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ActionLog.objects.count(), 0)
+        self.assertEqual(buffer.depth, 1)
+
+        buffer.flush()
+        log = ActionLog.objects.get()
+        self.assertEqual(log.user, self.user)
+        self.assertEqual(log.action, 'POST /api/auth/search-history/')
+
+
+class ActionLogRetentionTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            username='user',
+            password='TestPass123!',
+        )
+
+    def test_archive_command_exports_and_prunes_old_months(self):
+        """Months past retention are written to gzip JSONL and removed from the table"""
+        now = timezone.now()
+        old = ActionLog.objects.create(
+            user=self.user, action='old', entity_type='HTTP_REQUEST',
+            created_at=now - timedelta(days=400),
+        )
+        ActionLog.objects.create(
+            user=self.user, action='recent', entity_type='HTTP_REQUEST', created_at=now,
+        )
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command(
+                'manage_action_logs', retention_months=12, archive_dir=archive_dir,
+                stdout=open(os.devnull, 'w'),
+            )
+            archive_name = f'actionlog-{old.created_at.astimezone(dt_timezone.utc):%Y-%m}.jsonl.gz'
+            self.assertEqual(os.listdir(archive_dir), [archive_name])
+            with gzip.open(os.path.join(archive_dir, archive_name), 'rt') as archive:
+                rows = [json.loads(line) for line in archive]
+
+        self.assertEqual([row['action'] for row in rows], ['old'])
+        self.assertEqual(list(ActionLog.objects.values_list('action', flat=True)), ['recent'])
+
+    def test_list_reports_retention_window(self):
+        """Without date_from the list is limited to the retention window and says so"""
+        admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='TestPass123!', role='ROLE_ADMIN',
+        )
+        now = timezone.now()
+        ActionLog.objects.create(
+            user=self.user, action='old', entity_type='HTTP_REQUEST', created_at=now - timedelta(days=400),
+        )
+        ActionLog.objects.create(user=self.user, action='recent', entity_type='HTTP_REQUEST', created_at=now)
+        self.client.force_authenticate(user=admin)
+
+        response = self.client.get('/api/logs/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['action'] for row in response.data['results']], ['recent'])
+        self.assertLess(response.data['retention_start'], now)
+
+        date_from = (now - timedelta(days=500)).isoformat()
+        response = self.client.get('/api/logs/', {'date_from': date_from})
+        self.assertEqual([row['action'] for row in response.data['results']], ['recent', 'old'])
+        self.assertNotIn('retention_start', response.data)
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from app.ads.models import Ad
+from app.ads.schedule import schedule
+
+
+class AdScheduleTestCase(TestCase):
+    def create_ad(self, title, position='BANNER', **kwargs):
+        return Ad.objects.create(title=title, image='ad_images/ad.gif', url='https://example.com', position=position, **kwargs)
+
+    def titles(self, response):
+        return [ad['title'] for ad in response.json()['results']]
+
+    def test_current_banners_without_queries(self):
+        """Banners are served from the in-memory schedule and follow saves and schedule boundaries"""
+        now = timezone.now()
+        self.create_ad('Current', starts_at=now - timedelta(days=1), ends_at=now + timedelta(days=1))
+        self.create_ad('Open ended', starts_at=now - timedelta(days=1))
+        self.create_ad('Sidebar', position='SIDEBAR_LEFT', starts_at=now - timedelta(days=1))
+        self.create_ad('Future', starts_at=now + timedelta(days=1))
+        self.create_ad('Finished', starts_at=now - timedelta(days=2), ends_at=now - timedelta(days=1))
+        self.create_ad('Inactive', starts_at=now - timedelta(days=1), is_active=False)
+
+        self.client.get('/api/ads/serve/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/ads/serve/?position=BANNER')
+        self.assertEqual(self.titles(response), ['Open ended', 'Current'])
+        self.assertEqual(len(self.client.get('/api/ads/serve/').json()['results']), 3)
+
+        # Наступление starts_at и ends_at без перечитывания БД
+        later = [ad.title for ad in schedule.current('BANNER', now=now + timedelta(days=1, hours=1))]
+        self.assertEqual(later, ['Future', 'Open ended'])
+
+        Ad.objects.get(title='Open ended').delete()
+        self.assertEqual(self.titles(self.client.get('/api/ads/serve/?position=BANNER')), ['Current'])
+        self.assertEqual(self.client.get('/api/ads/serve/?position=UNKNOWN').status_code, 400)
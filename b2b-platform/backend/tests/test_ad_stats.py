@@ -0,0 +1,58 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework.throttling import ScopedRateThrottle
+
+from app.ads.models import Ad, AdDailyStats
+from app.ads.stats import get_stats_buffer
+
+User = get_user_model()
+
+
+class AdStatsTestCase(APITestCase):
+    def setUp(self):
+        # Остаток счетчиков других тестов отбрасывается: их баннеров уже нет
+        get_stats_buffer().flush()
+        now = timezone.now()
+        self.ad = Ad.objects.create(
+            title='Banner', image='ad_images/ad.gif', url='https://example.com', position='BANNER',
+            starts_at=now - timedelta(days=1),
+        )
+        self.admin = User.objects.create_user(
+            email='admin@example.com', username='admin', password='TestPass123!', role='ROLE_ADMIN'
+        )
+
+    def test_counters_are_buffered_and_rolled_up(self):
+        """Impressions and clicks are written by the buffer flush, not by the request"""
+        self.client.get('/api/ads/serve/?position=BANNER')
+        with self.assertNumQueries(0):
+            for _ in range(2):
+                self.client.get('/api/ads/serve/?position=BANNER')
+            self.client.post(f'/api/ads/{self.ad.pk}/click/')
+        self.assertFalse(AdDailyStats.objects.exists())
+
+        get_stats_buffer().flush()
+        self.client.post(f'/api/ads/{self.ad.pk}/click/')
+        get_stats_buffer().flush()
+        stats = AdDailyStats.objects.get(ad=self.ad, date=timezone.localdate())
+        self.assertEqual((stats.impressions, stats.clicks), (3, 2))
+
+        self.assertEqual(self.client.get('/api/ads/stats/').status_code, 401)
+        self.client.force_authenticate(user=self.admin)
+        report = self.client.get('/api/ads/stats/').json()
+        self.assertEqual(report['results'][0]['impressions'], 3)
+        self.assertEqual(report['results'][0]['ctr'], 66.67)
+        self.assertEqual(self.client.get('/api/ads/stats/?date_from=bad').status_code, 400)
+
+    def test_clicks_limited_to_current_banners(self):
+        """Clicks on unknown banners are rejected; all clicks count toward the rate limit"""
+        cache.clear()
+        with mock.patch.object(ScopedRateThrottle, 'THROTTLE_RATES', {'ad_click': '3/minute'}):
+            self.assertEqual(self.client.post('/api/ads/999999/click/').status_code, 404)
+            statuses = [self.client.post(f'/api/ads/{self.ad.pk}/click/').status_code for _ in range(3)]
+        self.assertEqual(statuses, [204, 204, 429])
+        self.assertEqual(get_stats_buffer().pending, 1)
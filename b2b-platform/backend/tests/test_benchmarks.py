@@ -0,0 +1,280 @@
+"""
+Бенчмарк API: количество запросов к БД, задержка и размер ответа.
+
+Набор данных строится командой seed_demo и дополняется до масштаба
+BENCHMARK_SCALE (по умолчанию 1: ~20 компаний, ~100 товаров). Тест
+падает, если превышен бюджет эндпоинта из BUDGETS по числу запросов или
+размеру ответа. Для списков количество запросов сравнивается на двух
+размерах страницы: прирост на строку показывает N+1 в сериализаторе.
+
+Задержка зависит от машины, поэтому проверка p95 включается явно:
+BENCHMARK_LATENCY=1, каждый эндпоинт вызывается BENCHMARK_ITERATIONS раз.
+
+Сводка печатается в stdout (pytest -s) и, если задан BENCHMARK_REPORT,
+сохраняется в JSON.
+"""
+import json
+import os
+import random
+import statistics
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APITestCase
+
+from app.ads.models import Action
+from app.categories.models import Category
+from app.companies.models import Company
+from app.logs.models import ActionLog
+from app.products.models import Product
+from app.reviews.models import Review
+from app.tenders.models import Tender
+from app.users.models import Favorite
+
+User = get_user_model()
+
+SCALE = int(os.environ.get("BENCHMARK_SCALE", 1))
+ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", 5))
+LATENCY_ENABLED = os.environ.get("BENCHMARK_LATENCY", "") not in ("", "0")
+# Множитель бюджета задержки для медленных машин CI
+LATENCY_FACTOR = float(os.environ.get("BENCHMARK_LATENCY_FACTOR", 1))
+REPORT_PATH = os.environ.get("BENCHMARK_REPORT")
+
+# Бюджеты эндпоинтов: запросы к БД, p95 задержки (мс), размер ответа (байт).
+# Для списков per_row - допустимое число дополнительных запросов на строку
+# страницы.
+#
+# Бюджеты queries/per_row эндпоинтов из REGRESSION_CEILINGS - не целевые
+# значения, а измеренное текущее состояние с N+1 во вложенных
+# сериализаторах (компания, категории, товары и отзывы на каждую строку).
+# Они ловят только ухудшение; после исправления N+1 эндпоинт убирается из
+# REGRESSION_CEILINGS, а бюджет снижается до нового значения.
+REGRESSION_CEILINGS = {
+    "company-list", "company-tenders", "product-list", "tender-list",
+    "review-list", "action-list", "favorite-list",
+}
+BUDGETS = {
+    "company-list": {"queries": 159, "per_row": 8.1, "p95_ms": 400, "bytes": 48000},
+    "company-detail": {"queries": 10, "p95_ms": 100, "bytes": 2000},
+    "company-tenders": {"queries": 144, "p95_ms": 300, "bytes": 35000},
+    "product-list": {"queries": 44, "per_row": 2, "p95_ms": 300, "bytes": 24000},
+    "product-detail": {"queries": 4, "p95_ms": 100, "bytes": 1200},
+    "product-filter-options": {"queries": 6, "p95_ms": 100, "bytes": 2500},
+    "category-list": {"queries": 22, "p95_ms": 100, "bytes": 6000},
+    "category-tree": {"queries": 11, "p95_ms": 100, "bytes": 1500},
+    "tender-list": {"queries": 142, "per_row": 7, "p95_ms": 300, "bytes": 35000},
+    "tender-detail": {"queries": 9, "p95_ms": 100, "bytes": 2000},
+    "review-list": {"queries": 42, "per_row": 2, "p95_ms": 150, "bytes": 9000},
+    "ad-list": {"queries": 2, "p95_ms": 100, "bytes": 600},
+    "action-list": {"queries": 62, "per_row": 3, "p95_ms": 200, "bytes": 10000},
+    "favorite-list": {"queries": 22, "per_row": 1, "p95_ms": 100, "bytes": 3500},
+    "actionlog-list": {"queries": 2, "per_row": 0, "p95_ms": 100, "bytes": 6500},
+}
+
+
+def seed_benchmark_data(scale=1, seed=42):
+    """Демо-данные seed_demo, дополненные пакетными вставками до нужного масштаба"""
+    rng = random.Random(seed)
+    random.seed(seed)
+    with open(os.devnull, "w") as devnull:
+        call_command("seed_demo", stdout=devnull)
+
+    supplier = User.objects.get(email="supplier@example.com")
+    seeker = User.objects.get(email="seeker@example.com")
+    categories = list(Category.objects.all())
+    cities = ["Алматы", "Астана", "Шымкент", "Караганда", "Актобе"]
+    now = timezone.now()
+
+    authors = User.objects.bulk_create([
+        User(email=f"reviewer{index}@example.com", username=f"reviewer{index}", role="ROLE_SEEKER")
+        for index in range(5)
+    ])
+
+    companies = Company.objects.bulk_create([
+        Company(
+            owner=supplier,
+            name=f"Компания {index}",
+            description="Поставщик строительных материалов",
+            city=rng.choice(cities),
+            address=f"ул. Абая, {index}",
+            status="APPROVED",
+            rating=round(rng.uniform(3, 5), 1),
+        )
+        for index in range(20 * scale)
+    ])
+    for company in companies:
+        company.categories.set(rng.sample(categories, k=2))
+
+    Product.objects.bulk_create([
+        Product(
+            company=company,
+            title=f"Товар {company.pk}-{index}",
+            description="Описание товара",
+            price=rng.randint(100, 100000),
+            currency=rng.choice(["KZT", "RUB", "USD"]),
+            category=rng.choice(categories),
+            rating=round(rng.uniform(4, 5), 2),
+            on_sale=index == 0,
+        )
+        for company in companies
+        for index in range(5)
+    ])
+    Review.objects.bulk_create([
+        Review(company=company, author=author, rating=rng.randint(1, 5), text="Отзыв", status="APPROVED")
+        for company in companies
+        for author in authors[:3]
+    ])
+    tenders = Tender.objects.bulk_create([
+        Tender(
+            author=supplier,
+            company=companies[index % len(companies)],
+            title=f"Тендер {index}",
+            description="Описание тендера",
+            city=rng.choice(cities),
+            status="APPROVED",
+            deadline_date=now.date() + timedelta(days=30),
+        )
+        for index in range(20 * scale)
+    ])
+    for tender in tenders:
+        tender.categories.set(rng.sample(categories, k=2))
+
+    actions = Action.objects.bulk_create([
+        Action(
+            company=company,
+            title=f"Акция {company.pk}",
+            description="Скидка",
+            starts_at=now - timedelta(days=1),
+            ends_at=now + timedelta(days=10),
+        )
+        for company in companies
+    ])
+    for action in actions:
+        action.products.set(action.company.products.all()[:2])
+
+    Favorite.objects.bulk_create([Favorite(user=seeker, company=company) for company in companies])
+    ActionLog.objects.bulk_create([
+        ActionLog(user=seeker, action=f"GET /api/test/{index}/", entity_type="HTTP_REQUEST")
+        for index in range(50 * scale)
+    ])
+
+
+class APIBenchmarkTestCase(APITestCase):
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_benchmark_data(SCALE)
+        cls.admin = User.objects.get(email="admin@example.com")
+        cls.seeker = User.objects.get(email="seeker@example.com")
+        cls.company = Company.objects.filter(status="APPROVED", products__isnull=False).first()
+        cls.product = cls.company.products.first()
+        cls.tender = Tender.objects.filter(status="APPROVED").first()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.results:
+            return
+        print("\nendpoint                 queries   p50 ms   p95 ms    bytes")
+        for name, result in sorted(cls.results.items()):
+            latency = "".join(
+                f"{result[key]:>9.1f}" if key in result else f"{'-':>9}" for key in ("p50_ms", "p95_ms")
+            )
+            ceiling = "  (ceiling)" if name in REGRESSION_CEILINGS else ""
+            print(f"{name:<24} {result['queries']:>7}{latency} {result['bytes']:>8}{ceiling}")
+        if REPORT_PATH:
+            with open(REPORT_PATH, "w") as report:
+                json.dump({"scale": SCALE, "iterations": ITERATIONS, "results": cls.results}, report, indent=2)
+
+    def get_endpoints(self):
+        """Имя эндпоинта -> (URL, пользователь)"""
+        return {
+            "company-list": ("/api/companies/", None),
+            "company-detail": (f"/api/companies/{self.company.pk}/", None),
+            "company-tenders": (f"/api/companies/{self.company.pk}/tenders/", None),
+            "product-list": ("/api/products/", None),
+            "product-detail": (f"/api/products/{self.product.pk}/", None),
+            "product-filter-options": ("/api/products/filter-options/", None),
+            "category-list": ("/api/categories/", None),
+            "category-tree": ("/api/categories/tree/", None),
+            "tender-list": ("/api/tenders/", None),
+            "tender-detail": (f"/api/tenders/{self.tender.pk}/", None),
+            "review-list": ("/api/reviews/", None),
+            "ad-list": ("/api/ads/", None),
+            "action-list": ("/api/ads/actions/", None),
+            "favorite-list": ("/api/favorites/", self.seeker),
+            "actionlog-list": ("/api/logs/", self.admin),
+        }
+
+    def measure(self, url, user):
+        """Один вызов: (число запросов, задержка в мс, размер ответа)"""
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, 200, f"{url}: {response.status_code}")
+        return len(queries), elapsed, len(response.content)
+
+    def test_endpoint_budgets(self):
+        """Every list/detail endpoint stays within its query and size budget"""
+        failures = []
+        for name, (url, user) in self.get_endpoints().items():
+            budget = BUDGETS[name]
+            queries, _, size = self.measure(url, user)
+            self.results.setdefault(name, {}).update(queries=queries, bytes=size)
+
+            if queries > budget["queries"]:
+                failures.append(f"{name}: {queries} queries > {budget['queries']}")
+            if size > budget["bytes"]:
+                failures.append(f"{name}: {size} bytes > {budget['bytes']}")
+
+        self.assertEqual(failures, [])
+
+    @skipUnless(LATENCY_ENABLED, "Latency budgets are checked with BENCHMARK_LATENCY=1")
+    def test_endpoint_latency(self):
+        """Every list/detail endpoint stays within its p95 latency budget"""
+        failures = []
+        for name, (url, user) in self.get_endpoints().items():
+            budget = BUDGETS[name]
+            # Первый вызов прогревает кеши и не учитывается в задержке
+            queries, _, size = self.measure(url, user)
+            latencies = sorted(self.measure(url, user)[1] for _ in range(ITERATIONS))
+            p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+            self.results.setdefault(name, {}).update(
+                queries=queries,
+                bytes=size,
+                p50_ms=round(statistics.median(latencies), 2),
+                p95_ms=round(p95, 2),
+            )
+
+            if p95 > budget["p95_ms"] * LATENCY_FACTOR:
+                failures.append(f"{name}: p95 {p95:.1f} ms > {budget['p95_ms'] * LATENCY_FACTOR:.0f} ms")
+
+        self.assertEqual(failures, [])
+
+    def test_list_queries_per_row(self):
+        """List endpoints do not add more queries per row than their budget allows"""
+        failures = []
+        # Списки с PageNumberPagination по умолчанию не принимают page_size;
+        # он включается только в тесте, пагинация эндпоинтов не меняется
+        with mock.patch.object(PageNumberPagination, "page_size_query_param", "page_size"):
+            for name, (url, user) in self.get_endpoints().items():
+                budget = BUDGETS[name]
+                if "per_row" not in budget:
+                    continue
+                small, _, _ = self.measure(f"{url}?page_size=2", user)
+                full, _, _ = self.measure(f"{url}?page_size=20", user)
+                per_row = (full - small) / 18
+                if per_row > budget["per_row"]:
+                    failures.append(f"{name}: {per_row:.1f} queries per row > {budget['per_row']}")
+
+        self.assertEqual(failures, [])
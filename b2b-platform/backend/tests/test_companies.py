@@ -1,9 +1,15 @@
+import importlib
+
 import pytest
+from django.apps import apps as global_apps
 from django.test import TestCase
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from app.companies.models import Company
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from app.companies import map_grid
+from app.companies.models import Branch, Company, MapCell
 from app.categories.models import Category
 
 User = get_user_model()
@@ -108,4 +114,143 @@ class CompanyTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         company.refresh_from_db()
-        self.assertEqual(company.name, 'Updated Name')
\ No newline at end of file
+        self.assertEqual(company.name, 'Updated Name')
+
+class CompanyNearSearchTestCase(APITestCase):
+    def setUp(self):
+        owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+
+        def create(name, latitude=None, longitude=None):
+            return Company.objects.create(
+                owner=owner, name=name, description='Description', city='Almaty',
+                address='Address', status='APPROVED', latitude=latitude, longitude=longitude,
+            )
+
+        self.center = create('Center', 43.2389, 76.8897)
+        self.suburb = create('Suburb', 43.30, 76.95)
+        self.astana = create('Astana', 51.1605, 71.4704)
+        self.branch_only = create('Branch only')
+        Branch.objects.create(company=self.branch_only, address='Branch', latitude=43.25, longitude=76.90)
+
+    def test_near_filters_and_orders_by_distance(self):
+        """?near= returns companies within the radius, nearest first, with distance_km"""
+        response = self.client.get('/api/companies/', {'near': '43.2389,76.8897', 'radius_km': 20})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [item['name'] for item in response.data['results']]
+        self.assertEqual(names, ['Center', 'Suburb'])
+        self.assertEqual(response.data['results'][0]['distance_km'], 0)
+        self.assertAlmostEqual(response.data['results'][1]['distance_km'], 8.4, delta=0.5)
+
+        response = self.client.get('/api/companies/', {'near': '43.2389,76.8897', 'radius_km': 20, 'ordering': '-distance'})
+        self.assertEqual([item['name'] for item in response.data['results']], ['Suburb', 'Center'])
+
+    def test_near_includes_branches(self):
+        """include_branches matches companies by their nearest branch"""
+        response = self.client.get(
+            '/api/companies/', {'near': '43.2389,76.8897', 'radius_km': 5, 'include_branches': 'true'}
+        )
+        names = [item['name'] for item in response.data['results']]
+        self.assertEqual(names, ['Center', 'Branch only'])
+
+    def test_near_cursor_pagination(self):
+        """Distance ordering works with cursor pagination"""
+        params = {'near': '43.2389,76.8897', 'radius_km': 500, 'page_size': 1, 'cursor': ''}
+        names = []
+        url = '/api/companies/'
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [item['name'] for item in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(names, ['Center', 'Suburb'])
+
+    def test_invalid_near(self):
+        """Malformed coordinates and radius are rejected"""
+        self.assertEqual(self.client.get('/api/companies/', {'near': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/companies/', {'near': '43,76', 'radius_km': 10000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Без ?near= сортировка по расстоянию игнорируется
+        self.assertEqual(self.client.get('/api/companies/', {'ordering': 'distance'}).status_code, status.HTTP_200_OK)
+
+
+class CompanyMapTestCase(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        self.first = self.create('First', 43.2389, 76.8897)
+        self.second = self.create('Second', 43.25, 76.90)
+        self.astana = self.create('Astana', 51.1605, 71.4704)
+        Branch.objects.create(company=self.astana, address='Branch', latitude=43.24, longitude=76.89)
+
+    def create(self, name, latitude, longitude, status='APPROVED'):
+        return Company.objects.create(
+            owner=self.owner, name=name, description='Description', city='Almaty',
+            address='Address', status=status, latitude=latitude, longitude=longitude,
+        )
+
+    def get_points(self, **params):
+        response = self.client.get('/api/companies/map/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(response.data['points'], key=lambda point: -point[2])
+
+    def cell_state(self):
+        return sorted(MapCell.objects.values_list('zoom', 'x', 'y', 'count'))
+
+    def test_clusters_by_zoom_and_bbox(self):
+        """Low zoom returns clusters; bbox limits cells; high zoom returns individual points"""
+        points = self.get_points(zoom=5)
+        self.assertEqual([point[2] for point in points], [3, 1])
+        self.assertIsNone(points[0][3])
+
+        points = self.get_points(zoom=5, bbox='70,50,73,52')
+        self.assertEqual([point[2] for point in points], [1])
+
+        points = self.get_points(zoom=16, bbox='76.8,43.2,77,43.3')
+        self.assertEqual(
+            sorted(point[3] for point in points), sorted([self.first.pk, self.second.pk, self.astana.pk])
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        """Signals keep the grid equal to a full rebuild on move, status change and delete"""
+        self.first.latitude, self.first.longitude = 51.17, 71.45
+        self.first.save()
+        self.astana.status = 'PENDING'
+        self.astana.save()
+        Branch.objects.create(company=self.second, address='Branch', latitude=42.3, longitude=69.6)
+        self.second.delete()
+        incremental = self.cell_state()
+
+        map_grid.rebuild()
+        self.assertEqual(incremental, self.cell_state())
+        self.assertEqual([point[2] for point in self.get_points(zoom=0)], [1])
+
+    def test_migration_fills_grid_for_existing_companies(self):
+        """The data migration builds the grid for companies saved before MapCell existed"""
+        expected = self.cell_state()
+        MapCell.objects.all().delete()
+
+        migration = importlib.import_module('app.companies.migrations.0011_fill_mapcell')
+        migration.fill_map_grid(global_apps, None)
+        self.assertEqual(self.cell_state(), expected)
+
+    def test_only_emptied_cells_are_deleted(self):
+        """Moving a company deletes only the cells it left, not every empty cell"""
+        MapCell.objects.create(zoom=0, x=9, y=9, count=0, lat_sum=0, lng_sum=0)
+        with CaptureQueriesContext(connection) as queries:
+            self.first.name = 'Renamed'
+            self.first.save()
+        self.assertFalse([query for query in queries if query['sql'].startswith('DELETE')])
+
+        self.first.latitude, self.first.longitude = 51.17, 71.45
+        self.first.save()
+        self.assertTrue(MapCell.objects.filter(zoom=0, x=9, y=9).exists())
+        self.assertFalse(MapCell.objects.exclude(x=9).filter(count__lte=0).exists())
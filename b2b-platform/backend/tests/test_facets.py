@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from app.ads.lifecycle import sync_action_flags
+from app.ads.models import Action
+from app.categories.models import Category
+from app.companies.models import Company
+from app.products.models import Product
+
+User = get_user_model()
+
+
+class FilterOptionsFacetsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        self.tools = Category.objects.create(name='Tools')
+        self.paint = Category.objects.create(name='Paint')
+        almaty = Company.objects.create(
+            owner=owner, name='Almaty', description='Description', city='Almaty',
+            address='Address', status='APPROVED', supplier_type='DEALER',
+        )
+        astana = Company.objects.create(
+            owner=owner, name='Astana', description='Description', city='Astana',
+            address='Address', status='APPROVED', supplier_type='MANUFACTURER',
+        )
+        for company, category, currency in [
+            (almaty, self.tools, 'KZT'),
+            (almaty, self.tools, 'USD'),
+            (almaty, self.paint, 'KZT'),
+            (astana, self.tools, 'KZT'),
+        ]:
+            Product.objects.create(
+                company=company, title='Product', description='Description', price=100,
+                currency=currency, category=category, on_sale=True,
+            )
+
+    def get_facets(self, **params):
+        response = self.client.get('/api/products/filter-options/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counts_respect_other_filters(self):
+        """Each facet is counted with all applied filters except its own"""
+        data = self.get_facets(city='Almaty')
+        facets = data['facets']
+        self.assertEqual([(item['value'], item['count']) for item in facets['city']], [('Almaty', 3), ('Astana', 1)])
+        self.assertEqual([(item['slug'], item['count']) for item in facets['category']], [('tools', 2), ('paint', 1)])
+        self.assertEqual([(item['value'], item['count']) for item in facets['currency']], [('KZT', 2), ('USD', 1)])
+        self.assertEqual([(item['value'], item['count']) for item in facets['supplier_type']], [('DEALER', 3)])
+        self.assertEqual(data['cities'], ['Almaty', 'Astana'])
+
+    def test_cached_until_products_change(self):
+        """Repeated calls are served from cache; saving a product invalidates it"""
+        self.get_facets()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_facets()
+        self.assertEqual(len(queries), 0)
+
+        product = Product.objects.filter(currency='USD').first()
+        product.currency = 'RUB'
+        product.save()
+        currencies = {item['value'] for item in self.get_facets()['facets']['currency']}
+        self.assertEqual(currencies, {'KZT', 'RUB'})
+
+    def test_action_flags_invalidate_company_facets(self):
+        """Flips of has_active_actions by the action sync reset cached company facets"""
+        self.assertEqual(
+            self.client.get('/api/companies/filter-options/', {'has_actions': 'true'}).data['facets']['city'], []
+        )
+
+        now = timezone.now()
+        action = Action.objects.create(
+            company=Company.objects.get(name='Almaty'), title='Sale', description='Description',
+            starts_at=now + timedelta(hours=1), ends_at=now + timedelta(days=1),
+        )
+        self.client.get('/api/companies/filter-options/', {'has_actions': 'true'})
+        sync_action_flags(now=now + timedelta(hours=2), company_ids=[action.company_id])
+        cities = self.client.get('/api/companies/filter-options/', {'has_actions': 'true'}).data['facets']['city']
+        self.assertEqual([item['value'] for item in cities], ['Almaty'])
+
+    def test_company_filter_options(self):
+        """Company facets are counted over approved companies with CompanyFilter params"""
+        response = self.client.get('/api/companies/filter-options/', {'supplier_type': 'DEALER'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        facets = response.data['facets']
+        self.assertEqual([(item['value'], item['count']) for item in facets['city']], [('Almaty', 1)])
+        self.assertEqual(
+            [(item['value'], item['count']) for item in facets['supplier_type']],
+            [('DEALER', 1), ('MANUFACTURER', 1)],
+        )
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from app.companies.models import Company
+from app.users.models import Favorite
+
+User = get_user_model()
+
+
+class FavoriteIdsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='seeker@example.com', username='seeker', password='TestPass123!'
+        )
+        owner = User.objects.create_user(
+            email='owner@example.com', username='owner', password='TestPass123!', role='ROLE_SUPPLIER'
+        )
+        self.companies = [
+            Company.objects.create(
+                owner=owner, name=f'Company {index}', description='Description', city='Almaty',
+                address='Address', status='APPROVED',
+            )
+            for index in range(5)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def test_toggle_updates_ids_and_markers(self):
+        """Favorite ids are cached per user and follow toggles; list markers do not query Favorite"""
+        first, second = self.companies[:2]
+        self.assertEqual(self.client.post(f'/api/favorites/{first.pk}/').status_code, 201)
+        self.assertEqual(self.client.post(f'/api/favorites/{second.pk}/').status_code, 201)
+        self.assertEqual(self.client.get('/api/favorites/ids/').json(), {'company_ids': [first.pk, second.pk]})
+
+        self.assertEqual(self.client.post(f'/api/favorites/{first.pk}/').status_code, 200)
+        self.assertFalse(Favorite.objects.filter(user=self.user, company=first).exists())
+        self.assertEqual(self.client.get('/api/favorites/ids/').json(), {'company_ids': [second.pk]})
+        self.assertEqual(self.client.post('/api/favorites/999999/').status_code, 404)
+
+        markers = {item['id']: item['is_favorite'] for item in self.client.get('/api/companies/').json()['results']}
+        self.assertEqual(markers[second.pk], True)
+        self.assertEqual(sum(markers.values()), 1)
+        self.assertIs(self.client.get(f'/api/companies/{second.pk}/').json()['is_favorite'], True)
+
+    def test_toggle_ignores_stale_cache(self):
+        """Add/remove is decided by the Favorite table even if another worker's cache is stale"""
+        company = self.companies[0]
+        Favorite.objects.create(user=self.user, company=company)
+        cache.set(f'favorites:{self.user.pk}:companies', frozenset())
+
+        self.assertEqual(self.client.post(f'/api/favorites/{company.pk}/').status_code, 200)
+        self.assertFalse(Favorite.objects.filter(user=self.user, company=company).exists())
+        self.assertEqual(self.client.get('/api/favorites/ids/').json(), {'company_ids': []})
+
+    def test_list_markers_load_ids_once(self):
+        """is_favorite on list pages loads the id set once and then reads it from cache"""
+        Favorite.objects.create(user=self.user, company=self.companies[0])
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/companies/?page_size=1')
+        with CaptureQueriesContext(connection) as full:
+            self.client.get('/api/companies/?page_size=5')
+        favorite_queries = [
+            query['sql'] for query in small.captured_queries + full.captured_queries if 'users_favorite' in query['sql']
+        ]
+        self.assertEqual(len(favorite_queries), 1)
@@ -0,0 +1,41 @@
+import os
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+
+from app.companies.models import Company
+from app.products.models import Product
+from app.reviews.models import Review
+from app.tenders.models import Tender
+
+
+class GenerateDatasetTestCase(TestCase):
+    def generate(self, **options):
+        with open(os.devnull, 'w') as devnull:
+            call_command('generate_dataset', companies=30, products=200, tenders=10,
+                         chunk_size=64, stdout=devnull, **options)
+
+    def snapshot(self):
+        return list(Product.objects.order_by('id').values_list('title', 'price', 'currency', 'rating'))
+
+    def test_generates_requested_volume_deterministically(self):
+        """The same seed produces the same rows, regardless of previous runs"""
+        self.generate(seed=7)
+        self.assertEqual(Company.objects.count(), 30)
+        self.assertEqual(Product.objects.count(), 200)
+        self.assertEqual(Tender.objects.count(), 10)
+        self.assertTrue(Review.objects.exists())
+        first = self.snapshot()
+
+        self.generate(seed=7, clear=True)
+        self.assertEqual(Company.objects.count(), 30)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_keeps_caller_connection_and_transaction(self):
+        """In-process generation leaves the caller's connection and transaction usable"""
+        with transaction.atomic(), mock.patch.object(connection, 'close') as close:
+            self.generate(seed=8)
+            self.assertEqual(Company.objects.count(), 30)
+        close.assert_not_called()
@@ -0,0 +1,113 @@
+import json
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from app.companies.models import Company
+from app.products.models import Product
+from app.reviews.models import Review
+from app.tenders.models import Tender
+
+User = get_user_model()
+
+CITIES = [f"Город {index}" for index in range(49)] + ["Алматы"]
+
+
+def plan_index_names(queryset):
+    """Имена индексов, которые PostgreSQL использует в плане запроса"""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    names = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            names.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return names
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Index scans are checked on PostgreSQL only")
+class HotQueryIndexTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Таблицы такого размера, чтобы полный просмотр с сортировкой был дороже
+        индекса: планы проверяются с настройками планировщика по умолчанию
+        """
+        owner = User.objects.create_user(email="owner@example.com", username="owner", password="TestPass123!")
+        authors = User.objects.bulk_create([
+            User(email=f"author{index}@example.com", username=f"author{index}") for index in range(20)
+        ])
+        companies = Company.objects.bulk_create([
+            Company(
+                owner=owner, name=f"Company {index}", description="Description", address="Address",
+                city=CITIES[index % len(CITIES)], status="APPROVED" if index % 2 else "PENDING",
+                rating=index % 50 / 10, latitude=40 + index % 150 / 10, longitude=50 + index % 370 / 10,
+            )
+            for index in range(3000)
+        ])
+        cls.company = companies[0]
+        Product.objects.bulk_create([
+            Product(
+                company=companies[index % len(companies)], title=f"Product {index}", description="Desc",
+                is_active=index % 20 != 0, rating=index % 50 / 10,
+            )
+            for index in range(20000)
+        ])
+        Tender.objects.bulk_create([
+            Tender(
+                author=owner, title=f"Tender {index}", description="Desc", city="Алматы",
+                status="APPROVED" if index % 2 else "PENDING",
+            )
+            for index in range(5000)
+        ])
+        Review.objects.bulk_create([
+            Review(
+                company=company, author=author, rating=3, text="Review",
+                status=Review.STATUS_APPROVED if company.pk % 2 else Review.STATUS_PENDING,
+            )
+            for company in companies[:250]
+            for author in authors
+        ])
+        with connection.cursor() as cursor:
+            for model in (Company, Product, Tender, Review):
+                cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, plan_index_names(queryset))
+
+    def test_product_catalog(self):
+        queryset = Product.objects.filter(is_active=True).order_by("-rating", "-created_at", "-id")[:20]
+        self.assertUsesIndex(queryset, "product_active_rating_idx")
+
+    def test_company_products(self):
+        queryset = Product.objects.filter(company_id=self.company.pk, is_active=True).order_by("-created_at")[:20]
+        self.assertUsesIndex(queryset, "product_company_active_idx")
+
+    def test_company_list(self):
+        queryset = Company.objects.approved().order_by("-rating", "name", "id")[:20]
+        self.assertUsesIndex(queryset, "company_approved_rating_idx")
+
+    def test_company_city_filter(self):
+        queryset = Company.objects.filter(city__iexact="Алматы")
+        self.assertUsesIndex(queryset, "company_city_upper_idx")
+
+    def test_company_near(self):
+        queryset = Company.objects.near(43.2389, 76.8897, 25)
+        self.assertUsesIndex(queryset, "company_location_idx")
+
+    def test_tender_list(self):
+        queryset = Tender.objects.filter(status="APPROVED").order_by("-created_at", "-id")[:20]
+        self.assertUsesIndex(queryset, "tender_approved_created_idx")
+
+    def test_review_list(self):
+        queryset = Review.objects.filter(status=Review.STATUS_APPROVED).order_by("-created_at")[:20]
+        self.assertUsesIndex(queryset, "review_approved_created_idx")
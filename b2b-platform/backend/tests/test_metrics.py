@@ -0,0 +1,60 @@
+import os
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from app.common.metrics import http_requests_total
+from app.common.services import CurrencyConverter
+from app.companies.models import Company
+
+User = get_user_model()
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='secret')
+class MetricsEndpointTestCase(APITestCase):
+    def setUp(self):
+        owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        Company.objects.create(
+            owner=owner, name='Company', description='Description',
+            city='Almaty', address='Address',
+        )
+
+    def test_request_metrics_exposed(self):
+        """Requests are counted per URL name and exposed in Prometheus text format"""
+        before = http_requests_total.value(view='company-list-create', method='GET', status=200)
+        response = self.client.get('/api/companies/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(http_requests_total.value(view='company-list-create', method='GET', status=200), before + 1)
+
+        with mock.patch.object(CurrencyConverter, '_fetch_rates', return_value={'USD': 1.0}):
+            CurrencyConverter.get_exchange_rates()
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        pid = f'pid="{os.getpid()}"'
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn(f'http_requests_total{{view="company-list-create",method="GET",status="200",{pid}}}', body)
+        self.assertIn(f'http_request_db_queries_bucket{{view="company-list-create",{pid},le="+Inf"}}', body)
+        self.assertIn('cache_requests_total{cache="currency_rates"', body)
+        self.assertIn(f'action_log_buffer_depth{{{pid}}} ', body)
+
+    def test_token_required(self):
+        """/metrics requires a matching bearer token and is not served without a token or when disabled"""
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+        with override_settings(METRICS_ENABLED=False):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
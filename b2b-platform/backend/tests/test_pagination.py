@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from app.companies.models import Company
+
+User = get_user_model()
+
+
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='supplier@example.com',
+            username='supplier',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        # Одинаковый рейтинг у нескольких компаний проверяет порядок по id
+        ratings = [5.0, 4.0, 4.0, 4.0, 4.0, 3.0, 3.0]
+        for index, rating in enumerate(ratings):
+            Company.objects.create(
+                owner=self.owner,
+                name='Company',
+                description='Description',
+                city='Almaty',
+                address='Address',
+                rating=rating,
+            )
+        self.expected = list(
+            Company.objects.order_by('-rating', 'name', 'id').values_list('id', flat=True)
+        )
+
+    def get_ids(self, response):
+        return [item['id'] for item in response.data['results']]
+
+    def test_cursor_walks_all_rows_in_order(self):
+        """Cursor pages follow the default ordering without gaps or duplicates"""
+        ids = []
+        url = '/api/companies/?cursor=&page_size=2'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNone(response.data['count'])
+            pages.append(response.data)
+            ids.extend(self.get_ids(response))
+            url = response.data['next']
+
+        self.assertEqual(ids, self.expected)
+        self.assertIsNone(pages[0]['previous'])
+
+        # Ссылка previous возвращает на предыдущую страницу
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual(self.get_ids(response), self.expected[2:4])
+
+    def test_page_numbers_without_count(self):
+        """count=none pages by offset and skips COUNT(*)"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/companies/?page=2&page_size=3&count=none')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(self.get_ids(response), self.expected[3:6])
+        self.assertIsNotNone(response.data['next'])
+        self.assertFalse(
+            any(query['sql'].startswith('SELECT COUNT(*) AS "__count" FROM "companies_company"')
+                for query in queries.captured_queries)
+        )
+
+    def test_invalid_cursor(self):
+        """A malformed cursor is rejected"""
+        response = self.client.get('/api/companies/?cursor=broken')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
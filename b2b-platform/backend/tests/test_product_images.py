@@ -0,0 +1,285 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from app.ads.admin import AdAdminForm
+from app.ads.models import Ad
+from app.common.utils import inspect_image
+from app.companies.models import Company
+from app.products.models import ImageAsset, Product, ProductImage
+from app.products.tasks import process_product_image
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image_file(name='photo.png', size=(800, 600), image_format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, format=image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProductImageProcessingTestCase(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.supplier = User.objects.create_user(
+            email='supplier@example.com',
+            username='supplier',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        self.company = Company.objects.create(
+            owner=self.supplier,
+            name='Image Company',
+            description='Description',
+            city='Almaty',
+            address='Address'
+        )
+        self.client.force_authenticate(user=self.supplier)
+
+    def create_product(self):
+        return self.client.post(
+            '/api/products/',
+            {'title': 'Product', 'description': 'Desc', 'is_active': True, 'image': make_image_file()},
+            format='multipart'
+        )
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=True)
+    def test_upload_is_stored_raw_and_served_as_placeholder(self):
+        """Raw upload is stored immediately and a placeholder is returned until processed"""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.create_product()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(callbacks), 1)
+        self.assertIn('placeholder', response.data['image'])
+
+        product = Product.objects.get()
+        self.assertEqual(product.image_status, Product.IMAGE_STATUS_PENDING)
+        self.assertTrue(product.image.name.endswith('photo.png'))
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=True)
+    def test_worker_replaces_raw_image_with_variants(self):
+        """Background worker builds width variants and marks the image as ready"""
+        with self.captureOnCommitCallbacks(execute=False):
+            self.create_product()
+        product = Product.objects.get()
+        raw_name = product.image.name
+
+        process_product_image(product.id)
+
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, Product.IMAGE_STATUS_READY)
+        self.assertFalse(product.image.storage.exists(raw_name))
+        self.assertEqual(product.image.name, product.image_variants['original']['jpeg'])
+
+        thumbnail = product.image_variants['thumbnail']
+        self.assertEqual((thumbnail['width'], thumbnail['height']), (320, 240))
+        self.assertRegex(thumbnail['webp'], r'^images/[0-9a-f]{2}/[0-9a-f]{64}/320w\.webp$')
+        with Image.open(product.image.storage.path(thumbnail['jpeg'])) as variant:
+            self.assertEqual(variant.format, 'JPEG')
+        self.assertEqual(product.image_variants['original']['width'], 800)
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=False)
+    def test_list_exposes_srcset(self):
+        """List serializer exposes the variant map once processing is done"""
+        self.assertEqual(self.create_product().status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get('/api/products/')
+        srcset = response.data['results'][0]['image_srcset']
+        self.assertEqual(set(srcset), {'thumbnail', 'medium', 'original'})
+        self.assertTrue(srcset['medium']['webp'].endswith('/800w.webp'))
+        self.assertTrue(srcset['medium']['jpeg'].endswith('/800w.jpg'))
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=True)
+    def test_sweep_processes_jobs_lost_with_worker(self):
+        """Pending images whose queued job was lost are picked up by process_product_images"""
+        with self.captureOnCommitCallbacks(execute=False):
+            self.create_product()
+        product = Product.objects.get()
+
+        call_command('process_product_images', '--older-than', '600', stdout=StringIO())
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, Product.IMAGE_STATUS_PENDING)
+
+        Product.objects.filter(pk=product.pk).update(updated_at=timezone.now() - timedelta(minutes=15))
+        call_command('process_product_images', '--older-than', '600', stdout=StringIO())
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, Product.IMAGE_STATUS_READY)
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=False)
+    def test_failed_create_does_not_leak_asset_reference(self):
+        """The asset reference taken for a duplicate upload is rolled back if the product INSERT fails"""
+        self.create_product()
+        asset = ImageAsset.objects.get()
+
+        with mock.patch.object(Product.objects, 'create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.create_product()
+        asset.refresh_from_db()
+        self.assertEqual(asset.ref_count, 1)
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=True)
+    def test_replacing_pending_image_deletes_raw_upload(self):
+        """Replacing an image that was never processed removes the previous raw file"""
+        with self.captureOnCommitCallbacks(execute=False):
+            self.create_product()
+        product = Product.objects.get()
+        raw_name = product.image.name
+
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.patch(
+                f'/api/products/{product.pk}/',
+                {'image': make_image_file('second.png', size=(640, 480))},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        product.refresh_from_db()
+        self.assertTrue(product.image.name.endswith('second.png'))
+        self.assertFalse(product.image.storage.exists(raw_name))
+        self.assertTrue(product.image.storage.exists(product.image.name))
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=False)
+    def test_failed_gallery_image_is_skipped_by_sweep(self):
+        """A gallery image that failed processing is retried only with --include-failed"""
+        product = Product.objects.create(company=self.company, title='Product', description='Desc')
+        with self.assertLogs('app.products.tasks', level='ERROR'):
+            image = ProductImage.objects.create(product=product, image='product_images/missing.jpg')
+        image.refresh_from_db()
+        self.assertTrue(image.image_failed)
+
+        with mock.patch('app.products.tasks.process_gallery_image') as process:
+            call_command('process_product_images', stdout=StringIO())
+            process.assert_not_called()
+            call_command('process_product_images', '--include-failed', stdout=StringIO())
+            process.assert_called_once_with(image.pk)
+        image.refresh_from_db()
+        self.assertFalse(image.image_failed)
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=False)
+    def test_same_photo_is_stored_once(self):
+        """Re-uploading identical content reuses the processed asset without reprocessing"""
+        self.create_product()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.create_product()
+
+        self.assertEqual(len(callbacks), 0)
+        self.assertNotIn('placeholder', response.data['image'])
+        asset = ImageAsset.objects.get()
+        self.assertEqual(asset.ref_count, 2)
+        self.assertEqual(
+            set(Product.objects.values_list('image', flat=True)), {asset.main_image_path}
+        )
+
+        Product.objects.first().delete()
+        asset.refresh_from_db()
+        self.assertEqual(asset.ref_count, 1)
+
+        Product.objects.get().delete()
+        self.assertFalse(ImageAsset.objects.exists())
+
+    def test_list_resolves_gallery_images_without_extra_queries(self):
+        """Gallery fallback images come from the prefetch, not per-row queries"""
+        def add_products(count):
+            for index in range(count):
+                product = Product.objects.create(
+                    company=self.company, title=f'Product {index}', description='Desc'
+                )
+                ProductImage.objects.create(product=product, image='product_images/a.jpg')
+                ProductImage.objects.create(product=product, image='product_images/b.jpg', is_primary=True)
+
+        self.client.force_authenticate(user=None)
+        add_products(2)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/products/')
+        self.assertTrue(response.data['results'][0]['image'].endswith('product_images/b.jpg'))
+
+        add_products(5)
+        with self.assertNumQueries(3):
+            self.client.get('/api/products/')
+
+    def test_invalid_extension_is_rejected_synchronously(self):
+        """Unsupported files are rejected in the request without queueing work"""
+        response = self.client.post(
+            '/api/products/',
+            {'title': 'Product', 'description': 'Desc', 'image': make_image_file('photo.gif', image_format='GIF')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Product.objects.exists())
+
+
+class ImageHeaderValidationTestCase(APITestCase):
+    def test_header_is_read_once_and_cached(self):
+        """Format and size are sniffed from the header once per upload object"""
+        upload = make_image_file(size=(640, 480))
+
+        with mock.patch('app.common.utils.Image.open', wraps=Image.open) as image_open:
+            first = inspect_image(upload)
+            second = inspect_image(upload)
+
+        self.assertEqual(image_open.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual((first.format, first.width, first.height), ('PNG', 640, 480))
+        self.assertEqual(upload.tell(), 0)
+
+    def test_ad_edit_does_not_reread_stored_image(self):
+        """Editing an ad validates only newly uploaded images, not the stored file"""
+        now = timezone.now()
+        ad = Ad.objects.create(
+            title='Ad', image='ad_images/missing.png', url='https://example.com', position='BANNER',
+            starts_at=now, ends_at=now + timedelta(days=1),
+        )
+        data = {
+            'title': 'Renamed', 'url': ad.url, 'position': ad.position, 'status': ad.status,
+            'is_active': True, 'starts_at': now, 'ends_at': now + timedelta(days=1),
+        }
+        self.assertTrue(AdAdminForm(data, instance=ad).is_valid())
+
+        with override_settings(IMAGE_MAX_PIXELS=100_000):
+            form = AdAdminForm(data, {'image': make_image_file(size=(1000, 1000))}, instance=ad)
+            self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    @override_settings(IMAGE_MAX_PIXELS=100_000)
+    def test_oversized_image_is_rejected_before_decoding(self):
+        """Uploads above IMAGE_MAX_PIXELS are rejected from the header alone"""
+        supplier = User.objects.create_user(
+            email='bomb@example.com',
+            username='bomb',
+            password='TestPass123!',
+            role='ROLE_SUPPLIER'
+        )
+        Company.objects.create(
+            owner=supplier, name='Company', description='Description', city='Almaty', address='Address'
+        )
+        self.client.force_authenticate(user=supplier)
+
+        with mock.patch('PIL.ImageFile.ImageFile.load') as load:
+            response = self.client.post(
+                '/api/products/',
+                {'title': 'Product', 'description': 'Desc', 'image': make_image_file(size=(1000, 1000))},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', response.data)
+        load.assert_not_called()
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from app.common.profiling import fingerprint_sql, profiling_registry
+from app.companies.models import Company
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+class ProfilingMiddlewareTestCase(APITestCase):
+    def setUp(self):
+        profiling_registry.reset()
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            username='admin',
+            password='TestPass123!',
+            role='ROLE_ADMIN'
+        )
+        for index in range(3):
+            Company.objects.create(
+                owner=self.admin, name=f'Company {index}', description='Description',
+                city='Almaty', address='Address',
+            )
+
+    def test_server_timing_and_route_stats(self):
+        """Profiled requests report timings in headers and per-route stats"""
+        response = self.client.get('/api/companies/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/monitoring/profiling/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        routes = {item['route']: item for item in response.data['routes']}
+        stats = routes['GET /api/companies/']
+        self.assertEqual(stats['count'], 1)
+        self.assertGreater(stats['avg_queries'], 0)
+        # Сериализатор списка компаний делает запросы на каждую строку
+        self.assertEqual(stats['requests_with_duplicates'], 1)
+        self.assertTrue(stats['top_duplicates'])
+
+    def test_stats_are_admin_only(self):
+        response = self.client.get('/api/monitoring/profiling/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_fingerprint_ignores_values(self):
+        first, _ = fingerprint_sql('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21')
+        second, _ = fingerprint_sql('SELECT * FROM t WHERE id IN (%s) LIMIT 5')
+        self.assertEqual(first, second)
@@ -0,0 +1,117 @@
+"""
+Старт воркера: бюджеты django.setup() и загрузки URLconf, прогрев воркера.
+
+Старт измеряется в отдельном интерпретаторе с python -X importtime, как
+при запуске воркера gunicorn. Тест падает, если превышены бюджеты времени
+и памяти (STARTUP_BUDGET_MS, STARTUP_RSS_BUDGET_MB для медленных машин CI),
+если при старте загружается pandas или если tablib, openpyxl и numpy
+импортирует код приложения, а не django-import-export из админки.
+"""
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.db import connections
+from django.test import SimpleTestCase
+
+from app.ads.schedule import schedule
+from app.common.services import CurrencyConverter
+from app.common.warmup import warm_up
+
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 2000))
+STARTUP_RSS_BUDGET_MB = float(os.environ.get("STARTUP_RSS_BUDGET_MB", 140))
+# Модули, которые нужны только эндпоинтам импорта/экспорта
+LAZY_MODULES = ["pandas"]
+# Загружаются при старте только через django-import-export (админка):
+# tablib регистрирует формат xlsx при импорте и тянет openpyxl и numpy
+ADMIN_ONLY_MODULES = ["tablib", "openpyxl", "numpy"]
+ADMIN_IMPORTER = "import_export"
+
+# RSS берется из /proc: ru_maxrss дочернего процесса на Linux может
+# унаследовать пик родителя (pytest) через fork
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - started
+try:
+    with open("/proc/self/status") as status:
+        rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"ms": elapsed * 1000, "rss_mb": rss_kb / 1024, "modules": sorted(sys.modules)}))
+"""
+
+
+def slowest_imports(importtime_output, limit=10):
+    """Самые долгие импорты верхнего уровня из вывода -X importtime"""
+    entries = []
+    for line in importtime_output.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        if name.startswith("  "):
+            continue
+        entries.append((int(parts[1]) / 1000, name.strip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def import_chain(importtime_output, module):
+    """Цепочка импортов, которая привела к первой загрузке module (от module к верхнему уровню)"""
+    lines = [line.split("|") for line in importtime_output.splitlines()]
+    lines = [parts[2].rstrip() for parts in lines if len(parts) == 3 and parts[1].strip().isdigit()]
+    for index, name in enumerate(lines):
+        if name.strip() != module:
+            continue
+        # Вложенные импорты выводятся раньше родителя и с большим отступом
+        chain, indent = [module], len(name) - len(name.lstrip())
+        for parent in lines[index + 1:]:
+            parent_indent = len(parent) - len(parent.lstrip())
+            if parent_indent < indent:
+                chain.append(parent.strip())
+                indent = parent_indent
+        return chain
+    return []
+
+
+class WorkerStartupTestCase(SimpleTestCase):
+    def test_startup_budget(self):
+        """django.setup() and URL loading stay within time/RSS budgets and load spreadsheet libraries only via the admin"""
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="app.settings")
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        slowest = "\n".join(f"{ms:8.1f} ms  {name}" for ms, name in slowest_imports(completed.stderr))
+
+        loaded = [module for module in LAZY_MODULES if module in result["modules"]]
+        self.assertEqual(loaded, [], f"Loaded at startup:\n{slowest}")
+        for module in ADMIN_ONLY_MODULES:
+            chain = import_chain(completed.stderr, module)
+            self.assertTrue(
+                not chain or any(name.startswith(ADMIN_IMPORTER) for name in chain),
+                f"{module} is imported at startup outside of {ADMIN_IMPORTER}: {' <- '.join(chain)}",
+            )
+        self.assertLess(result["ms"], STARTUP_BUDGET_MS, f"Startup took {result['ms']:.0f} ms:\n{slowest}")
+        self.assertLess(result["rss_mb"], STARTUP_RSS_BUDGET_MB, f"RSS {result['rss_mb']:.0f} MB:\n{slowest}")
+
+
+class WorkerWarmupTestCase(SimpleTestCase):
+    def test_warm_up_is_local_and_runs_every_step(self):
+        """warm_up() makes no network calls and a failing step does not skip the others"""
+        with mock.patch.object(connections['default'], 'ensure_connection', side_effect=RuntimeError), \
+                mock.patch.object(schedule, 'current') as current, \
+                mock.patch.object(CurrencyConverter, '_fetch_rates') as fetch_rates, \
+                self.assertLogs('app.common.warmup', level='ERROR'):
+            warm_up()
+
+        current.assert_called_once_with()
+        fetch_rates.assert_not_called()
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from app.common.view_tracking import get_views_buffer
+from app.companies.models import Company, CompanyDailyViews
+from app.products.models import Product, ProductDailyViews
+
+User = get_user_model()
+
+
+class ViewTrackingTestCase(APITestCase):
+    def setUp(self):
+        # Остаток счетчиков других тестов отбрасывается: их объектов уже нет
+        get_views_buffer().flush()
+        self.owner = User.objects.create_user(
+            email='owner@example.com', username='owner', password='TestPass123!', role='ROLE_SUPPLIER'
+        )
+        self.company = Company.objects.create(
+            owner=self.owner, name='Company', description='Description', city='Almaty', address='Address',
+            status='APPROVED',
+        )
+        self.product = Product.objects.create(company=self.company, title='Product', description='Description', price=100)
+
+    def test_views_are_buffered_and_reported_to_owner(self):
+        """Detail GETs only count in memory; the flush writes daily rows shown to the owner"""
+        for _ in range(3):
+            self.client.get(f'/api/companies/{self.company.pk}/')
+        for _ in range(2):
+            self.client.get(f'/api/products/{self.product.pk}/')
+        self.client.force_authenticate(user=self.owner)
+        self.client.get(f'/api/companies/{self.company.pk}/')
+        self.assertFalse(CompanyDailyViews.objects.exists())
+
+        get_views_buffer().flush()
+        self.assertEqual(CompanyDailyViews.objects.get(company=self.company).views, 3)
+        self.assertEqual(ProductDailyViews.objects.get(product=self.product).views, 2)
+
+        report = self.client.get('/api/companies/my/view-stats/').json()
+        self.assertEqual(report['total'], 3)
+        self.assertEqual(report['results'], [{'id': self.company.pk, 'title': 'Company', 'views': 3}])
+        self.assertEqual(self.client.get('/api/products/my/view-stats/').json()['total'], 2)
+
+        other = User.objects.create_user(email='other@example.com', username='other', password='TestPass123!')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get('/api/products/my/view-stats/').json()['total'], 0)